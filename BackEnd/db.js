@@ -14,3 +14,32 @@ export async function connessioneDb(){
     }
 }
 
+// Campi essenziali di una gara, senza i risultati dei piloti
+export const leanRaceProjection = {
+    _id: 1,
+    race_id: 1,
+    description: 1,
+    scheduled: 1,
+    scheduled_end: 1,
+    status: 1,
+    season_year: 1,
+    venue_id: 1
+}
+
+// Fasi di aggregazione che sostituiscono il riferimento venue_id di una gara
+// con i soli campi indicati del circuito, letti dalla collezione venues
+export const venueLookup = (fields) => [
+    {
+        $lookup: {
+            from: 'venues',
+            let: { venue_id: '$venue_id' },
+            pipeline: [
+                { $match: { $expr: { $eq: ['$venue_id', '$$venue_id'] } } },
+                { $project: { _id: 0, ...Object.fromEntries(fields.map(field => [field, 1])) } }
+            ],
+            as: 'venue'
+        }
+    },
+    { $addFields: { venue: { $ifNull: [{ $arrayElemAt: ['$venue', 0] }, {}] } } },
+    { $project: { venue_id: 0 } }
+]
@@ -1,5 +1,5 @@
 import express from 'express';
-import { connessioneDb } from '../db.js';
+import { connessioneDb, leanRaceProjection, venueLookup } from '../db.js';
 
 const router = express.Router();
 
@@ -80,26 +80,9 @@ router.get('/', async (req, res) => {
 
         console.log('\nRecupero gare dal database...');
         const races = await collection.aggregate([
-            // Proietta solo i campi necessari
-            {
-                $project: {
-                    _id: 1,
-                    race_id: 1,
-                    description: 1,
-                    scheduled: 1,
-                    scheduled_end: 1,
-                    status: 1,
-                    venue: {
-                        name: 1,
-                        city: 1,
-                        country: 1,
-                        length: 1,
-                        curves_left: 1,
-                        curves_right: 1
-                    },
-                    season_year: 1
-                }
-            }
+            // Proietta solo i campi necessari e unisci i dati del circuito
+            { $project: leanRaceProjection },
+            ...venueLookup(['name', 'city', 'country', 'length', 'curves_left', 'curves_right'])
         ]).toArray();
 
         console.log(`Trovate ${races.length} gare nel database`);
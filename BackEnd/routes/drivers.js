@@ -1,60 +1,36 @@
 import express from 'express';
-import { connessioneDb } from '../db.js';
+import { connessioneDb, leanRaceProjection, venueLookup } from '../db.js';
 
 const router = express.Router();
 
+// Proiezione delle classifiche materializzate nel formato delle risposte
+const standingsProjection = {
+    _id: "$driver_id",
+    nome: { $replaceAll: { input: "$name", find: ",", replacement: " " } },
+    numero_auto: "$car_number",
+    punti_totali: "$points",
+    vittorie: "$wins",
+    podi: "$podiums",
+    gare_disputate: "$starts"
+};
+
 // Endpoint per ottenere tutti i piloti con i loro punti totali
 router.get('/', async (req, res) => {
     try {
         const db = await connessioneDb();
-        const collection = db.collection('races');
         const season = req.query.season;
 
-        const pipeline = [
-            // Unwind dell'array dei piloti per ogni gara
-            { $unwind: "$drivers" },
-        ];
+        // Statistiche stagionali o carriere già calcolate dal caricamento dei dati
+        const collection = season && season !== 'all'
+            ? db.collection('driver_season_stats')
+            : db.collection('driver_careers');
+        const filter = season && season !== 'all' ? { season_year: season } : {};
 
-        // Aggiungi il filtro per stagione solo se specificata
-        if (season && season !== 'all') {
-            pipeline.unshift({ $match: { season_year: season } });
-        }
-            
-        // Aggiungi il resto della pipeline
-        pipeline.push(
-            // Raggruppa per pilota
-            {
-                $group: {
-                    _id: "$drivers.driver_id",
-                    nome: { $first: "$drivers.name" },
-                    numero_auto: { $first: "$drivers.car_number" },
-                    punti_totali: { $sum: "$drivers.points" },
-                    vittorie: {
-                        $sum: {
-                            $cond: [{ $eq: ["$drivers.position", 1] }, 1, 0]
-                        }
-                    },
-                    podi: {
-                        $sum: {
-                            $cond: [{ $lte: ["$drivers.position", 3] }, 1, 0]
-                        }
-                    },
-                    gare_disputate: { $sum: 1 }
-                }
-            },
-            
-            // Rimuovi la virgola dal nome
-            {
-                $addFields: {
-                    nome: { $replaceAll: { input: "$nome", find: ",", replacement: " " } }
-                }
-            },
-            
-            // Ordina per punti totali in ordine decrescente
-            { $sort: { punti_totali: -1 } }
-        );
-
-        const drivers = await collection.aggregate(pipeline).toArray();
+        const drivers = await collection
+            .find(filter)
+            .project(standingsProjection)
+            .sort({ points: -1 })
+            .toArray();
 
         res.json(drivers);
     } catch (error) {
@@ -70,30 +46,12 @@ router.get('/:driverId', async (req, res) => {
         const collection = db.collection('races');
         const driverId = req.params.driverId;
 
-        // Ottieni i dettagli generali del pilota
-        const driverDetails = await collection.aggregate([
-            { $unwind: "$drivers" },
-            { $match: { "drivers.driver_id": driverId } },
-            {
-                $group: {
-                    _id: "$drivers.driver_id",
-                    nome: { $first: "$drivers.name" },
-                    numero_auto: { $first: "$drivers.car_number" },
-                    punti_totali: { $sum: "$drivers.points" },
-                    vittorie: {
-                        $sum: {
-                            $cond: [{ $eq: ["$drivers.position", 1] }, 1, 0]
-                        }
-                    },
-                    podi: {
-                        $sum: {
-                            $cond: [{ $lte: ["$drivers.position", 3] }, 1, 0]
-                        }
-                    },
-                    gare_disputate: { $sum: 1 }
-                }
-            }
-        ]).toArray();
+        // Ottieni i dettagli generali del pilota dalla sua carriera
+        const driverDetails = await db.collection('driver_careers')
+            .find({ driver_id: driverId })
+            .project(standingsProjection)
+            .limit(1)
+            .toArray();
 
         if (driverDetails.length === 0) {
             return res.status(404).json({ error: 'Pilota non trovato' });
@@ -101,6 +59,7 @@ router.get('/:driverId', async (req, res) => {
 
         // Ottieni lo storico delle gare
         const raceHistory = await collection.aggregate([
+            { $match: { "drivers.driver_id": driverId } },
             { $unwind: "$drivers" },
             { $match: { "drivers.driver_id": driverId } },
             {
@@ -109,7 +68,7 @@ router.get('/:driverId', async (req, res) => {
                     description: 1,
                     date: "$scheduled_end",
                     status: 1,
-                    venue: 1,
+                    venue_id: 1,
                     position: "$drivers.position",
                     points: "$drivers.points",
                     scheduled: 1,
@@ -128,13 +87,14 @@ router.get('/:driverId', async (req, res) => {
                         }
                     }
                 }
-            }
+            },
+            // Dati del circuito dalla collezione venues
+            ...venueLookup(['name', 'city', 'country'])
         ]).toArray();
 
         // Formatta la risposta
         const response = {
             ...driverDetails[0],
-            nome: driverDetails[0].nome.replace(/,/g, ' '),
             race_history: raceHistory.map(race => ({
                 race_id: race.race_id,
                 description: race.description,
@@ -164,57 +124,25 @@ router.get('/homepage/2025', async (req, res) => {
         const db = await connessioneDb();
         const collection = db.collection('races');
 
+        // Classifica 2025 dalle statistiche stagionali materializzate
+        const standings2025 = db.collection('driver_season_stats');
+        const { gare_disputate, ...homepageProjection } = { ...standingsProjection, nome: "$name" };
+
         // Ottieni il leader della classifica 2025
-        const leader2025 = await collection.aggregate([
-            { $match: { season_year: "2025" } },
-            { $unwind: "$drivers" },
-            {
-                $group: {
-                    _id: "$drivers.driver_id",
-                    nome: { $first: "$drivers.name" },
-                    numero_auto: { $first: "$drivers.car_number" },
-                    punti_totali: { $sum: "$drivers.points" },
-                    vittorie: {
-                        $sum: {
-                            $cond: [{ $eq: ["$drivers.position", 1] }, 1, 0]
-                        }
-                    },
-                    podi: {
-                        $sum: {
-                            $cond: [{ $lte: ["$drivers.position", 3] }, 1, 0]
-                        }
-                    }
-                }
-            },
-            { $sort: { punti_totali: -1 } },
-            { $limit: 1 }
-        ]).toArray();
+        const leader2025 = await standings2025
+            .find({ season_year: "2025" })
+            .project(homepageProjection)
+            .sort({ points: -1 })
+            .limit(1)
+            .toArray();
 
         // Ottieni i top 10 piloti del 2025 ordinati per punti
-        const topDrivers2025 = await collection.aggregate([
-            { $match: { season_year: "2025" } },
-            { $unwind: "$drivers" },
-            {
-                $group: {
-                    _id: "$drivers.driver_id",
-                    nome: { $first: "$drivers.name" },
-                    numero_auto: { $first: "$drivers.car_number" },
-                    punti_totali: { $sum: "$drivers.points" },
-                    vittorie: {
-                        $sum: {
-                            $cond: [{ $eq: ["$drivers.position", 1] }, 1, 0]
-                        }
-                    },
-                    podi: {
-                        $sum: {
-                            $cond: [{ $lte: ["$drivers.position", 3] }, 1, 0]
-                        }
-                    }
-                }
-            },
-            { $sort: { punti_totali: -1, vittorie: -1, podi: -1 } }, // Ordina prima per punti, poi per vittorie, infine per podi
-            { $limit: 10 }
-        ]).toArray();
+        const topDrivers2025 = await standings2025
+            .find({ season_year: "2025" })
+            .project(homepageProjection)
+            .sort({ points: -1, wins: -1, podiums: -1 }) // Ordina prima per punti, poi per vittorie, infine per podi
+            .limit(10)
+            .toArray();
 
         // Calcola il pilota favorito considerando tutte le stagioni
         const favoriteDriver = await collection.aggregate([
@@ -293,7 +221,9 @@ router.get('/homepage/2025', async (req, res) => {
         // Ottieni tutte le gare del 2025 ordinate per data
         const allRaces2025 = await collection.aggregate([
             { $match: { season_year: "2025" } },
-            { $sort: { scheduled: 1 } }
+            { $sort: { scheduled: 1 } },
+            { $project: leanRaceProjection },
+            ...venueLookup(['name', 'city', 'country'])
         ]).toArray();
 
         // Trova la prossima gara
@@ -0,0 +1,109 @@
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Aggiungi la directory Data al path per importare i moduli condivisi
+DATA_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(DATA_DIR))
+
+from extractors import json_codec
+
+RESULTS_DIR = DATA_DIR / "benchmarks" / "results"
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def stdlib_backend():
+    return {
+        "loads": json.loads,
+        "dumps_compact": lambda obj: json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+        "dumps_pretty": lambda obj: json.dumps(obj, indent=4, ensure_ascii=False).encode("utf-8")
+    }
+
+
+def orjson_backend():
+    return {
+        "loads": orjson.loads,
+        "dumps_compact": orjson.dumps,
+        "dumps_pretty": lambda obj: orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    }
+
+
+def best_time(func, repeat):
+    """Tempo migliore su `repeat` esecuzioni"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_backend(backend, payloads, repeat) -> dict:
+    """Throughput di decodifica e codifica (MB/s) e dimensione dell'output"""
+    documents = [backend["loads"](payload) for payload in payloads]
+    input_mb = sum(len(payload) for payload in payloads) / 1e6
+    compact = [backend["dumps_compact"](document) for document in documents]
+    pretty = [backend["dumps_pretty"](document) for document in documents]
+    decode = best_time(lambda: [backend["loads"](payload) for payload in payloads], repeat)
+    encode_compact = best_time(lambda: [backend["dumps_compact"](document) for document in documents], repeat)
+    encode_pretty = best_time(lambda: [backend["dumps_pretty"](document) for document in documents], repeat)
+    return {
+        "decode_mb_per_s": round(input_mb / decode, 1),
+        "encode_compact_mb_per_s": round(input_mb / encode_compact, 1),
+        "encode_pretty_mb_per_s": round(input_mb / encode_pretty, 1),
+        "compact_bytes": sum(len(payload) for payload in compact),
+        "pretty_bytes": sum(len(payload) for payload in pretty)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dei backend JSON sui file estratti")
+    parser.add_argument("--data-dir", default=str(DATA_DIR / "extracted"), help="Directory dei file season_*.json")
+    parser.add_argument("--repeat", type=int, default=5, help="Ripetizioni per misura (si usa la migliore)")
+    parser.add_argument("--output", help="File dei risultati (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    files = sorted(Path(args.data_dir).glob("season_*.json"))
+    if not files:
+        print(f"✗ Nessun file season_*.json in {args.data_dir}")
+        return
+    payloads = [file.read_bytes() for file in files]
+    print(f"=== Benchmark codec JSON: {len(files)} file, {sum(map(len, payloads)) / 1e6:.1f} MB ===")
+    print(f"Backend in uso: {json_codec.BACKEND}\n")
+
+    backends = {"json": stdlib_backend()}
+    if orjson:
+        backends["orjson"] = orjson_backend()
+    else:
+        print("! orjson non installato (pip install orjson): misurato solo il modulo json\n")
+
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "corpus": {"files": len(files), "bytes": sum(map(len, payloads))},
+        "backends": {name: benchmark_backend(backend, payloads, args.repeat) for name, backend in backends.items()}
+    }
+    for name, stats in results["backends"].items():
+        print(f"{name:<8} decodifica {stats['decode_mb_per_s']:>7} MB/s - "
+              f"codifica compatta {stats['encode_compact_mb_per_s']:>7} MB/s - "
+              f"indentata {stats['encode_pretty_mb_per_s']:>7} MB/s")
+        print(f"{'':<8} dimensione compatta {stats['compact_bytes'] / 1e6:.2f} MB - "
+              f"indentata {stats['pretty_bytes'] / 1e6:.2f} MB")
+
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"json_codec_{results['created_at'].replace(':', '').replace('-', '')[:15]}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    print(f"\n✓ Risultati salvati in {output}")
+
+
+if __name__ == "__main__":
+    main()
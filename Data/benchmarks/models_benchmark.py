@@ -0,0 +1,193 @@
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Aggiungi la directory Data al path per importare i moduli condivisi
+DATA_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(DATA_DIR))
+
+from extractors.models import CompetitorResult, Driver, Race, Venue
+from extractors.season_store import get_season_store
+
+RESULTS_DIR = DATA_DIR / "benchmarks" / "results"
+
+
+def dict_driver_ref(competitor):
+    """Riferimento a un pilota come dizionario (formato precedente ai modelli)"""
+    return {
+        "driver_id": competitor["id"],
+        "name": competitor.get("name"),
+        "position": competitor.get("result", {}).get("position"),
+        "points": competitor.get("result", {}).get("points"),
+        "car_number": competitor.get("result", {}).get("car_number")
+    }
+
+
+def dict_race_doc(race_data, season_year):
+    """Documento di una gara costruito con i dizionari (formato precedente ai modelli)"""
+    competitors = []
+    complete_details = race_data.get("complete_details", {})
+    if complete_details:
+        stage = complete_details.get("stage", {})
+        if stage:
+            competitors = stage.get("competitors", [])
+    return {
+        "race_id": race_data["id"],
+        "stage_id": race_data["stage_id"],
+        "season_year": season_year,
+        "description": race_data["description"],
+        "scheduled": race_data.get("scheduled"),
+        "scheduled_end": race_data.get("scheduled_end"),
+        "status": race_data.get("status"),
+        "type": race_data.get("type"),
+        "venue": race_data.get("venue", {}),
+        "drivers": [dict_driver_ref(competitor) for competitor in competitors if competitor.get("id")],
+        "race_result": race_data.get("race_result", {}),
+        "statistics": race_data.get("statistics", {})
+    }
+
+
+def dict_consolidate(races):
+    """Consolidamento dei piloti con un dizionario per pilota (formato precedente ai modelli)"""
+    drivers_by_id = {}
+    for race in races:
+        for competitor in race["complete_details"].get("stage", {}).get("competitors", []):
+            info = {
+                "id": competitor.get("id"),
+                "name": competitor.get("name"),
+                "gender": competitor.get("gender"),
+                "nationality": competitor.get("nationality"),
+                "country_code": competitor.get("country_code")
+            }
+            if "result" in competitor and "car_number" in competitor["result"]:
+                info["car_number"] = competitor["result"]["car_number"]
+            current = drivers_by_id.setdefault(info["id"], {})
+            for key, value in info.items():
+                if value and not current.get(key):
+                    current[key] = value
+    return drivers_by_id
+
+
+def model_consolidate(races):
+    """Consolidamento dei piloti con i modelli Driver"""
+    drivers_by_id = {}
+    for race in races:
+        for competitor in race["complete_details"].get("stage", {}).get("competitors", []):
+            driver = Driver.from_competitor(competitor)
+            current = drivers_by_id.get(driver.id)
+            if current is None:
+                drivers_by_id[driver.id] = current = Driver(driver.id)
+            current.fill(driver)
+    return drivers_by_id
+
+
+def best_time(func, repeat):
+    """Tempo migliore su `repeat` esecuzioni"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def retained_bytes(build):
+    """Memoria occupata dagli oggetti restituiti da `build`"""
+    gc.collect()
+    tracemalloc.start()
+    objects = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return size
+
+
+def compare(name, build_dicts, build_models, count, repeat) -> dict:
+    """Memoria per record e tempo di costruzione: dizionari contro modelli"""
+    dict_bytes = retained_bytes(build_dicts)
+    model_bytes = retained_bytes(build_models)
+    dict_seconds = best_time(build_dicts, repeat)
+    model_seconds = best_time(build_models, repeat)
+    stats = {
+        "records": count,
+        "dict_bytes_per_record": round(dict_bytes / count, 1),
+        "model_bytes_per_record": round(model_bytes / count, 1),
+        "dict_seconds": round(dict_seconds, 5),
+        "model_seconds": round(model_seconds, 5)
+    }
+    print(f"{name:<14} {count:>7} record - memoria {stats['dict_bytes_per_record']:>7} -> "
+          f"{stats['model_bytes_per_record']:>7} byte/record ({model_bytes / dict_bytes - 1:+.0%}) - "
+          f"tempo {dict_seconds * 1000:>8.2f} -> {model_seconds * 1000:>8.2f} ms "
+          f"({model_seconds / dict_seconds - 1:+.0%})")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dei modelli con __slots__ rispetto ai dizionari")
+    parser.add_argument("--data-dir", default=str(DATA_DIR / "extracted"), help="Directory delle stagioni estratte")
+    parser.add_argument("--storage", choices=("json", "columnar"), default="json",
+                        help="Formato dei file delle stagioni")
+    parser.add_argument("--repeat", type=int, default=5, help="Ripetizioni per misura (si usa la migliore)")
+    parser.add_argument("--output", help="File dei risultati (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    store = get_season_store(args.storage, args.data_dir)
+    races = [(year, race) for year in store.years() for race in store.iter_races(year)]
+    if not races:
+        print(f"✗ Nessuna stagione in {args.data_dir}")
+        return
+    competitors = [
+        competitor for _, race in races
+        for competitor in Race.from_json(race).stage_competitors if competitor.get("id")
+    ]
+    venues = [race.get("venue") or {} for _, race in races]
+    print(f"=== Benchmark modelli: {len(races)} gare, {len(competitors)} risultati ===\n")
+
+    race_records = [race for _, race in races]
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "corpus": {"races": len(races), "results": len(competitors)},
+        "records": {
+            "results": compare(
+                "risultati",
+                lambda: [dict_driver_ref(competitor) for competitor in competitors],
+                lambda: [CompetitorResult.from_competitor(competitor) for competitor in competitors],
+                len(competitors), args.repeat
+            ),
+            "venues": compare(
+                "circuiti",
+                lambda: [dict(venue) for venue in venues],
+                lambda: [Venue.from_payload(venue) for venue in venues],
+                len(venues), args.repeat
+            ),
+            "drivers": compare(
+                "piloti",
+                lambda: dict_consolidate(race_records),
+                lambda: model_consolidate(race_records),
+                len(dict_consolidate(race_records)), args.repeat
+            ),
+            "race_documents": compare(
+                "documenti gara",
+                lambda: [dict_race_doc(race, year) for year, race in races],
+                lambda: [Race.from_json(race).to_bson(year) for year, race in races],
+                len(races), args.repeat
+            )
+        }
+    }
+
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"models_{results['created_at'].replace(':', '').replace('-', '')[:15]}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    print(f"\n✓ Risultati salvati in {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Aggiungi la directory Data al path per importare i moduli condivisi
+DATA_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(DATA_DIR))
+
+from benchmarks.synthetic_data import SyntheticApi
+from benchmarks.stub_server import StubServer
+
+# Directory dei risultati, confrontabili tra versioni diverse del codice
+RESULTS_DIR = DATA_DIR / "benchmarks" / "results"
+
+
+def git_version() -> str:
+    """Commit corrente del repository, se disponibile"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=DATA_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def timed(stages, name, func, verbose=False):
+    """
+    Esegue una fase misurando tempo reale e tempo CPU; l'output della fase
+    viene soppresso salvo `verbose`
+    """
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    with output:
+        result = func()
+    stages[name] = {
+        "wall_seconds": round(time.perf_counter() - wall_start, 4),
+        "cpu_seconds": round(time.process_time() - cpu_start, 4)
+    }
+    print(f"  {name:<10} {stages[name]['wall_seconds']:>9.3f}s reali  {stages[name]['cpu_seconds']:>9.3f}s CPU")
+    return result
+
+
+def use_in_memory_mongodb(mongodb_adapter) -> bool:
+    """Sostituisce il client MongoDB con mongomock, se installato"""
+    try:
+        import mongomock
+    except ImportError:
+        print("✗ mongomock non installato (pip install mongomock): indicare --mongodb-uri")
+        return False
+    mongodb_adapter.MongoClient = mongomock.MongoClient
+    return True
+
+
+def latest_result(exclude=None):
+    """Ultimo risultato salvato, per il confronto con l'esecuzione corrente"""
+    files = sorted(path for path in RESULTS_DIR.glob("benchmark_*.json") if path != exclude)
+    if not files:
+        return None
+    with open(files[-1], "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def print_comparison(current, previous) -> None:
+    print(f"\nConfronto con {previous['version']} ({previous['created_at']}):")
+    if previous["parameters"].get("scale") != current["parameters"].get("scale"):
+        print("! Scala diversa, i tempi non sono direttamente confrontabili")
+    for name, stage in current["stages"].items():
+        old = previous["stages"].get(name)
+        if not old or not old["wall_seconds"]:
+            continue
+        change = (stage["wall_seconds"] - old["wall_seconds"]) / old["wall_seconds"] * 100
+        print(f"  {name:<10} {old['wall_seconds']:>9.3f}s -> {stage['wall_seconds']:>9.3f}s ({change:+.1f}%)")
+
+
+def run_benchmarks(args) -> dict:
+    """
+    Genera i dati sintetici, avvia lo stub e misura le fasi di estrazione e
+    caricamento in una directory di lavoro temporanea, senza toccare i dati
+    estratti del progetto né la quota dell'API reale
+    """
+    stages = {}
+    print(f"=== Benchmark IndyCar (scala {args.scale}) ===\n")
+    api = timed(stages, "generate", lambda: SyntheticApi(args.scale, args.seed))
+    server = StubServer(api, args.latency, args.throttle, args.retry_after, seed=args.seed).start()
+
+    workdir = Path(tempfile.mkdtemp(prefix="indycar_benchmark_"))
+    original_cwd = Path.cwd()
+    os.environ["SPORTRADAR_BASE_URL"] = server.base_url
+    os.environ.setdefault("SPORTRADAR_API_KEY", "benchmark")
+    os.environ["SPORTRADAR_CACHE_DIR"] = str(workdir / "cache")
+    if args.mongodb_uri:
+        os.environ["MONGODB_CONNECTION_STRING"] = args.mongodb_uri
+
+    try:
+        # L'URL dell'API e la cache vengono letti dall'ambiente alla prima richiesta
+        # e i percorsi dei dati sono relativi alla directory di lavoro
+        os.chdir(workdir)
+        from extractors.http_client import client
+        from extractors import season_store
+        season_store.configure(args.storage)
+        from extractors.seasons_extractor import main as extract_seasons
+        from extractors.races_extractor import main as extract_races
+        from extractors.drivers_extractor import DriversExtractor
+        import mongodb_adapter
+
+        timed(stages, "seasons", lambda: extract_seasons(None, False), args.verbose)
+        timed(stages, "races", lambda: extract_races(args.workers, args.rps, None, False), args.verbose)
+        timed(stages, "drivers", lambda: DriversExtractor(workdir / "Data").run(), args.verbose)
+        if args.mongodb_uri or use_in_memory_mongodb(mongodb_adapter):
+            timed(stages, "mongodb", mongodb_adapter.create_mongodb_collections, args.verbose)
+
+        store = season_store.get_season_store(directory=workdir / "Data" / "extracted")
+        return {
+            "version": git_version(),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "parameters": {
+                "scale": args.scale,
+                "seed": args.seed,
+                "workers": args.workers,
+                "rps": args.rps,
+                "latency": args.latency,
+                "throttle": args.throttle,
+                "mongodb": "mongod" if args.mongodb_uri else "mongomock",
+                "storage": args.storage
+            },
+            "dataset": {
+                "seasons": len(api.seasons),
+                "races": api.total_races,
+                "season_files": len(store.years()),
+                "season_files_bytes": sum(store.size(year) for year in store.years())
+            },
+            "stages": stages,
+            "stub": server.snapshot(),
+            "http": client.stats.snapshot()
+        }
+    finally:
+        os.chdir(original_cwd)
+        server.stop()
+        if args.keep:
+            print(f"\nDirectory di lavoro conservata: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark delle fasi di estrazione e caricamento")
+    parser.add_argument("--scale", type=int, default=1, help="Moltiplicatore delle gare per stagione (1-100)")
+    parser.add_argument("--seed", type=int, default=0, help="Seme dei dati sintetici")
+    parser.add_argument("--workers", type=int, default=4, help="Richieste concorrenti dell'estrattore gare")
+    parser.add_argument("--rps", type=float, default=100.0, help="Tetto di richieste al secondo")
+    parser.add_argument("--latency", type=float, default=0.0, help="Ritardo dello stub per risposta (secondi)")
+    parser.add_argument("--throttle", type=float, default=0.0, help="Frazione di risposte 429 dello stub")
+    parser.add_argument("--retry-after", type=int, default=0, help="Retry-After delle risposte 429")
+    parser.add_argument("--mongodb-uri", help="mongod locale usa e getta (default: mongomock in memoria)")
+    parser.add_argument("--storage", choices=("json", "columnar"), default="json",
+                        help="Formato dei file delle stagioni")
+    parser.add_argument("--output", help="File dei risultati (default: benchmarks/results/)")
+    parser.add_argument("--keep", action="store_true", help="Conserva la directory di lavoro")
+    parser.add_argument("--verbose", action="store_true", help="Mostra l'output delle fasi")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args)
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"benchmark_{results['created_at'].replace(':', '').replace('-', '')[:15]}_s{args.scale}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    previous = latest_result(exclude=output)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    print(f"\n✓ Risultati salvati in {output}")
+    print(f"  Gare: {results['dataset']['races']} - file stagioni: "
+          f"{results['dataset']['season_files_bytes'] / 1e6:.1f} MB - "
+          f"richieste allo stub: {results['stub']['requests']} ({results['stub']['throttled']} con 429)")
+    if previous:
+        print_comparison(results, previous)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Aggiungi la directory Data al path per importare i moduli condivisi
+DATA_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(DATA_DIR))
+
+from benchmarks.run_benchmarks import git_version
+
+RESULTS_DIR = DATA_DIR / "benchmarks" / "results"
+
+# Dipendenze pesanti che un comando dovrebbe caricare solo se le usa
+HEAVY_MODULES = ("requests", "urllib3", "pymongo", "bson", "dotenv", "numpy", "ijson", "orjson", "zstandard")
+
+# Cosa viene misurato: il CLI senza comando e l'importazione dei moduli di ogni fase
+TARGETS = {
+    "help": (
+        "import contextlib, io, runpy\n"
+        "sys.argv = ['main.py', 'help']\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        "    runpy.run_path('Data/main.py', run_name='__main__')"
+    ),
+    "seasons": "import extractors.seasons_extractor",
+    "races": "import extractors.races_extractor",
+    "drivers": "import extractors.drivers_extractor",
+    "mongodb": "import mongodb_adapter",
+    "pipeline": "import pipeline"
+}
+
+# Eseguito in un interprete nuovo: misura il codice indicato e i moduli caricati
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {data_dir!r})
+{code}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "modules": len(sys.modules),
+    "heavy_modules": sorted(name for name in {heavy!r} if name in sys.modules)
+}}))
+"""
+
+
+def measure(code, repeat) -> dict:
+    """
+    Esegue `code` in `repeat` interpreti nuovi: tempo del codice (mediana),
+    tempo totale del processo incluso l'avvio di Python (mediana) e moduli caricati
+    """
+    probe = PROBE.format(data_dir=str(DATA_DIR), code=code, heavy=HEAVY_MODULES)
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True,
+                                check=True, cwd=DATA_DIR.parent).stdout
+        process_seconds = time.perf_counter() - start
+        runs.append((json.loads(output.strip().splitlines()[-1]), process_seconds))
+    probe_result = runs[-1][0]
+    return {
+        "import_seconds": round(statistics.median(run["seconds"] for run, _ in runs), 4),
+        "process_seconds": round(statistics.median(seconds for _, seconds in runs), 4),
+        "modules": probe_result["modules"],
+        "heavy_modules": probe_result["heavy_modules"]
+    }
+
+
+def latest_result(exclude=None):
+    """Ultimo risultato salvato, per il confronto con l'esecuzione corrente"""
+    files = sorted(path for path in RESULTS_DIR.glob("startup_*.json") if path != exclude)
+    if not files:
+        return None
+    with open(files[-1], "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def print_comparison(current, previous) -> None:
+    print(f"\nConfronto con {previous['version']} ({previous['created_at']}):")
+    for name, target in current["targets"].items():
+        old = previous["targets"].get(name)
+        if not old or not old["process_seconds"]:
+            continue
+        change = (target["process_seconds"] - old["process_seconds"]) / old["process_seconds"] * 100
+        print(f"  {name:<10} {old['process_seconds'] * 1000:>7.1f} -> {target['process_seconds'] * 1000:>7.1f} ms "
+              f"({change:+.1f}%) - moduli {old['modules']} -> {target['modules']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del tempo di avvio del CLI e dei moduli delle fasi")
+    parser.add_argument("--repeat", type=int, default=5, help="Interpreti avviati per misura (si usa la mediana)")
+    parser.add_argument("--output", help="File dei risultati (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    print("=== Benchmark avvio ===\n")
+    targets = {}
+    for name, code in TARGETS.items():
+        try:
+            targets[name] = measure(code, args.repeat)
+        except subprocess.CalledProcessError as e:
+            print(f"✗ {name}: {e.stderr.strip().splitlines()[-1] if e.stderr else e}")
+            continue
+        target = targets[name]
+        print(f"  {name:<10} {target['process_seconds'] * 1000:>7.1f} ms processo "
+              f"{target['import_seconds'] * 1000:>7.1f} ms importazione  {target['modules']:>4} moduli  "
+              f"{', '.join(target['heavy_modules']) or '-'}")
+
+    results = {
+        "version": git_version(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "repeat": args.repeat,
+        "targets": targets
+    }
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"startup_{results['created_at'].replace(':', '').replace('-', '')[:15]}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    previous = latest_result(exclude=output)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    print(f"\n✓ Risultati salvati in {output}")
+    if previous:
+        print_comparison(results, previous)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Aggiungi la directory Data al path per importare i moduli condivisi
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.synthetic_data import SyntheticApi
+
+
+class StubServer:
+    """
+    Server HTTP locale che imita gli endpoint SportRadar usati dagli estrattori:
+    `seasons.json` e `sport_events/{id}/summary.json`.
+
+    `latency` aggiunge un ritardo (secondi) a ogni risposta, `throttle_rate`
+    è la frazione di richieste respinte con 429 e un header Retry-After di
+    `retry_after` secondi. Le risposte includono gli header del piano QPS.
+    """
+
+    def __init__(self, api, latency=0.0, throttle_rate=0.0, retry_after=0, qps_allotted=None,
+                 port=0, seed=0):
+        self.api = api
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.qps_allotted = qps_allotted
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        self.bytes_sent = 0
+        self._bodies = {}
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def _body(self, path):
+        """Corpo JSON serializzato (e memorizzato) per un percorso, None se sconosciuto"""
+        if path in self._bodies:
+            return self._bodies[path]
+        if path.endswith("/seasons.json"):
+            data = {"generated_at": self.api.now.isoformat(timespec="seconds"), "stages": self.api.seasons}
+        elif "/sport_events/" in path and path.endswith("/summary.json"):
+            event_id = path.split("/sport_events/")[1].split("/")[0]
+            data = self.api.summaries.get(event_id) or self.api.details.get(event_id)
+        else:
+            data = None
+        body = json.dumps(data).encode("utf-8") if data is not None else None
+        with self._lock:
+            self._bodies[path] = body
+        return body
+
+    def _should_throttle(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            throttle = self.throttle_rate > 0 and self.random.random() < self.throttle_rate
+            if throttle:
+                self.throttled += 1
+            return throttle
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                if server._should_throttle():
+                    self.send_response(429)
+                    self.send_header("Retry-After", str(server.retry_after))
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = server._body(self.path.split("?")[0])
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if server.qps_allotted:
+                    self.send_header("X-Plan-Qps-Allotted", str(server.qps_allotted))
+                self.end_headers()
+                self.wfile.write(body)
+                with server._lock:
+                    server.bytes_sent += len(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"requests": self.requests, "throttled": self.throttled, "bytes_sent": self.bytes_sent}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub locale dell'API SportRadar con dati sintetici")
+    parser.add_argument("--scale", type=int, default=1, help="Moltiplicatore delle gare per stagione")
+    parser.add_argument("--seed", type=int, default=0, help="Seme dei dati sintetici")
+    parser.add_argument("--port", type=int, default=8001, help="Porta di ascolto")
+    parser.add_argument("--latency", type=float, default=0.0, help="Ritardo per risposta in secondi")
+    parser.add_argument("--throttle", type=float, default=0.0, help="Frazione di risposte 429")
+    parser.add_argument("--retry-after", type=int, default=0, help="Valore dell'header Retry-After")
+    args = parser.parse_args()
+
+    api = SyntheticApi(args.scale, args.seed)
+    server = StubServer(api, args.latency, args.throttle, args.retry_after, port=args.port, seed=args.seed)
+    print(f"✓ Stub SportRadar con {api.total_races} gare in ascolto su {server.base_url}")
+    print(f"  Usa SPORTRADAR_BASE_URL={server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
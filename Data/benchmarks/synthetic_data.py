@@ -0,0 +1,222 @@
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from extractors import json_codec
+
+# Stagioni e dimensioni di una scala 1 (circa quanto estratto dall'API reale)
+DEFAULT_YEARS = range(2017, 2026)
+RACES_PER_SEASON = 17
+DRIVERS_PER_RACE = 27
+DRIVER_POOL_SIZE = 90
+
+SCHEMA_URL = "https://schemas.sportradar.com/sportsapi/indycar/v2/schemas/summary.json"
+CATEGORY = {"id": "sr:category:453", "name": "Indycar"}
+SPORT = {"id": "sr:sport:129", "name": "Indy Racing"}
+SPORT_PARENT = {"id": "sr:stage:295065", "description": "Indycar", "type": "sport", "single_event": False}
+
+# Punti assegnati per posizione (dal 25° posto in poi 5 punti)
+POINTS_TABLE = [50, 40, 35, 32, 30, 28, 26, 24, 22, 20, 19, 18, 17, 16, 15,
+                14, 13, 12, 11, 10, 9, 8, 7, 6]
+NATIONALITIES = [("USA", "USA"), ("Spain", "ESP"), ("New Zealand", "NZL"), ("Mexico", "MEX"),
+                 ("Australia", "AUS"), ("Sweden", "SWE"), ("Denmark", "DNK"), ("Netherlands", "NLD")]
+SESSIONS = [("Practice 1", "practice"), ("Practice 2", "practice"), ("Qualification", "qualifying")]
+
+
+def iso(moment):
+    return moment.isoformat(timespec="seconds")
+
+
+class SyntheticApi:
+    """
+    Risposte sintetiche dell'API SportRadar con la stessa forma di quelle reali.
+
+    `scale` moltiplica il numero di gare per stagione: scala 1 produce circa
+    i ~3 MB dei file estratti reali, scala 100 circa cento volte tanto. I dati
+    sono deterministici a parità di `seed`.
+    """
+
+    def __init__(self, scale=1, seed=0, years=DEFAULT_YEARS, now=None):
+        self.random = random.Random(seed)
+        self.now = now or datetime.now(timezone.utc)
+        self.drivers = [self._driver(index) for index in range(DRIVER_POOL_SIZE)]
+        self.venues = [self._venue(index) for index in range(24)]
+        self.seasons = []    # voci di seasons.json, dalla stagione più recente come l'API
+        self.summaries = {}  # season_id -> summary della stagione
+        self.details = {}    # stage_id della gara -> summary della gara
+        stage_ids = iter(range(2_000_000, 10_000_000))
+        for year in years:
+            self._build_season(year, RACES_PER_SEASON * scale, stage_ids)
+
+    def _driver(self, index):
+        nationality, country_code = NATIONALITIES[index % len(NATIONALITIES)]
+        return {
+            "id": f"sr:competitor:{900000 + index}",
+            "name": f"Driver{index:03d}, Synthetic",
+            "gender": "male",
+            "nationality": nationality,
+            "country_code": country_code,
+            "car_number": index % 99 + 1
+        }
+
+    def _venue(self, index):
+        return {
+            "id": f"sr:venue:{50000 + index}",
+            "name": f"Synthetic Speedway {index}",
+            "city": f"City {index}",
+            "country": "USA",
+            "coordinates": f"{30 + index * 0.5:.6f},{-90 - index * 0.5:.6f}",
+            "country_code": "USA",
+            "curves_right": self.random.randint(0, 10),
+            "curves_left": self.random.randint(2, 10),
+            "debut": 1950 + index,
+            "url_official": f"https://venue{index}.example.com/",
+            "length": self.random.randint(1500, 6500),
+            "timezone": "America/New_York"
+        }
+
+    def _build_season(self, year, total_races, stage_ids):
+        season_id = f"sr:stage:{next(stage_ids)}"
+        start = datetime(year, 3, 1, 19, 0, tzinfo=timezone.utc)
+        spacing = timedelta(days=max(1, 196 // total_races), hours=6)
+        season_info = {
+            "id": season_id,
+            "description": f"Indycar {year}",
+            "scheduled": iso(start),
+            "scheduled_end": iso(start + spacing * total_races),
+            "type": "season",
+            "category": CATEGORY,
+            "sport": SPORT
+        }
+        self.seasons.insert(0, {"id": season_id, "description": season_info["description"]})
+
+        race_stages = []
+        for index in range(total_races):
+            stage_id = f"sr:stage:{next(stage_ids)}"
+            scheduled = start + spacing * index
+            scheduled_end = scheduled + timedelta(days=2)
+            status = "Closed" if scheduled_end < self.now else None
+            race_stage = {
+                "id": stage_id,
+                "description": f"Synthetic Grand Prix {index + 1}",
+                "scheduled": iso(scheduled),
+                "scheduled_end": iso(scheduled_end),
+                "type": "event",
+                "single_event": False,
+                "venue": self.venues[index % len(self.venues)],
+                "unique_stage_id": f"sr:stage_unique:{index % len(self.venues)}"
+            }
+            if status:
+                race_stage["status"] = status
+            race_stages.append(race_stage)
+            self.details[stage_id] = self._race_details(race_stage, season_info, status)
+
+        season_status = "Closed" if all(stage.get("status") for stage in race_stages) else None
+        self.summaries[season_id] = {
+            "generated_at": iso(self.now),
+            "schema": SCHEMA_URL,
+            "stage": dict(season_info, stages=race_stages, **({"status": season_status} if season_status else {}))
+        }
+
+    def _race_details(self, race_stage, season_info, status):
+        scheduled = datetime.fromisoformat(race_stage["scheduled"])
+        sessions = []
+        for offset, (description, session_type) in enumerate(SESSIONS):
+            session_start = scheduled + timedelta(hours=20 * offset)
+            sessions.append({
+                "id": f"{race_stage['id']}{offset}",
+                "description": description,
+                "scheduled": iso(session_start),
+                "scheduled_end": iso(session_start + timedelta(hours=1)),
+                "type": session_type,
+                "status": status or "Not started",
+                "single_event": False
+            })
+        laps = self.random.choice([85, 90, 100, 200, 250])
+        sessions.append({
+            "id": f"{race_stage['id']}9",
+            "description": "Race",
+            "scheduled": race_stage["scheduled_end"],
+            "scheduled_end": race_stage["scheduled_end"],
+            "type": "race",
+            "status": status or "Not started",
+            "race_cautions": self.random.randint(0, 8),
+            "lead_changes": self.random.randint(0, 30),
+            "lead_drivers": self.random.randint(1, 10),
+            "caution_laps": self.random.randint(0, 40),
+            "laps": laps,
+            "laps_completed": laps if status else 0,
+            "single_event": False
+        })
+
+        competitors = []
+        field = self.random.sample(self.drivers, DRIVERS_PER_RACE)
+        for position, driver in enumerate(field, 1):
+            competitor = {key: driver[key] for key in ("id", "name", "gender", "nationality", "country_code")}
+            if status:
+                competitor["result"] = {
+                    "points": POINTS_TABLE[position - 1] if position <= len(POINTS_TABLE) else 5,
+                    "position": position,
+                    "car_number": driver["car_number"]
+                }
+            competitors.append(competitor)
+
+        stage = dict(race_stage, parents=[dict(season_info, single_event=False, parents=[SPORT_PARENT])],
+                     stages=sessions, competitors=competitors)
+        if status:
+            stage["status"] = status
+        return {"generated_at": iso(self.now), "schema": SCHEMA_URL, "stage": stage}
+
+    @property
+    def total_races(self) -> int:
+        return len(self.details)
+
+    def write_season_files(self, output_dir) -> int:
+        """
+        Scrive seasons.json e i file season_{anno}.json nel formato prodotto
+        dagli estrattori; restituisce i byte scritti
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        written = 0
+        seasons_list = []
+        for season in self.seasons:
+            year = season["description"].split()[-1]
+            seasons_list.append({"id": year, "year": year, "description": season["description"],
+                                 "season_id": season["id"]})
+            summary = self.summaries[season["id"]]
+            races = []
+            for counter, race_stage in enumerate(summary["stage"]["stages"], 1):
+                races.append({
+                    "id": str(counter),
+                    "stage_id": race_stage["id"],
+                    "description": race_stage["description"],
+                    "scheduled": race_stage["scheduled"],
+                    "scheduled_end": race_stage["scheduled_end"],
+                    "status": race_stage.get("status"),
+                    "type": race_stage["type"],
+                    "single_event": race_stage["single_event"],
+                    "venue": race_stage["venue"],
+                    "unique_stage_id": race_stage["unique_stage_id"],
+                    "stages": [],
+                    "sport_event_context": {},
+                    "competitors": [],
+                    "sport_event_status": {},
+                    "race_result": {},
+                    "statistics": {},
+                    "complete_details": self.details[race_stage["id"]]
+                })
+            stage = summary["stage"]
+            season_data = {
+                "id": year,
+                "season_id": season["id"],
+                "description": season["description"],
+                "total_races": len(races),
+                "generated_at": summary["generated_at"],
+                "season_info": {key: stage.get(key) for key in
+                                ("id", "description", "scheduled", "scheduled_end", "type", "category", "sport")},
+                "races": races
+            }
+            written += json_codec.dump_file(output_dir / f"season_{year}.json", season_data)
+        json_codec.dump_file(output_dir / "seasons.json", seasons_list)
+        return written
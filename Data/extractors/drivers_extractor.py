@@ -1,107 +1,134 @@
 import json
+import sys
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+# Aggiungi la directory Data al path per importare i moduli condivisi
+sys.path.append(str(Path(__file__).parent.parent))
+
+from extractors.run_manifest import RunManifest
+from extractors import json_codec
+from extractors.season_store import get_season_store
+from extractors.models import Driver
+from extractors.telemetry import get_logger, metrics
+
+logger = get_logger("drivers")
 
 class DriversExtractor:
-    def __init__(self):
-        # Usa il percorso assoluto della directory corrente
-        self.data_dir = Path(__file__).parent.parent
+    def __init__(self, data_dir=None):
+        # Usa il percorso assoluto della directory Data, salvo diversa indicazione
+        self.data_dir = Path(data_dir) if data_dir else Path(__file__).parent.parent
         self.output_file = self.data_dir / "extracted" / "drivers.json"
-        self.drivers_by_id = defaultdict(dict)
+        self.season_store = get_season_store(directory=self.data_dir / "extracted")
+        self.drivers_by_id: Dict[str, Driver] = {}
+        # Gare da elaborare in modalità incrementale (None = tutte)
+        self.changed_races: Optional[Dict[str, List[str]]] = None
+        self.changed_driver_ids = set()
 
-    def load_season_files(self) -> List[Dict[str, Any]]:
-        """Carica tutti i file delle stagioni dalla cartella Data/extracted"""
-        print("\nRicerca file stagioni in", self.data_dir / "extracted", "...")
-        season_files = sorted((self.data_dir / "extracted").glob("season_*.json"))
+    def find_season_years(self) -> List[str]:
+        """Elenca gli anni delle stagioni da elaborare, in ordine crescente"""
+        print("\nRicerca file stagioni in", self.season_store.directory, "...")
+        years = self.season_store.years()
+        if self.changed_races is not None:
+            years = [year for year in years if year in self.changed_races]
         
-        if not season_files:
-            print("! Nessun file stagione trovato nella cartella", self.data_dir / "extracted")
+        if not years:
+            print("! Nessun file stagione trovato nella cartella", self.season_store.directory)
             return []
         
-        print(f"Trovati {len(season_files)} file stagioni")
-        seasons_data = []
-        
-        for file in season_files:
+        print(f"Trovati {len(years)} file stagioni")
+        return years
+
+    def process_season_files(self) -> bool:
+        """
+        Elabora le stagioni dello store di Data/extracted leggendo le gare una
+        alla volta: in memoria resta una sola gara, non l'intera cronologia
+        """
+        processed = False
+        for year in self.find_season_years():
+            file = self.season_store.path(year)
             try:
-                with open(file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    seasons_data.append(data)
-                print(f"✓ Caricato {file.name}")
-                print(f"  - Anno: {data.get('id')}")
-                print(f"  - Numero gare: {len(data.get('races', []))}")
+                self.process_races(year, self.season_store.iter_races(year))
+                processed = True
+                metrics.count("documents_parsed")
             except Exception as e:
                 print(f"✗ Errore nel caricamento di {file.name}: {e}")
-        
-        return seasons_data
-
-    def extract_driver_info(self, competitor: Dict[str, Any]) -> Dict[str, Any]:
-        """Estrae le informazioni base di un pilota"""
-        driver_info = {
-            "id": competitor.get("id"),
-            "name": competitor.get("name"),
-            "gender": competitor.get("gender"),
-            "nationality": competitor.get("nationality"),
-            "country_code": competitor.get("country_code")
-        }
-        
-        # Aggiungi il numero della macchina se presente
-        if "result" in competitor and "car_number" in competitor["result"]:
-            driver_info["car_number"] = competitor["result"]["car_number"]
-        
-        # Debug: mostra i dati estratti
-        print(f"  Estrazione pilota: {driver_info['name']} (ID: {driver_info['id']})")
-        return driver_info
+        return processed
 
-    def update_driver_info(self, driver_info: Dict[str, Any]) -> None:
+    def update_driver_info(self, driver: Driver) -> None:
         """Aggiorna le informazioni di un pilota mantenendo i dati più completi"""
-        driver_id = driver_info["id"]
-        if not driver_id:
-            print("! ID pilota mancante")
+        if not driver.id:
+            logger.warning("ID pilota mancante")
             return
 
-        current_info = self.drivers_by_id[driver_id]
-        for key, value in driver_info.items():
-            if value and (key not in current_info or not current_info[key]):
-                current_info[key] = value
+        current = self.drivers_by_id.get(driver.id)
+        if current is None:
+            self.drivers_by_id[driver.id] = current = Driver(driver.id)
+            self.changed_driver_ids.add(driver.id)
+        if current.fill(driver):
+            self.changed_driver_ids.add(driver.id)
 
-    def process_season(self, season: Dict[str, Any]) -> None:
-        """Processa una singola stagione per estrarre i piloti"""
-        year = season.get("id")
-        if not year:
-            print("! Anno mancante in una stagione")
+    def merge_drivers(self, drivers_by_id: Dict[str, Driver]) -> None:
+        """Unisce una tabella parziale di piloti applicando la stessa regola di aggiornamento"""
+        for driver in drivers_by_id.values():
+            self.update_driver_info(driver)
+
+    def load_existing_drivers(self) -> None:
+        """Carica i piloti già estratti, per aggiornarli in modalità incrementale"""
+        if not self.output_file.exists():
             return
+        try:
+            for driver in json_codec.iter_items(self.output_file):
+                if driver.get("id"):
+                    self.drivers_by_id[driver["id"]] = Driver.from_json(driver)
+            print(f"✓ Caricati {len(self.drivers_by_id)} piloti già estratti")
+        except Exception as e:
+            print(f"✗ Errore nel caricamento di {self.output_file.name}: {e}")
 
-        print(f"\nProcessando stagione {year}")
-        races = season.get("races", [])
-        print(f"Trovate {len(races)} gare")
+    def process_races(self, year, races: Iterable[Dict[str, Any]]) -> None:
+        """Processa le gare di una stagione (anche da un generatore) per estrarre i piloti"""
+        changed_ids = None
+        if self.changed_races is not None:
+            changed_ids = set(self.changed_races.get(str(year), []))
 
-        for race_idx, race in enumerate(races, 1):
-            print(f"\nGara {race_idx}:")
-            print(f"  ID: {race.get('id')}")
-            print(f"  Descrizione: {race.get('description')}")
-            
-            # Cerca i piloti in complete_details.stage.competitors
-            complete_details = race.get("complete_details", {})
-            if not complete_details:
-                print("  ! Nessun complete_details trovato")
-                continue
-                
-            stage = complete_details.get("stage", {})
-            if not stage:
-                print("  ! Nessun stage trovato in complete_details")
-                continue
-                
-            competitors = stage.get("competitors", [])
-            print(f"  Trovati {len(competitors)} piloti")
+        total_races = processed_races = 0
+        for race in races:
+            total_races += 1
+            if changed_ids is None or race.get("stage_id") in changed_ids:
+                self.process_race(race)
+                processed_races += 1
+
+        print(f"Stagione {year}: {processed_races} gare elaborate su {total_races}")
+        logger.info("Stagione elaborata", extra={"fields": {
+            "year": year, "races": total_races, "processed": processed_races}})
+
+    def process_race(self, race: Dict[str, Any]) -> None:
+        """Processa una singola gara per estrarre i piloti"""
+        fields = {"race_id": race.get("id"), "description": race.get("description")}
+        
+        # Cerca i piloti in complete_details.stage.competitors
+        complete_details = race.get("complete_details", {})
+        if not complete_details:
+            # Normale per le gare costruite dal solo summary (annullate o lontane)
+            logger.debug("Nessun complete_details trovato", extra={"fields": fields})
+            return
             
-            if not competitors:
-                print("  ! Nessun pilota trovato in questa gara")
-                continue
+        stage = complete_details.get("stage", {})
+        if not stage:
+            logger.warning("Nessuno stage trovato in complete_details", extra={"fields": fields})
+            return
             
-            for competitor in competitors:
-                driver_info = self.extract_driver_info(competitor)
-                self.update_driver_info(driver_info)
+        competitors = stage.get("competitors", [])
+        logger.debug("Gara elaborata", extra={"fields": dict(fields, competitors=len(competitors))})
+        
+        if not competitors:
+            logger.info("Nessun pilota trovato nella gara", extra={"fields": fields})
+            return
+        
+        for competitor in competitors:
+            self.update_driver_info(Driver.from_competitor(competitor))
 
     def save_drivers_data(self) -> None:
         """Salva i dati dei piloti in un file JSON"""
@@ -109,13 +136,12 @@ class DriversExtractor:
             self.data_dir.mkdir(parents=True, exist_ok=True)
             (self.data_dir / "extracted").mkdir(parents=True, exist_ok=True)
             
-            final_drivers = list(self.drivers_by_id.values())
+            final_drivers = [driver.to_json() for driver in self.drivers_by_id.values()]
             if not final_drivers:
                 print("! Nessun pilota trovato da salvare")
                 return
                 
-            with open(self.output_file, "w", encoding="utf-8") as f:
-                json.dump(final_drivers, f, indent=4, ensure_ascii=False)
+            json_codec.dump_file(self.output_file, final_drivers)
             
             print(f"\n✓ Salvati dati di {len(final_drivers)} piloti in {self.output_file}")
             
@@ -145,26 +171,60 @@ class DriversExtractor:
         # Statistiche per nazionalità
         nationalities = defaultdict(int)
         for driver in final_drivers:
-            country = driver.get("nationality", "Unknown")
+            country = driver.nationality or "Unknown"
             nationalities[country] += 1
         
         print("\nPiloti per nazionalità:")
         for country, count in sorted(nationalities.items(), key=lambda x: x[1], reverse=True):
             print(f"- {country}: {count}")
 
-    def run(self) -> None:
-        """Esegue il processo completo di estrazione"""
+    def consolidate_parallel(self, processes: int) -> bool:
+        """
+        Elabora le stagioni in parallelo su `processes` processi: ognuno legge
+        una stagione e restituisce la tabella parziale dei suoi piloti, poi le
+        tabelle vengono unite in ordine di anno. La regola di aggiornamento
+        (primo valore non vuoto per campo) è associativa, quindi il risultato
+        coincide con quello dell'elaborazione sequenziale.
+        """
+        years = self.find_season_years()
+        if not years:
+            return False
+        store = self.season_store
+        tasks = [(store.name, store.directory, year, self.changed_races) for year in years]
+        with ProcessPoolExecutor(max_workers=min(processes, len(tasks))) as executor:
+            partial_tables = list(executor.map(extract_season_drivers, tasks))
+        for drivers_by_id in partial_tables:
+            if drivers_by_id is not None:
+                metrics.count("documents_parsed")
+                self.merge_drivers(drivers_by_id)
+        return any(drivers_by_id is not None for drivers_by_id in partial_tables)
+
+    def run(self, changed_races: Optional[Dict[str, List[str]]] = None, processes: int = 1) -> None:
+        """
+        Esegue il processo di estrazione. Se `changed_races` (anno -> stage_id)
+        è indicato, aggiorna i piloti esistenti usando solo le gare cambiate;
+        con `processes` > 1 le stagioni vengono elaborate in parallelo.
+        """
         print("=== Estrattore Dati Piloti IndyCar ===\n")
         
-        # Carica i dati delle stagioni
-        seasons_data = self.load_season_files()
-        if not seasons_data:
-            print("Nessun dato stagionale trovato. Uscita.")
-            return
+        self.changed_races = changed_races
+        if changed_races is not None:
+            print("Modalità incrementale")
+            self.load_existing_drivers()
+            if not changed_races:
+                print("Nessuna gara modificata, piloti invariati.")
+                return
         
-        # Processa ogni stagione
-        for season in seasons_data:
-            self.process_season(season)
+        if processes > 1:
+            print(f"Elaborazione parallela su {processes} processi")
+            if not self.consolidate_parallel(processes):
+                print("Nessun dato stagionale trovato. Uscita.")
+                return
+        else:
+            # Processa le stagioni una alla volta, gara per gara
+            if not self.process_season_files():
+                print("Nessun dato stagionale trovato. Uscita.")
+                return
         
         # Salva i dati
         self.save_drivers_data()
@@ -172,9 +232,40 @@ class DriversExtractor:
         # Stampa statistiche
         self.print_statistics()
 
-def main():
+def extract_season_drivers(task) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Legge una stagione ed estrae la tabella parziale dei suoi piloti
+    (eseguita in un processo separato); None se il file non è leggibile.
+    Il formato dello store è passato esplicitamente perché i processi figli
+    non ereditano la configurazione se avviati con spawn.
+    """
+    storage_format, directory, year, changed_races = task
+    store = get_season_store(storage_format, directory)
     extractor = DriversExtractor()
-    extractor.run()
+    extractor.changed_races = changed_races
+    try:
+        extractor.process_races(year, store.iter_races(year))
+    except Exception as e:
+        print(f"✗ Errore nel caricamento di {store.path(year).name}: {e}")
+        return None
+    return dict(extractor.drivers_by_id)
+
+def main(incremental=False, changed_races=None, processes=1):
+    """
+    Estrae i piloti. In modalità incrementale, se le gare cambiate non sono
+    indicate, vengono lette dall'ultima esecuzione registrata nel manifest.
+    """
+    extractor = DriversExtractor()
+    if not incremental:
+        extractor.run(processes=processes)
+        return
+
+    manifest = RunManifest()
+    if changed_races is None:
+        changed_races = manifest.last_run.get("changed_races", {})
+    extractor.run(changed_races, processes)
+    manifest.record_changed_drivers(extractor.changed_driver_ids)
+    manifest.save()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
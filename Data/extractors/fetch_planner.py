@@ -0,0 +1,64 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from extractors.run_manifest import FINAL_STATUSES, parse_time
+
+# Decisioni per una gara del summary della stagione
+FETCH = "fetch"                # serve la chiamata di dettaglio
+REUSE = "reuse"                # la gara già estratta è ancora valida
+SUMMARY_ONLY = "summary_only"  # la voce del summary basta, il dettaglio non aggiungerebbe nulla
+
+# Oltre questo orizzonte una gara programmata non ha ancora iscritti né risultati
+DETAIL_HORIZON = timedelta(days=14)
+
+# Campi della voce del summary che, se invariati, rendono riutilizzabile la gara salvata
+SUMMARY_FIELDS = ("description", "scheduled", "scheduled_end", "status")
+
+# Descrizione dei motivi per cui una chiamata viene evitata
+REASONS = {
+    "final": "già definitive",
+    "cancelled": "annullate",
+    "far_future": f"programmate oltre {DETAIL_HORIZON.days} giorni"
+}
+
+
+class FetchPlanner:
+    """
+    Decide gara per gara se serve la chiamata di dettaglio (summary della
+    gara) confrontando la voce del summary della stagione con la gara già
+    salvata:
+    - gare annullate: il dettaglio ripete la voce del summary (sessioni
+      annullate, nessun pilota), quindi basta il summary o la gara salvata
+    - gare programmate oltre DETAIL_HORIZON: ancora senza iscritti né
+      risultati; si riusa la gara salvata se la sua voce non è cambiata
+    - tutte le altre vengono scaricate
+    Conta le chiamate evitate per motivo.
+    """
+
+    def __init__(self, now=None):
+        self.now = now or datetime.now(timezone.utc)
+        self.avoided = Counter()
+
+    def record(self, reason) -> None:
+        self.avoided[reason] += 1
+
+    def plan(self, race_stage, stored=None) -> str:
+        status = race_stage.get("status")
+        if status == "Cancelled":
+            reason = "cancelled"
+        else:
+            start = parse_time(race_stage.get("scheduled"))
+            if status in FINAL_STATUSES or start is None or start - self.now <= DETAIL_HORIZON:
+                return FETCH
+            reason = "far_future"
+        self.record(reason)
+        unchanged = stored is not None and all(stored.get(key) == race_stage.get(key) for key in SUMMARY_FIELDS)
+        return REUSE if unchanged else SUMMARY_ONLY
+
+    @property
+    def total(self) -> int:
+        return sum(self.avoided.values())
+
+    def report(self) -> str:
+        reasons = ", ".join(f"{REASONS[reason]} {count}" for reason, count in sorted(self.avoided.items()))
+        return f"Chiamate di dettaglio evitate: {self.total}" + (f" ({reasons})" if reasons else "")
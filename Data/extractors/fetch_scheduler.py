@@ -0,0 +1,100 @@
+import heapq
+import itertools
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+
+from extractors.run_manifest import live_status, parse_time
+
+# Livelli di priorità delle richieste, dal più urgente: gare in corso o appena
+# concluse, gare programmate, storico concluso
+PRIORITY_LIVE = 0
+PRIORITY_SCHEDULED = 1
+PRIORITY_HISTORY = 2
+
+# Una gara conclusa da meno di così è "appena conclusa" (risultati ancora da consolidare)
+RECENT_WINDOW = timedelta(days=7)
+
+
+def race_priority(race_stage, now=None):
+    """
+    Chiave di priorità della richiesta di dettaglio di una gara del summary:
+    prima le gare Open o concluse negli ultimi giorni (le più recenti per
+    prime), poi le programmate (le più vicine per prime), infine lo storico
+    (dal più recente al più vecchio)
+    """
+    now = now or datetime.now(timezone.utc)
+    start = parse_time(race_stage.get("scheduled"))
+    end = parse_time(race_stage.get("scheduled_end")) or start
+    timestamp = start.timestamp() if start else 0.0
+    status = live_status(race_stage, now)
+    if status == "Open" or (end is not None and now - RECENT_WINDOW <= end <= now):
+        return PRIORITY_LIVE, -timestamp
+    if status == "Scheduled":
+        return PRIORITY_SCHEDULED, timestamp
+    return PRIORITY_HISTORY, -timestamp
+
+
+def season_priority(current):
+    """
+    Chiave di priorità del summary di una stagione: servendo a scoprirne le
+    gare, viene prima di ogni gara del suo livello (stagione in corso o storico)
+    """
+    return PRIORITY_LIVE if current else PRIORITY_HISTORY, -float("inf")
+
+
+class FetchScheduler:
+    """
+    Coda unica con priorità per le richieste di stagioni e gare.
+
+    Le richieste vengono eseguite da `workers` thread in ordine di priorità
+    (chiave più bassa prima); i callback dei risultati girano nel thread che
+    chiama run() e possono accodare altre richieste (un summary di stagione
+    accoda le sue gare). Con `deadline` (secondi) o `budget` (richieste
+    avviate) esauriti le richieste ancora in coda non vengono avviate: ricevono
+    il callback di salto, così un'esecuzione a tempo o a quota aggiorna
+    sempre per primi i dati più importanti.
+    """
+
+    def __init__(self, workers, deadline=None, budget=None):
+        self.workers = max(1, workers)
+        self.deadline = time.monotonic() + deadline if deadline else None
+        self.budget = budget
+        self.queue = []
+        self.sequence = itertools.count()
+        self.dispatched = 0
+        self.skipped = 0
+
+    def submit(self, priority, fetch, on_result, on_skip=None) -> None:
+        """Accoda `fetch()`; `on_result(dati)` o `on_skip()` vengono chiamati a richiesta conclusa o saltata"""
+        heapq.heappush(self.queue, (priority, next(self.sequence), fetch, on_result, on_skip))
+
+    def exhausted(self) -> bool:
+        if self.budget is not None and self.dispatched >= self.budget:
+            return True
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def skip_pending(self) -> None:
+        """Salta tutte le richieste in coda (anche quelle accodate dai callback di salto)"""
+        while self.queue:
+            *_, on_skip = heapq.heappop(self.queue)
+            self.skipped += 1
+            if on_skip:
+                on_skip()
+
+    def run(self) -> None:
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            running = {}
+            while self.queue or running:
+                while self.queue and len(running) < self.workers:
+                    if self.exhausted():
+                        self.skip_pending()
+                        break
+                    _, _, fetch, on_result, _ = heapq.heappop(self.queue)
+                    running[executor.submit(fetch)] = on_result
+                    self.dispatched += 1
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)(future.result())
@@ -0,0 +1,284 @@
+import os
+import threading
+from bisect import bisect_left
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from extractors.rate_controller import RateController, jittered_backoff
+from extractors.response_cache import ResponseCache
+from extractors.settings import load_environment
+from extractors.telemetry import get_logger
+from extractors import json_codec
+
+logger = get_logger("http")
+
+# Configurazione API: URL di base (SPORTRADAR_BASE_URL) e chiave (SPORTRADAR_API_KEY)
+# vengono letti dall'ambiente al primo uso, non all'importazione
+DEFAULT_BASE_URL = "https://api.sportradar.com/indycar/trial/v2/en"
+
+HEADERS = {
+    "accept": "application/json",
+    "accept-encoding": "gzip, deflate"
+}
+
+# Timeout di default (connessione, lettura) in secondi, sostituibili con
+# SPORTRADAR_CONNECT_TIMEOUT e SPORTRADAR_READ_TIMEOUT
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+
+# Dimensione del pool di connessioni keep-alive verso l'API
+DEFAULT_POOL_SIZE = 16
+
+# Numero massimo di risposte 429 tollerate per una singola richiesta,
+# separato dal budget di tentativi per gli errori veri e propri
+MAX_THROTTLE_RETRIES = 10
+
+# Limiti superiori (secondi) dei bucket dell'istogramma delle latenze
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class HttpStats:
+    """
+    Contatori thread-safe di latenza e byte per le richieste HTTP
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.bytes_received = 0
+        self.wire_bytes = 0
+        self.cache_hits = 0
+        self.cache_revalidated = 0
+        # Un contatore per bucket più uno per le latenze oltre l'ultimo limite
+        self.latency_histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record(self, latency: float, body_bytes: int, wire_bytes: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self.latency_histogram[bisect_left(LATENCY_BUCKETS, latency)] += 1
+            self.bytes_received += body_bytes
+            self.wire_bytes += wire_bytes
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def record_cache_hit(self, revalidated: bool = False) -> None:
+        with self._lock:
+            if revalidated:
+                self.cache_revalidated += 1
+            else:
+                self.cache_hits += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "total_latency": round(self.total_latency, 3),
+                "avg_latency": round(self.total_latency / self.requests, 3) if self.requests else 0.0,
+                "max_latency": round(self.max_latency, 3),
+                "bytes_received": self.bytes_received,
+                "wire_bytes": self.wire_bytes,
+                "cache_hits": self.cache_hits,
+                "cache_revalidated": self.cache_revalidated,
+                "latency_histogram": {
+                    f"<={bound}s": count for bound, count in zip(LATENCY_BUCKETS, self.latency_histogram)
+                } | {f">{LATENCY_BUCKETS[-1]}s": self.latency_histogram[-1]}
+            }
+
+
+class HttpClient:
+    """
+    Client HTTP condiviso per l'API SportRadar.
+
+    Riutilizza le connessioni tramite una Session con pool keep-alive,
+    negozia la compressione gzip/deflate, applica timeout espliciti e
+    delega al RateController condiviso rate e concorrenza delle
+    richieste. Se è configurata una
+    ResponseCache, le risposte ancora valide non generano richieste e
+    quelle scadute vengono rivalidate con richieste condizionali.
+    """
+
+    def __init__(self, rps: float = 1.0, connect_timeout: float = None, read_timeout: float = None,
+                 pool_size: int = DEFAULT_POOL_SIZE, cache: ResponseCache = None):
+        self.cache = cache
+        self.rate_controller = RateController(rps)
+        # I timeout non indicati vengono letti dalla configurazione alla creazione della sessione
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        self.stats = HttpStats()
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """
+        Session keep-alive, creata alla prima richiesta: solo allora vengono
+        letti dalla configurazione la chiave dell'API e i timeout
+        """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    load_environment()
+                    connect_timeout, read_timeout = self.timeout
+                    self.timeout = (
+                        connect_timeout if connect_timeout is not None
+                        else float(os.getenv("SPORTRADAR_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)),
+                        read_timeout if read_timeout is not None
+                        else float(os.getenv("SPORTRADAR_READ_TIMEOUT", DEFAULT_READ_TIMEOUT))
+                    )
+                    session = requests.Session()
+                    session.headers.update(HEADERS)
+                    session.headers["x-api-key"] = os.getenv("SPORTRADAR_API_KEY")
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
+
+    def configure(self, rps=None, concurrency=None, connect_timeout=None, read_timeout=None,
+                  use_cache=None) -> None:
+        """Aggiorna tetti di rate e concorrenza, i timeout e l'uso della cache del client"""
+        if use_cache is not None:
+            self.cache = ResponseCache() if use_cache else None
+        self.rate_controller.configure(rps, concurrency)
+        if connect_timeout is not None or read_timeout is not None:
+            self.timeout = (
+                connect_timeout if connect_timeout is not None else self.timeout[0],
+                read_timeout if read_timeout is not None else self.timeout[1]
+            )
+
+    def get(self, url: str, headers=None) -> requests.Response:
+        """Esegue una GET rispettando rate e concorrenza e registrando latenza e byte"""
+        session = self.session
+        with self.rate_controller.slot():
+            start = time.perf_counter()
+            try:
+                response = session.get(url, headers=headers, timeout=self.timeout)
+            except requests.exceptions.RequestException:
+                self.stats.record_error()
+                raise
+            latency = time.perf_counter() - start
+        self.rate_controller.on_response(response.status_code, response.headers)
+        body_bytes = len(response.content)
+        wire_bytes = int(response.headers.get("content-length") or body_bytes)
+        self.stats.record(latency, body_bytes, wire_bytes)
+        return response
+
+    def fetch_data(self, url: str, retry_count=3, delay=1, revalidate=False):
+        """
+        Funzione sincrona per recuperare dati da un URL dato con retry.
+        Le risposte 429 non consumano i tentativi: la pausa viene gestita dal
+        RateController, fino a MAX_THROTTLE_RETRIES volte per richiesta.
+        Con `revalidate` anche una voce in cache ancora valida viene
+        rivalidata con una richiesta condizionale (modalità live).
+        """
+        entry = self.cache.lookup(url) if self.cache else None
+        if entry and not revalidate and self.cache.is_fresh(entry):
+            self.stats.record_cache_hit()
+            return entry["data"]
+        conditional_headers = self.cache.conditional_headers(entry) if entry else None
+
+        logger.debug("Richiesta", extra={"fields": {"url": url}})
+
+        attempt = 0
+        throttles = 0
+        while attempt < retry_count:
+            response = None
+            try:
+                response = self.get(url, conditional_headers)
+                if response.status_code == 429:  # Rate limit
+                    throttles += 1
+                    if throttles > MAX_THROTTLE_RETRIES:
+                        logger.error("Rate limit persistente", extra={"fields": {
+                            "url": url, "throttles": MAX_THROTTLE_RETRIES}})
+                        return None
+                    logger.info("Rate limit raggiunto, nuovo tentativo dopo la pausa", extra={"fields": {
+                        "url": url, "throttles": throttles, "max": MAX_THROTTLE_RETRIES}})
+                    continue
+                if response.status_code == 304 and entry:
+                    self.cache.refresh(url, entry, response.headers)
+                    self.stats.record_cache_hit(revalidated=True)
+                    logger.debug("Dati invariati (cache rivalidata)", extra={"fields": {"url": url}})
+                    return entry["data"]
+                response.raise_for_status()
+                data = json_codec.loads(response.content)
+                if self.cache:
+                    self.cache.store(url, data, response.headers)
+                logger.debug("Dati recuperati", extra={"fields": {
+                    "url": url, "status": response.status_code, "bytes": len(response.content)}})
+                return data
+
+            except requests.exceptions.RequestException as e:
+                attempt += 1
+                status_code = getattr(response, 'status_code', 'N/A')
+                response_text = getattr(response, 'text', 'N/A')
+                logger.warning("Tentativo fallito", extra={"fields": {
+                    "url": url, "attempt": f"{attempt}/{retry_count}", "status": status_code, "error": e}})
+
+                if attempt < retry_count:
+                    time.sleep(jittered_backoff(attempt - 1, delay))
+                    continue
+
+                if status_code != 'N/A':
+                    logger.error("Richiesta fallita", extra={"fields": {
+                        "url": url, "status": status_code, "body": response_text[:500]}})
+                return None
+
+            except Exception:
+                attempt += 1
+                logger.exception("Errore imprevisto durante il recupero", extra={"fields": {"url": url}})
+                if attempt < retry_count:
+                    time.sleep(jittered_backoff(attempt - 1, delay))
+                    continue
+                return None
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+
+
+# Client condiviso da tutti gli estrattori: crearlo non apre connessioni né file
+client = HttpClient(cache=ResponseCache())
+
+
+def api_url(path: str) -> str:
+    """
+    URL completo di una risorsa dell'API (es. "seasons.json"); la base può
+    essere sostituita con SPORTRADAR_BASE_URL, ad esempio per lo stub dei benchmark
+    """
+    load_environment()
+    return f"{os.getenv('SPORTRADAR_BASE_URL', DEFAULT_BASE_URL)}/{path}"
+
+
+def fetch_data(url: str, retry_count=3, delay=1, revalidate=False):
+    """
+    Recupera dati da un URL tramite il client condiviso
+    """
+    return client.fetch_data(url, retry_count, delay, revalidate)
+
+
+def print_http_stats() -> None:
+    """
+    Stampa i contatori di latenza e byte del client condiviso
+    """
+    stats = client.stats.snapshot()
+    print(f"Richieste HTTP: {stats['requests']} (errori di rete: {stats['errors']})")
+    print(f"  Latenza media: {stats['avg_latency']}s - massima: {stats['max_latency']}s")
+    histogram = ", ".join(f"{bucket}: {count}" for bucket, count in stats["latency_histogram"].items() if count)
+    if histogram:
+        print(f"  Distribuzione latenze: {histogram}")
+    print(f"  Byte ricevuti: {stats['bytes_received']} (trasferiti: {stats['wire_bytes']})")
+    print(f"  Risposte dalla cache: {stats['cache_hits']} (rivalidate con 304: {stats['cache_revalidated']})")
+    control = client.rate_controller.snapshot()
+    print(f"  Throttling: {control['throttle_events']} risposte 429, {control['throttled_seconds']}s in pausa")
+    if control["quota_allotted"] is not None:
+        print(f"  Quota del piano: {control['quota_used']}/{control['quota_allotted']} richieste")
@@ -0,0 +1,93 @@
+import json
+import os
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # orjson è facoltativo: senza si usa il modulo json della libreria standard
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # ijson è facoltativo: senza i file vengono letti per intero
+    ijson = None
+
+# Backend in uso per codifica e decodifica, e se la lettura incrementale è disponibile
+BACKEND = "orjson" if orjson else "json"
+STREAMING = ijson is not None
+
+# Con INDYCAR_JSON_PRETTY=1 anche i file letti solo dai programmi vengono indentati (debug)
+FORCE_PRETTY = os.getenv("INDYCAR_JSON_PRETTY") == "1"
+
+
+def loads(data):
+    """Decodifica un documento JSON da bytes o str"""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, pretty=False) -> bytes:
+    """
+    Codifica un oggetto in JSON UTF-8. Di default l'output è compatto (file
+    letti solo dai programmi); con `pretty` è indentato per la lettura
+    """
+    pretty = pretty or FORCE_PRETTY
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        # Stessa impaginazione di orjson (OPT_INDENT_2): il file non dipende dal backend
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def load_file(filename):
+    """Legge e decodifica un file JSON"""
+    with open(filename, "rb") as f:
+        return loads(f.read())
+
+
+def dump_file(filename, obj, pretty=False) -> int:
+    """Codifica e scrive un file JSON; restituisce i byte scritti"""
+    payload = dumps(obj, pretty)
+    Path(filename).write_bytes(payload)
+    return len(payload)
+
+
+def iter_items(filename, prefix="item"):
+    """
+    Elementi di un array JSON, uno alla volta: `prefix` è il percorso
+    dell'array in notazione ijson ("item" per un file che è un array,
+    "races.item" per la chiave races dell'oggetto principale). Con ijson il
+    file viene decodificato in modo incrementale e la memoria resta limitata
+    al singolo elemento; senza, viene letto per intero
+    """
+    if ijson:
+        with open(filename, "rb") as f:
+            yield from ijson.items(f, prefix, use_float=True)
+        return
+    data = load_file(filename)
+    for key in prefix.split(".")[:-1]:
+        data = data.get(key) or {}
+    yield from data or []
+
+
+def load_object(filename, skip=()):
+    """
+    Oggetto JSON principale di un file senza le chiavi in `skip`: con ijson
+    i loro valori vengono attraversati senza essere costruiti in memoria
+    """
+    if not ijson:
+        return {key: value for key, value in load_file(filename).items() if key not in skip}
+    obj = {}
+    key = builder = None
+    with open(filename, "rb") as f:
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if prefix == "" and event in ("map_key", "end_map"):
+                if builder is not None:
+                    obj[key] = builder.value
+                key = value
+                builder = None if event == "end_map" or value in skip else ijson.ObjectBuilder()
+            elif builder is not None:
+                builder.event(event, value)
+    return obj
@@ -0,0 +1,364 @@
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Optional
+
+# Chiavi del livello principale rimosse da complete_details perché già presenti nella gara
+DUPLICATED_DETAIL_KEYS = ("id", "description", "scheduled", "scheduled_end", "type",
+                          "status", "venue", "competitors", "stages")
+
+# Campi di complete_details.stage (chiave -> campo della gara) rimossi quando
+# ripetono il valore della gara; piloti e sessioni restano sempre
+DUPLICATED_STAGE_KEYS = {
+    "id": "stage_id", "description": "description", "scheduled": "scheduled",
+    "scheduled_end": "scheduled_end", "type": "type", "status": "status",
+    "single_event": "single_event", "venue": "venue", "unique_stage_id": "unique_stage_id"
+}
+
+
+def unique_by_id(items):
+    """Elimina gli elementi senza id o con un id già visto, mantenendo l'ordine"""
+    unique = {}
+    for item in items:
+        item_id = item.get("id")
+        if item_id and item_id not in unique:
+            unique[item_id] = item
+    return list(unique.values())
+
+
+@dataclass(slots=True)
+class Venue:
+    """
+    Circuito di una gara. I campi noti sono attributi, gli eventuali altri
+    campi del payload restano in `extra`; i campi assenti valgono None e
+    non vengono serializzati
+    """
+
+    id: Optional[str] = None
+    name: Optional[str] = None
+    capacity: Optional[int] = None
+    city: Optional[str] = None
+    country: Optional[str] = None
+    coordinates: Optional[str] = None
+    country_code: Optional[str] = None
+    url_official: Optional[str] = None
+    length: Optional[int] = None
+    curves_left: Optional[int] = None
+    curves_right: Optional[int] = None
+    laps: Optional[int] = None
+    debut: Optional[int] = None
+    timezone: Optional[str] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_payload(cls, payload: Optional[Dict[str, Any]]) -> "Venue":
+        if not payload:
+            return cls()
+        try:
+            # Caso comune: solo campi noti
+            return cls(**payload)
+        except TypeError:
+            known = {name: payload[name] for name in VENUE_FIELDS if name in payload}
+            extra = {key: value for key, value in payload.items() if key not in VENUE_FIELDS}
+            return cls(**known, extra=extra)
+
+    def update(self, other: "Venue") -> None:
+        """Aggiorna i campi con i valori presenti in `other` (il dato più recente prevale)"""
+        for name in VENUE_FIELDS:
+            value = getattr(other, name)
+            if value is not None:
+                setattr(self, name, value)
+        self.extra.update(other.extra)
+
+    def to_json(self) -> Dict[str, Any]:
+        data = {name: value for name in VENUE_FIELDS if (value := getattr(self, name)) is not None}
+        data.update(self.extra)
+        return data
+
+    def to_bson(self) -> Dict[str, Any]:
+        """Documento della collezione venues (senza _id)"""
+        data = {"venue_id": self.id}
+        data.update((name, value) for name in VENUE_FIELDS[1:] if (value := getattr(self, name)) is not None)
+        data.update(self.extra)
+        return data
+
+
+VENUE_FIELDS = tuple(venue_field.name for venue_field in fields(Venue) if venue_field.name != "extra")
+
+
+@dataclass(slots=True)
+class CompetitorResult:
+    """Risultato di un pilota in una gara (riferimento al pilota nei documenti delle gare)"""
+
+    driver_id: str
+    name: Optional[str] = None
+    position: Optional[int] = None
+    points: Optional[int] = None
+    car_number: Optional[int] = None
+
+    @classmethod
+    def from_competitor(cls, competitor: Dict[str, Any]) -> "CompetitorResult":
+        result = competitor.get("result") or {}
+        return cls(competitor["id"], competitor.get("name"), result.get("position"),
+                   result.get("points"), result.get("car_number"))
+
+    def to_bson(self) -> Dict[str, Any]:
+        return {
+            "driver_id": self.driver_id,
+            "name": self.name,
+            "position": self.position,
+            "points": self.points,
+            "car_number": self.car_number
+        }
+
+
+@dataclass(slots=True)
+class Driver:
+    """Pilota consolidato dalle gare di tutte le stagioni"""
+
+    id: str
+    name: Optional[str] = None
+    gender: Optional[str] = None
+    nationality: Optional[str] = None
+    country_code: Optional[str] = None
+    car_number: Optional[int] = None
+
+    @classmethod
+    def from_competitor(cls, competitor: Dict[str, Any]) -> "Driver":
+        result = competitor.get("result") or {}
+        return cls(competitor.get("id"), competitor.get("name"), competitor.get("gender"),
+                   competitor.get("nationality"), competitor.get("country_code"), result.get("car_number"))
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "Driver":
+        return cls(**{name: data.get(name) for name in DRIVER_FIELDS})
+
+    def fill(self, other: "Driver") -> bool:
+        """
+        Completa i campi vuoti con i valori non vuoti di `other`: per ogni campo
+        vale il primo valore non vuoto incontrato. Restituisce True se è cambiato
+        """
+        changed = False
+        for name in DRIVER_FIELDS:
+            value = getattr(other, name)
+            if value and not getattr(self, name):
+                setattr(self, name, value)
+                changed = True
+        return changed
+
+    def to_json(self) -> Dict[str, Any]:
+        return {name: value for name in DRIVER_FIELDS if (value := getattr(self, name))}
+
+    def to_bson(self) -> Dict[str, Any]:
+        return {
+            "driver_id": self.id,
+            "name": self.name,
+            "gender": self.gender,
+            "nationality": self.nationality,
+            "country_code": self.country_code,
+            "car_number": self.car_number
+        }
+
+
+DRIVER_FIELDS = tuple(driver_field.name for driver_field in fields(Driver))
+
+
+@dataclass(slots=True)
+class Race:
+    """
+    Gara di una stagione, nel formato dei file season_{anno}.json. I payload
+    annidati che le fasi successive non interpretano (stages, contesto,
+    statistiche, dettagli completi) restano dizionari
+    """
+
+    id: str
+    stage_id: str
+    description: str
+    scheduled: Optional[str] = None
+    scheduled_end: Optional[str] = None
+    status: Optional[str] = None
+    type: Optional[str] = None
+    single_event: Optional[bool] = None
+    venue: Venue = field(default_factory=Venue)
+    unique_stage_id: Optional[str] = None
+    stages: List[Dict[str, Any]] = field(default_factory=list)
+    sport_event_context: Dict[str, Any] = field(default_factory=dict)
+    competitors: List[Dict[str, Any]] = field(default_factory=list)
+    sport_event_status: Dict[str, Any] = field(default_factory=dict)
+    race_result: Dict[str, Any] = field(default_factory=dict)
+    statistics: Dict[str, Any] = field(default_factory=dict)
+    complete_details: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_stage(cls, race_stage: Dict[str, Any], race_id: str, details: Dict[str, Any]) -> "Race":
+        """
+        Unico passo di interpretazione di una gara: voce del summary della
+        stagione più dettagli completi, senza duplicati di piloti e sessioni e
+        senza i campi di complete_details già presenti nella gara
+        """
+        race = cls(
+            id=race_id,
+            stage_id=race_stage["id"],
+            description=race_stage.get("description", "Unknown Race"),
+            scheduled=race_stage.get("scheduled"),
+            scheduled_end=race_stage.get("scheduled_end"),
+            status=race_stage.get("status"),
+            type=race_stage.get("type"),
+            single_event=race_stage.get("single_event"),
+            venue=Venue.from_payload(race_stage.get("venue")),
+            unique_stage_id=race_stage.get("unique_stage_id"),
+            stages=unique_by_id(race_stage.get("stages", [])),
+            sport_event_context=race_stage.get("sport_event_context", {}),
+            competitors=unique_by_id(race_stage.get("competitors", [])),
+            sport_event_status=race_stage.get("sport_event_status", {}),
+            race_result=race_stage.get("race_result", {}),
+            statistics=race_stage.get("statistics", {})
+        )
+        race.complete_details = race.added_details(details)
+        return race
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "Race":
+        """Gara già estratta (voce di races in un file stagione)"""
+        try:
+            race = cls(**data)
+        except TypeError:
+            # Campi non previsti: vengono ignorati
+            race = cls(**{name: data[name] for name in RACE_FIELDS if name in data})
+        race.venue = Venue.from_payload(race.venue)
+        race.complete_details = race.complete_details or {}
+        return race
+
+    def refresh_details(self, details: Dict[str, Any]) -> None:
+        """
+        Sostituisce i dettagli completi con una nuova risposta del summary della
+        gara; lo stato della gara segue quello dei dettagli
+        """
+        self.status = (details.get("stage") or {}).get("status") or self.status
+        self.complete_details = self.added_details(details)
+
+    def added_details(self, details: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Solo ciò che i dettagli completi aggiungono alla gara: senza le chiavi
+        duplicate del livello principale e senza i campi della sessione
+        (complete_details.stage) uguali a quelli della gara
+        """
+        added = {key: value for key, value in details.items() if key not in DUPLICATED_DETAIL_KEYS}
+        stage = added.get("stage")
+        if isinstance(stage, dict):
+            race_fields = self.to_json()
+            added["stage"] = {
+                key: value for key, value in stage.items()
+                if key not in DUPLICATED_STAGE_KEYS or value != race_fields[DUPLICATED_STAGE_KEYS[key]]
+            }
+        return added
+
+    @property
+    def stage_competitors(self) -> List[Dict[str, Any]]:
+        """Piloti della gara con i risultati (complete_details.stage.competitors)"""
+        return (self.complete_details.get("stage") or {}).get("competitors", [])
+
+    def results(self) -> List[CompetitorResult]:
+        """Risultati dei piloti con un id"""
+        return [CompetitorResult.from_competitor(competitor)
+                for competitor in self.stage_competitors if competitor.get("id")]
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "stage_id": self.stage_id,
+            "description": self.description,
+            "scheduled": self.scheduled,
+            "scheduled_end": self.scheduled_end,
+            "status": self.status,
+            "type": self.type,
+            "single_event": self.single_event,
+            "venue": self.venue.to_json(),
+            "unique_stage_id": self.unique_stage_id,
+            "stages": self.stages,
+            "sport_event_context": self.sport_event_context,
+            "competitors": self.competitors,
+            "sport_event_status": self.sport_event_status,
+            "race_result": self.race_result,
+            "statistics": self.statistics,
+            "complete_details": self.complete_details
+        }
+
+    def to_bson(self, season_year) -> Dict[str, Any]:
+        """
+        Documento della collezione races (senza _id). Il circuito è un
+        riferimento alla collezione venues e i payload vuoti non vengono scritti
+        """
+        doc = {
+            "race_id": self.id,
+            "stage_id": self.stage_id,
+            "season_year": season_year,
+            "description": self.description,
+            "scheduled": self.scheduled,
+            "scheduled_end": self.scheduled_end,
+            "status": self.status,
+            "type": self.type,
+            "venue_id": self.venue.id,
+            "drivers": [result.to_bson() for result in self.results()],
+            "race_result": self.race_result,
+            "statistics": self.statistics
+        }
+        for key in ("venue_id", "race_result", "statistics"):
+            if not doc[key]:
+                del doc[key]
+        return doc
+
+
+RACE_FIELDS = tuple(race_field.name for race_field in fields(Race))
+
+
+@dataclass(slots=True)
+class Season:
+    """Metadati di una stagione (file season_{anno}.json senza le gare)"""
+
+    id: str
+    season_id: str
+    description: str
+    total_races: int
+    generated_at: Optional[str] = None
+    season_info: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_summary(cls, year, season_id, description, total_races, season_summary) -> "Season":
+        stage = season_summary.get("stage", {})
+        return cls(year, season_id, description, total_races, season_summary.get("generated_at"), {
+            "id": stage.get("id"),
+            "description": stage.get("description"),
+            "scheduled": stage.get("scheduled"),
+            "scheduled_end": stage.get("scheduled_end"),
+            "type": stage.get("type"),
+            "category": stage.get("category"),
+            "sport": stage.get("sport")
+        })
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "Season":
+        return cls(data["id"], data["season_id"], data["description"], data["total_races"],
+                   data.get("generated_at"), data.get("season_info", {}))
+
+    def to_json(self, races=None) -> Dict[str, Any]:
+        data = {
+            "id": self.id,
+            "season_id": self.season_id,
+            "description": self.description,
+            "total_races": self.total_races,
+            "generated_at": self.generated_at,
+            "season_info": self.season_info
+        }
+        if races is not None:
+            data["races"] = races
+        return data
+
+    def to_bson(self) -> Dict[str, Any]:
+        """Documento della collezione seasons (senza _id)"""
+        return {
+            "year": self.id,
+            "season_id": self.season_id,
+            "description": self.description,
+            "total_races": self.total_races,
+            "generated_at": self.generated_at,
+            "season_info": self.season_info
+        }
@@ -0,0 +1,70 @@
+import os
+import threading
+from pathlib import Path
+
+from extractors import json_codec
+
+# Directory dei journal delle stagioni in corso di estrazione
+JOURNAL_DIR = Path("Data/extracted/.journal")
+
+
+def atomic_write_json(filename, data, pretty=False) -> None:
+    """
+    Scrive un file JSON in modo atomico: prima su un file temporaneo,
+    poi con una rename sul file definitivo. Di default l'output è compatto
+    """
+    filename = Path(filename)
+    tmp_filename = filename.with_name(f"{filename.name}.tmp")
+    try:
+        with open(tmp_filename, "wb") as f:
+            f.write(json_codec.dumps(data, pretty))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        tmp_filename.unlink(missing_ok=True)
+        raise
+
+
+class RaceJournal:
+    """
+    Journal append-only dei dettagli delle gare di una stagione.
+
+    Ogni gara viene scritta su disco appena recuperata, così un errore
+    di rete o un'interruzione a metà stagione non fa perdere le gare già
+    scaricate: con --resume vengono rilette dal journal invece che
+    richieste di nuovo all'API.
+    """
+
+    def __init__(self, year, journal_dir=JOURNAL_DIR):
+        self.path = Path(journal_dir) / f"season_{year}.jsonl"
+        self._lock = threading.Lock()
+
+    def load(self) -> dict:
+        """Restituisce i dettagli delle gare già registrate (stage_id -> dettagli)"""
+        entries = {}
+        if not self.path.exists():
+            return entries
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json_codec.loads(line)
+                except ValueError:
+                    # Ultima riga troncata da un'interruzione durante la scrittura
+                    continue
+                entries[entry["stage_id"]] = entry["details"]
+        return entries
+
+    def append(self, stage_id, details) -> None:
+        """Registra i dettagli di una gara appena recuperata"""
+        line = json_codec.dumps({"stage_id": stage_id, "details": details})
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.write(line + b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def reset(self) -> None:
+        """Elimina il journal (stagione completata o nuova estrazione)"""
+        self.path.unlink(missing_ok=True)
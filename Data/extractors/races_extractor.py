@@ -1,123 +1,72 @@
-import requests
-import json
+import sys
 from pathlib import Path
-import time
-import os
-from dotenv import load_dotenv
+from functools import partial
 
-# Carica le variabili d'ambiente dal file .env nella root
-root_dir = Path(__file__).parent.parent.parent
-load_dotenv(root_dir / "BackEnd/.env")
+# Aggiungi la directory Data al path per importare i moduli condivisi
+sys.path.append(str(Path(__file__).parent.parent))
 
+from extractors.http_client import api_url, client, fetch_data, print_http_stats
+from extractors.fetch_planner import FetchPlanner, REUSE, SUMMARY_ONLY
+from extractors.fetch_scheduler import FetchScheduler, race_priority, season_priority
+from extractors.run_manifest import RunManifest
+from extractors.track_index import TrackIndex
+from extractors.race_journal import RaceJournal
+from extractors import json_codec
+from extractors.season_store import get_season_store
+from extractors.models import Race, Season
+from extractors.settings import DEFAULT_WORKERS, DEFAULT_RPS
+from extractors.telemetry import get_logger, metrics
 
-# Configurazione API
-BASE_URL = os.getenv("SPORTRADAR_BASE_URL", "https://api.sportradar.com/indycar/trial/v2/en")
-API_KEY = os.getenv("SPORTRADAR_API_KEY")
-
-# Crea la directory per i dati estratti
-Path("Data/extracted").mkdir(parents=True, exist_ok=True)
-
-HEADERS = {
-    "accept": "application/json",
-    "x-api-key": API_KEY
-}
+logger = get_logger("races")
 
 def load_seasons():
     """
     Carica la lista delle stagioni dal file JSON
     """
     try:
-        with open("Data/extracted/seasons.json", "r", encoding="utf-8") as f:
-            return json.load(f)
+        return json_codec.load_file("Data/extracted/seasons.json")
     except Exception as e:
         print(f"✗ Errore nel caricamento delle stagioni: {e}")
         return []
 
-def fetch_data(url: str, retry_count=3, delay=1):
+def load_season_races(year):
     """
-    Funzione sincrona per recuperare dati da un URL dato con retry.
+    Carica le gare già estratte per una stagione, indicizzate per stage_id
     """
-    print(f"Tentativo di recupero dati da: {url}")
-    
-    for attempt in range(retry_count):
-        try:
-            response = requests.get(url, headers=HEADERS)
-            response.raise_for_status()
-            data = response.json()
-            print(f"✓ Dati recuperati con successo da {url}")
-            return data
-                
-        except requests.exceptions.RequestException as e:
-            status_code = getattr(response, 'status_code', 'N/A') if 'response' in locals() else 'N/A'
-            response_text = getattr(response, 'text', 'N/A') if 'response' in locals() else 'N/A'
-            print(f"✗ Tentativo {attempt + 1}/{retry_count} fallito per {url}. Stato HTTP: {status_code}. Errore: {e}")
-            
-            if status_code == 429:  # Rate limit
-                wait_time = delay * (attempt + 1)
-                print(f"Rate limit raggiunto. Attendo {wait_time} secondi...")
-                time.sleep(wait_time)
-                continue
-                
-            if attempt < retry_count - 1:
-                time.sleep(delay)
-                continue
-                
-            if status_code != 'N/A':
-                print(f"Corpo della risposta: {response_text[:500]}...")
-            return None
-            
-        except Exception as e:
-            print(f"✗ Errore imprevisto durante il recupero da {url}: {e}")
-            if attempt < retry_count - 1:
-                time.sleep(delay)
-                continue
-            return None
+    store = get_season_store()
+    if not store.exists(year):
+        return {}
+    try:
+        season_data = store.load_season(year)
+        return {race["stage_id"]: race for race in season_data.get("races", [])}
+    except Exception as e:
+        print(f"    ✗ Errore nel caricamento di {store.path(year)}: {e}")
+        return {}
 
 def fetch_race_details(race_id):
     """
     Recupera i dettagli completi di una gara specifica
     """
-    url = f"{BASE_URL}/sport_events/{race_id}/summary.json"
+    url = api_url(f"sport_events/{race_id}/summary.json")
     return fetch_data(url)
 
-def clean_race_data(race_data):
-    """
-    Pulisce i dati di una gara eliminando duplicazioni e dati non necessari
-    """
-    # Rimuovi duplicati dai competitors
-    if "competitors" in race_data:
-        unique_competitors = {}
-        for competitor in race_data["competitors"]:
-            comp_id = competitor.get("id")
-            if comp_id and comp_id not in unique_competitors:
-                unique_competitors[comp_id] = competitor
-        race_data["competitors"] = list(unique_competitors.values())
-
-    # Rimuovi duplicati dagli stages
-    if "stages" in race_data:
-        unique_stages = {}
-        for stage in race_data["stages"]:
-            stage_id = stage.get("id")
-            if stage_id and stage_id not in unique_stages:
-                unique_stages[stage_id] = stage
-        race_data["stages"] = list(unique_stages.values())
-
-    # Rimuovi dati duplicati dal complete_details
-    if "complete_details" in race_data:
-        details = race_data["complete_details"]
-        # Rimuovi i dati che sono già presenti nel livello principale
-        keys_to_remove = ["id", "description", "scheduled", "scheduled_end", "type", 
-                         "status", "venue", "competitors", "stages"]
-        for key in keys_to_remove:
-            if key in details:
-                del details[key]
-
-    return race_data
-
-def process_season_races(summary_data, year, race_counter):
+def process_season_races(summary_data, year, race_counter, known_races=None, details=None,
+                         on_race=None, skipped=None, summary_only=None):
     """
-    Elabora i dati delle gare dal summary della stagione e recupera i dettagli completi
+    Assembla le gare della stagione dal summary e dai dettagli completi già
+    scaricati dalla coda delle richieste (`details`, stage_id -> dettagli,
+    compresi quelli ripresi dal journal di un'esecuzione interrotta).
+    Le gare presenti in `known_races` (stage_id -> gara già estratta) vengono
+    riutilizzate così come sono.
+    Se indicato, `on_race` riceve ogni gara appena assemblata. Le gare in
+    `skipped` (richieste fallite o saltate per scadenza o budget) e non presenti in
+    `known_races` vengono tralasciate; quelle in `summary_only` vengono
+    costruite dalla sola voce del summary (vedi FetchPlanner).
     """
+    known_races = known_races or {}
+    details = details or {}
+    skipped = skipped or set()
+    summary_only = summary_only or set()
     races_data = []
     
     # Naviga nella struttura del JSON per trovare le gare
@@ -130,126 +79,298 @@ def process_season_races(summary_data, year, race_counter):
     
     print(f"    Trovate {len(stages)} gare nella stagione {year}")
     
+    race_stages = []
     for race_stage in stages:
-        race_id = race_stage.get("id")
-        if not race_id:
-            print(f"      ✗ ID gara mancante per una gara")
+        if not race_stage.get("id"):
+            logger.warning("ID gara mancante", extra={"fields": {"year": year}})
+            continue
+        race_stages.append(race_stage)
+    
+    reused = sum(1 for race_stage in race_stages if race_stage["id"] in known_races)
+    if reused:
+        print(f"      Riutilizzate {reused} gare già estratte")
+    
+    # Assembla le gare nell'ordine del summary, così gli ID progressivi restano deterministici
+    for race_stage in race_stages:
+        race_id = race_stage["id"]
+        if race_id in known_races:
+            race_info = dict(known_races[race_id], id=str(race_counter))
+            races_data.append(race_info)
+            if on_race:
+                on_race(race_info)
+            race_counter += 1
             continue
-            
-        print(f"      Recuperando dettagli completi per la gara {race_counter}...")
-        race_details = fetch_race_details(race_id)
         
-        if not race_details:
-            print(f"      ✗ Impossibile recuperare i dettagli per la gara {race_counter}")
+        if race_id in skipped and race_id not in details:
+            # L'ID resta quello della posizione nel summary
+            race_counter += 1
             continue
-            
-        # Unisci i dati base con i dettagli completi
-        race_info = {
-            "id": str(race_counter),  # ID numerico progressivo
-            "stage_id": race_id,
-            "description": race_stage.get("description", "Unknown Race"),
-            "scheduled": race_stage.get("scheduled"),
-            "scheduled_end": race_stage.get("scheduled_end"),
-            "status": race_stage.get("status"),
-            "type": race_stage.get("type"),
-            "single_event": race_stage.get("single_event"),
-            "venue": race_stage.get("venue", {}),
-            "unique_stage_id": race_stage.get("unique_stage_id"),
-            "stages": race_stage.get("stages", []),
-            "sport_event_context": race_stage.get("sport_event_context", {}),
-            "competitors": race_stage.get("competitors", []),
-            "sport_event_status": race_stage.get("sport_event_status", {}),
-            "race_result": race_stage.get("race_result", {}),
-            "statistics": race_stage.get("statistics", {}),
-            "complete_details": race_details
-        }
         
-        races_data.append(clean_race_data(race_info))
-        print(f"      ✓ Processata gara {race_counter}: {race_info['description']}")
+        race_details = {} if race_id in summary_only else details.get(race_id)
+        if race_details is None:
+            logger.error("Impossibile recuperare i dettagli della gara", extra={"fields": {
+                "year": year, "race_id": race_counter, "stage_id": race_id}})
+            # Come per le gare saltate, l'ID resta quello della posizione nel summary
+            race_counter += 1
+            continue
+            
+        # Unisci i dati base con i dettagli completi (ID numerico progressivo)
+        race_info = Race.from_stage(race_stage, str(race_counter), race_details).to_json()
+        races_data.append(race_info)
+        if on_race:
+            on_race(race_info)
+        metrics.count("documents_parsed")
+        logger.debug("Gara elaborata", extra={"fields": {
+            "year": year, "race_id": race_counter, "description": race_info["description"]}})
         
         race_counter += 1
-        # Pausa tra le richieste per evitare rate limiting
-        time.sleep(1)
     
     return races_data, race_counter
 
+def build_season_data(year, season_id, description, races_data, season_summary):
+    """
+    Costruisce il documento di una stagione con le sue gare
+    """
+    return Season.from_summary(year, season_id, description, len(races_data), season_summary).to_json(races_data)
+
 def save_season_races(year, season_id, description, races_data, season_summary):
     """
-    Salva i dati delle gare di una stagione in un file separato
+    Salva i dati delle gare di una stagione in un file separato, nel formato
+    dello store configurato. Il file viene sostituito in modo atomico, quindi
+    non resta mai scritto a metà.
     """
-    filename = f"Data/extracted/season_{year}.json"
+    store = get_season_store()
+    filename = store.path(year)
     try:
-        output_data = {
-            "id": year,
-            "season_id": season_id,
-            "description": description,
-            "total_races": len(races_data),
-            "generated_at": season_summary.get("generated_at"),
-            "season_info": {
-                "id": season_summary.get("stage", {}).get("id"),
-                "description": season_summary.get("stage", {}).get("description"),
-                "scheduled": season_summary.get("stage", {}).get("scheduled"),
-                "scheduled_end": season_summary.get("stage", {}).get("scheduled_end"),
-                "type": season_summary.get("stage", {}).get("type"),
-                "category": season_summary.get("stage", {}).get("category"),
-                "sport": season_summary.get("stage", {}).get("sport")
-            },
-            "races": races_data
-        }
-        
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(output_data, f, indent=4, ensure_ascii=False)
+        output_data = build_season_data(year, season_id, description, races_data, season_summary)
+        store.save_season(output_data)
         print(f"    ✓ Salvate {len(races_data)} gare per il {year} in {filename}")
+        return True
     except IOError as e:
         print(f"    ✗ Errore durante il salvataggio di {filename}: {e}")
+        return False
+
+class SeasonFetch:
+    """Stagione in estrazione: summary, dettagli delle gare arrivati e gare ancora in coda"""
+
+    def __init__(self, season, known_races, stored_races, journal, journaled):
+        self.season = season
+        self.known_races = known_races
+        self.stored_races = stored_races
+        self.journal = journal
+        self.details = dict(journaled)
+        self.summary = None
+        self.pending = 0
+        self.skipped = set()
+        self.summary_only = set()
 
-def main():
+def main(workers=DEFAULT_WORKERS, rps=DEFAULT_RPS, timeout=None, use_cache=True, incremental=False,
+         resume=False, write_files=True, on_race=None, on_season=None, deadline=None, budget=None):
+    """
+    Estrae le gare di tutte le stagioni. In modalità incrementale vengono
+    riscaricate solo le stagioni e le gare nuove o non ancora definitive;
+    restituisce le gare cambiate raggruppate per stagione (anno -> stage_id).
+    Con `resume` le gare già registrate nel journal di un'esecuzione
+    interrotta non vengono richieste di nuovo.
+
+    `on_race(year, race)` riceve ogni gara appena assemblata e `on_season(season_data)`
+    ogni stagione completata (in modalità incrementale solo quelle cambiate), così
+    le fasi successive possono lavorare in streaming; `write_files` rende
+    facoltativa la scrittura dei file delle stagioni.
+
+    Summary delle stagioni e dettagli delle gare passano da un'unica coda con
+    priorità (FetchScheduler): prima le gare in corso o appena concluse, poi
+    quelle programmate, infine lo storico; una stagione viene assemblata appena
+    sono arrivate tutte le sue gare. Con `deadline` (secondi) o `budget`
+    (richieste) le richieste rimaste in coda vengono saltate: le gare non
+    scaricate mantengono la versione già estratta e la stagione resta da
+    aggiornare alla prossima esecuzione.
+    """
     print("=== Estrattore Gare IndyCar ===\n")
     
+    # Configura i tetti di rate e concorrenza, il timeout di lettura e la cache
+    client.configure(rps=rps, concurrency=workers, read_timeout=timeout, use_cache=use_cache)
+    print(f"Worker concorrenti: {workers} - Limite richieste: {rps} req/s\n")
+    
     # Carica la lista delle stagioni
     print("1. Caricamento lista stagioni...")
     seasons = load_seasons()
     if not seasons:
         print("Nessuna stagione trovata. Uscita.")
-        return
+        return {}
     
-    print(f"\n2. Processamento di {len(seasons)} stagioni...")
+    manifest = RunManifest()
+    track_index = TrackIndex()
+    changed_races = {}
+    incomplete_seasons = set()
+    scheduler = FetchScheduler(workers, deadline, budget)
+    planner = FetchPlanner()
+    newest_year = max(int(season["year"]) for season in seasons)
     
-    # Processa ogni stagione
-    for season_idx, season in enumerate(seasons, 1):
+    def finish_season(season_fetch):
+        # Tutte le gare della stagione sono arrivate (o saltate): assembla e salva
+        season = season_fetch.season
         year = season["year"]
         season_id = season["season_id"]
+        season_summary = season_fetch.summary
         
-        # Reset del contatore delle gare per ogni anno
-        race_counter = 1
-            
-        print(f"\n--- [{season_idx}/{len(seasons)}] Processando stagione {year} ---")
+        print(f"\n--- Processando stagione {year} ---")
         print(f"    Season ID: {season_id}")
         print(f"    Descrizione: {season['description']}")
         
-        # Recupera il sommario completo della stagione
-        print(f"    Recuperando summary per stagione {year}...")
-        season_summary = fetch_data(f"{BASE_URL}/sport_events/{season_id}/summary.json")
-        if not season_summary:
-            print(f"✗ Nessun dato trovato per la stagione {year}")
-            continue
+        known_races = season_fetch.known_races
+        if season_fetch.skipped:
+            # Le gare saltate mantengono la versione già estratta, se c'è
+            stored = season_fetch.stored_races
+            known_races = dict(known_races, **{
+                stage_id: stored[stage_id] for stage_id in season_fetch.skipped if stage_id in stored
+            })
+            print(f"    ! {len(season_fetch.skipped)} gare non scaricate (richieste fallite, scadenza o budget esauriti)")
+            incomplete_seasons.add(year)
+        
+        changed = []
         
-        # Elabora i dati delle gare dal summary
-        print(f"    Elaborando dati delle gare...")
-        races_data, _ = process_season_races(season_summary, year, race_counter)
+        def handle_race(race):
+            # Aggiorna manifest e indice dei circuiti e inoltra le gare nuove o modificate appena pronte
+            is_changed = manifest.update_race(year, race)
+            track_index.update_race(year, race)
+            if is_changed:
+                changed.append(race["stage_id"])
+            if on_race and (is_changed or not incremental):
+                on_race(year, race)
+        
+        # Reset del contatore delle gare per ogni anno
+        race_counter = 1
+        races_data, _ = process_season_races(season_summary, year, race_counter, known_races,
+                                             season_fetch.details, handle_race,
+                                             season_fetch.skipped, season_fetch.summary_only)
+        # Una stagione con gare saltate non è mai definitiva: verrà ripresa alla prossima esecuzione
+        manifest.update_season(year, season_summary, races_data, complete=not season_fetch.skipped)
+        track_index.retain_season(year, [race["stage_id"] for race in races_data])
+        changed_races[year] = changed
+        
+        if on_season and races_data and (changed or not incremental):
+            on_season(build_season_data(year, season_id, season["description"], races_data, season_summary))
         
         # Salva i dati della stagione
-        if races_data:
-            save_season_races(year, season_id, season["description"], races_data, season_summary)
-        else:
+        journal = season_fetch.journal
+        if not races_data:
             print(f"    ✗ Nessuna gara trovata per la stagione {year}")
+        elif not write_files:
+            journal.reset()
+        elif incremental and not changed and get_season_store().exists(year):
+            print(f"    Nessuna gara modificata per il {year}, file invariato")
+            journal.reset()
+        elif save_season_races(year, season_id, season["description"], races_data, season_summary):
+            journal.reset()
+    
+    def on_details(season_fetch, race_id, race_details):
+        if race_details:
+            season_fetch.details[race_id] = race_details
+            season_fetch.journal.append(race_id, race_details)
+        else:
+            # Richiesta fallita: come una gara saltata, resta la versione già estratta
+            logger.error("Impossibile recuperare i dettagli della gara", extra={"fields": {
+                "year": season_fetch.season["year"], "stage_id": race_id}})
+            season_fetch.skipped.add(race_id)
+        season_fetch.pending -= 1
+        if not season_fetch.pending:
+            finish_season(season_fetch)
+    
+    def on_details_skipped(season_fetch, race_id):
+        season_fetch.skipped.add(race_id)
+        season_fetch.pending -= 1
+        if not season_fetch.pending:
+            finish_season(season_fetch)
+    
+    def on_summary(season_fetch, season_summary):
+        year = season_fetch.season["year"]
+        if not season_summary:
+            print(f"✗ Nessun dato trovato per la stagione {year}")
+            incomplete_seasons.add(year)
+            return
+        season_fetch.summary = season_summary
+        # Il planner decide quali gare servono davvero: quelle da scaricare
+        # entrano nella coda con la loro priorità
+        for race_stage in season_summary.get("stage", {}).get("stages", []):
+            race_id = race_stage.get("id")
+            if race_id in season_fetch.known_races:
+                planner.record("final")
+                continue
+            if not race_id or race_id in season_fetch.details:
+                continue
+            decision = planner.plan(race_stage, season_fetch.stored_races.get(race_id))
+            if decision == REUSE:
+                season_fetch.known_races[race_id] = season_fetch.stored_races[race_id]
+                continue
+            if decision == SUMMARY_ONLY:
+                season_fetch.summary_only.add(race_id)
+                continue
+            season_fetch.pending += 1
+            scheduler.submit(
+                race_priority(race_stage, planner.now),
+                partial(fetch_race_details, race_id),
+                partial(on_details, season_fetch, race_id),
+                partial(on_details_skipped, season_fetch, race_id)
+            )
+        if not season_fetch.pending:
+            finish_season(season_fetch)
+    
+    def on_summary_skipped(season_fetch):
+        print(f"! Stagione {season_fetch.season['year']} non aggiornata (scadenza o budget esauriti)")
+        incomplete_seasons.add(season_fetch.season["year"])
+    
+    mode = "incrementale" if incremental else "completa"
+    print(f"\n2. Pianificazione delle richieste per {len(seasons)} stagioni (modalità {mode})...")
+    
+    for season in seasons:
+        year = season["year"]
+        
+        stored_races = load_season_races(year)
+        known_races = {}
+        if incremental:
+            if stored_races and manifest.is_season_final(year):
+                print(f"    Stagione {year} già definitiva, nessuna richiesta necessaria")
+                continue
+            known_races = {
+                stage_id: race for stage_id, race in stored_races.items()
+                if manifest.is_race_final(stage_id)
+            }
+        
+        # Journal delle gare scaricate: ripreso con --resume, altrimenti ricominciato
+        journal = RaceJournal(year)
+        journaled = journal.load() if resume else {}
+        if not resume:
+            journal.reset()
+        elif journaled:
+            print(f"    Stagione {year}: riprese dal journal {len(journaled)} gare già scaricate")
         
-        # Pausa tra le stagioni per evitare rate limiting
-        if season_idx < len(seasons):
-            print(f"    Pausa di 2 secondi prima della prossima stagione...")
-            time.sleep(2)
+        # Il summary della stagione in corso precede ogni gara, quelli storici le gare storiche
+        season_fetch = SeasonFetch(season, known_races, stored_races, journal, journaled)
+        current = int(year) == newest_year or manifest.is_season_open(year)
+        scheduler.submit(
+            season_priority(current),
+            partial(fetch_data, api_url(f"sport_events/{season['season_id']}/summary.json")),
+            partial(on_summary, season_fetch),
+            partial(on_summary_skipped, season_fetch)
+        )
+    
+    print(f"\n3. Download in ordine di priorità ({workers} worker)...")
+    scheduler.run()
+    print(f"\n{planner.report()}")
+    metrics.count("detail_calls_avoided", planner.total)
+    if scheduler.skipped:
+        print(f"\n! Richieste non avviate per scadenza o budget: {scheduler.skipped} "
+              f"(avviate: {scheduler.dispatched})")
+    
+    manifest.record_run(changed_races, incomplete_seasons)
+    manifest.save()
+    track_index.save()
     
     print("\n=== Estrazione gare completata ===")
+    print(f"Gare nuove o modificate: {sum(len(ids) for ids in changed_races.values())}")
+    print_http_stats()
+    return manifest.last_run["changed_races"]
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,197 @@
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+# Parametri AIMD: incremento additivo del rate (frazione del tetto, con un minimo
+# in richieste al secondo), fattore di riduzione moltiplicativa e rate minimo
+RATE_INCREASE = 0.05
+MIN_RATE_INCREASE = 0.1
+DECREASE_FACTOR = 0.5
+MIN_RATE = 0.1
+
+# Rate oltre il quale, senza un tetto configurato, il limite viene rimosso
+UNCAPPED_RECOVERY_RATE = 10.0
+
+# Successi consecutivi necessari per concedere una richiesta in volo in più
+CONCURRENCY_INCREASE_EVERY = 10
+
+# Backoff esponenziale di default in assenza di Retry-After (secondi)
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+# Finestra (secondi) su cui viene misurato il rate effettivo
+RATE_WINDOW = 10.0
+
+
+def jittered_backoff(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX) -> float:
+    """Backoff esponenziale con jitter: base * 2^attempt, casualizzato tra 50% e 150%"""
+    return min(cap, base * (2 ** attempt)) * random.uniform(0.5, 1.5)
+
+
+def parse_retry_after(value):
+    """Interpreta l'header Retry-After (secondi o data HTTP), restituendo i secondi di attesa"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def header_number(headers, name):
+    """Legge un header numerico, restituendo None se assente o non valido"""
+    try:
+        return float(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateController:
+    """
+    Controllo adattivo di rate e concorrenza condiviso da tutti gli estrattori.
+
+    Il rate (richieste al secondo) e il numero di richieste in volo seguono
+    una politica AIMD: crescono di poco a ogni successo e si dimezzano a ogni
+    429. Le pause indicate da Retry-After (o, in sua assenza, un backoff
+    esponenziale con jitter) bloccano tutti i worker, e il tetto del rate
+    viene allineato agli header di piano di SportRadar (X-Plan-Qps-Allotted).
+    Il tempo passato in throttling viene misurato separatamente.
+    """
+
+    def __init__(self, max_rate: float = 1.0, max_concurrency: int = 1):
+        self._lock = threading.Lock()
+        self._slots = threading.Condition(self._lock)
+        self._next_slot = 0.0
+        self._pause_until = 0.0
+        self._in_flight = 0
+        self._successes = 0
+        self._recent = deque()
+        self.consecutive_throttles = 0
+        self.throttle_events = 0
+        self.throttled_seconds = 0.0
+        self.plan_qps = None
+        self.quota_allotted = None
+        self.quota_used = None
+        self.configure(max_rate, max_concurrency)
+
+    def configure(self, max_rate=None, max_concurrency=None) -> None:
+        """Imposta il tetto del rate (0 o negativo = nessun limite) e delle richieste in volo"""
+        with self._lock:
+            if max_rate is not None:
+                self.max_rate = max_rate if max_rate and max_rate > 0 else None
+                self.rate = self._ceiling()
+            if max_concurrency is not None:
+                self.max_concurrency = max(1, max_concurrency)
+                self.concurrency = self.max_concurrency
+                self._slots.notify_all()
+
+    def _ceiling(self):
+        ceilings = [rate for rate in (self.max_rate, self.plan_qps) if rate]
+        return min(ceilings) if ceilings else None
+
+    def _measured_rate(self, now: float) -> float:
+        while self._recent and now - self._recent[0] > RATE_WINDOW:
+            self._recent.popleft()
+        return len(self._recent) / RATE_WINDOW
+
+    @contextmanager
+    def slot(self):
+        """Attende uno slot libero (concorrenza, rate e pause) per eseguire una richiesta"""
+        with self._slots:
+            while self._in_flight >= self.concurrency:
+                self._slots.wait()
+            self._in_flight += 1
+            now = time.monotonic()
+            interval = 1.0 / self.rate if self.rate else 0.0
+            start = max(now, self._next_slot, self._pause_until)
+            self._next_slot = start + interval
+            self._recent.append(start)
+        try:
+            wait_time = start - time.monotonic()
+            if wait_time > 0:
+                time.sleep(wait_time)
+            yield
+        finally:
+            with self._slots:
+                self._in_flight -= 1
+                self._slots.notify()
+
+    def on_response(self, status_code: int, headers) -> float:
+        """
+        Aggiorna rate e concorrenza in base alla risposta ricevuta.
+        Per un 429 restituisce i secondi di pausa applicati, altrimenti 0.
+        """
+        with self._lock:
+            self._read_plan_headers(headers)
+            if status_code == 429:
+                return self._on_throttle(parse_retry_after(headers.get("retry-after")))
+            if status_code < 500:
+                self._on_success()
+            return 0.0
+
+    def _read_plan_headers(self, headers) -> None:
+        plan_qps = header_number(headers, "x-plan-qps-allotted")
+        if plan_qps:
+            self.plan_qps = plan_qps
+            ceiling = self._ceiling()
+            if self.rate is None or self.rate > ceiling:
+                self.rate = ceiling
+        quota_allotted = header_number(headers, "x-plan-quota-allotted")
+        quota_used = header_number(headers, "x-plan-quota-current")
+        if quota_allotted is not None:
+            self.quota_allotted = int(quota_allotted)
+        if quota_used is not None:
+            self.quota_used = int(quota_used)
+
+    def _on_success(self) -> None:
+        self.consecutive_throttles = 0
+        ceiling = self._ceiling()
+        if self.rate is not None:
+            self.rate += max(MIN_RATE_INCREASE, RATE_INCREASE * (ceiling or UNCAPPED_RECOVERY_RATE))
+            if ceiling and self.rate >= ceiling:
+                self.rate = ceiling
+            elif not ceiling and self.rate >= UNCAPPED_RECOVERY_RATE:
+                # Senza tetto configurato il limite viene rimosso una volta recuperato
+                self.rate = None
+        self._successes += 1
+        if self._successes >= CONCURRENCY_INCREASE_EVERY and self.concurrency < self.max_concurrency:
+            self._successes = 0
+            self.concurrency += 1
+            self._slots.notify()
+
+    def _on_throttle(self, retry_after) -> float:
+        now = time.monotonic()
+        current_rate = self.rate or max(self._measured_rate(now), MIN_RATE)
+        self.rate = max(MIN_RATE, current_rate * DECREASE_FACTOR)
+        self.concurrency = max(1, self.concurrency // 2)
+        self._successes = 0
+
+        wait_time = retry_after if retry_after is not None else jittered_backoff(self.consecutive_throttles)
+        self.consecutive_throttles += 1
+        self.throttle_events += 1
+
+        pause_until = now + wait_time
+        if pause_until > self._pause_until:
+            # Conta solo l'estensione della pausa, così le pause sovrapposte non si sommano
+            self.throttled_seconds += pause_until - max(now, self._pause_until)
+            self._pause_until = pause_until
+        return wait_time
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "rate": round(self.rate, 3) if self.rate else None,
+                "concurrency": self.concurrency,
+                "throttle_events": self.throttle_events,
+                "throttled_seconds": round(self.throttled_seconds, 3),
+                "plan_qps": self.plan_qps,
+                "quota_allotted": self.quota_allotted,
+                "quota_used": self.quota_used
+            }
@@ -0,0 +1,152 @@
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+
+from extractors import json_codec
+from extractors.settings import load_environment
+
+# Directory e dimensione massima (MB) di default della cache delle risposte,
+# sostituibili con SPORTRADAR_CACHE_DIR e SPORTRADAR_CACHE_MAX_MB
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / "cache" / "http"
+DEFAULT_MAX_MB = 512
+
+# Durata di validità (in secondi) in base allo stato dell'evento; None = non scade mai
+STATUS_TTLS = {
+    "Closed": None,
+    "Finished": None,
+    "Cancelled": None,
+    "Open": 60,
+    "Scheduled": 15 * 60
+}
+
+# Durata di validità per le risposte senza stato (es. lista stagioni)
+DEFAULT_TTL = 60 * 60
+
+
+def ttl_for(data) -> float:
+    """
+    Restituisce la durata di validità di una risposta in base allo stato dell'evento
+    """
+    if isinstance(data, dict):
+        status = (data.get("stage") or {}).get("status")
+        if status in STATUS_TTLS:
+            return STATUS_TTLS[status]
+    return DEFAULT_TTL
+
+
+class ResponseCache:
+    """
+    Cache su disco delle risposte JSON dell'API, indicizzata per URL.
+
+    Ogni voce conserva il corpo della risposta insieme a ETag e
+    Last-Modified, così le voci scadute vengono rivalidate con richieste
+    condizionali. Quando la dimensione totale supera il limite vengono
+    eliminate le voci usate meno di recente (LRU sul mtime dei file).
+    Directory e limite non indicati vengono letti dalla configurazione al
+    primo uso: creare la cache non tocca il disco.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes: int = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None
+
+    def _open(self) -> None:
+        """Risolve directory e limite, crea la directory e ne misura l'occupazione"""
+        with self._lock:
+            if self._total_bytes is not None:
+                return
+            load_environment()
+            if self.cache_dir is None:
+                self.cache_dir = Path(os.getenv("SPORTRADAR_CACHE_DIR", DEFAULT_CACHE_DIR))
+            if self.max_bytes is None:
+                self.max_bytes = int(float(os.getenv("SPORTRADAR_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._total_bytes = sum(path.stat().st_size for path in self.cache_dir.glob("*.json"))
+
+    def _path(self, url: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+    def lookup(self, url: str):
+        """Restituisce la voce in cache per l'URL (o None) e la marca come usata di recente"""
+        if self._total_bytes is None:
+            self._open()
+        path = self._path(url)
+        try:
+            entry = json_codec.load_file(path)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("url") == url else None
+
+    def is_fresh(self, entry) -> bool:
+        """Verifica se una voce può essere usata senza contattare l'API"""
+        ttl = entry.get("ttl")
+        return ttl is None or time.time() - entry.get("stored_at", 0) < ttl
+
+    def conditional_headers(self, entry) -> dict:
+        """Header per rivalidare una voce scaduta con una richiesta condizionale"""
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url: str, data, headers=None) -> None:
+        """Salva una risposta con i suoi validatori"""
+        headers = headers or {}
+        self._write(url, {
+            "url": url,
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "stored_at": time.time(),
+            "ttl": ttl_for(data),
+            "data": data
+        })
+
+    def refresh(self, url: str, entry, headers=None) -> None:
+        """Rinnova una voce dopo una risposta 304 Not Modified"""
+        headers = headers or {}
+        entry["stored_at"] = time.time()
+        entry["etag"] = headers.get("etag") or entry.get("etag")
+        entry["last_modified"] = headers.get("last-modified") or entry.get("last_modified")
+        self._write(url, entry)
+
+    def _write(self, url: str, entry) -> None:
+        if self._total_bytes is None:
+            self._open()
+        path = self._path(url)
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        try:
+            json_codec.dump_file(tmp_path, entry)
+            with self._lock:
+                old_size = path.stat().st_size if path.exists() else 0
+                os.replace(tmp_path, path)
+                self._total_bytes += path.stat().st_size - old_size
+                if self._total_bytes > self.max_bytes:
+                    self._evict()
+        except OSError as e:
+            print(f"✗ Errore durante il salvataggio in cache di {url}: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        """Elimina le voci meno usate finché la cache non rientra nel limite"""
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        self._total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._total_bytes <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            self._total_bytes -= size
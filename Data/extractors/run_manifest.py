@@ -0,0 +1,161 @@
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from extractors import json_codec
+
+# Percorso di default del manifest delle esecuzioni
+MANIFEST_FILE = Path("Data/extracted/manifest.json")
+
+# Stati per cui una gara non cambierà più
+FINAL_STATUSES = {"Closed", "Finished", "Cancelled"}
+
+# Margine attorno a inizio e fine programmati in cui una gara è "Open"
+# (stessa regola di determineRaceStatus in BackEnd/routes/calendar.js)
+LIVE_WINDOW = timedelta(hours=24)
+
+
+def race_status(race) -> str:
+    """
+    Restituisce lo stato di una gara, usando quello dei dettagli completi se manca
+    """
+    status = race.get("status")
+    if not status:
+        status = race.get("complete_details", {}).get("stage", {}).get("status")
+    return status
+
+
+def race_content_hash(race) -> str:
+    """
+    Calcola l'hash del contenuto di una gara, escludendo il timestamp di generazione
+    """
+    details = race.get("complete_details") or {}
+    stable_race = dict(race)
+    stable_race["complete_details"] = {k: v for k, v in details.items() if k != "generated_at"}
+    # Sempre con il modulo json standard: l'hash non deve dipendere dal backend del codec
+    payload = json.dumps(stable_race, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def parse_time(value):
+    """Timestamp ISO 8601 dell'API come datetime (None se assente o non valido)"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def is_past(timestamp) -> bool:
+    """Verifica se un timestamp ISO 8601 è nel passato"""
+    moment = parse_time(timestamp)
+    return moment is not None and moment < datetime.now(timezone.utc)
+
+
+def live_status(race, now=None) -> str:
+    """
+    Stato di una gara secondo determineRaceStatus del backend: gli stati
+    definitivi restano, una gara è Open da 24 ore prima dell'inizio a 24 ore
+    dopo la fine programmata, Scheduled se futura, altrimenti Closed
+    """
+    if race.get("status") in FINAL_STATUSES:
+        return race["status"]
+    now = now or datetime.now(timezone.utc)
+    start = parse_time(race.get("scheduled"))
+    if start is None:
+        return "Scheduled"
+    end = parse_time(race.get("scheduled_end")) or start
+    if start - LIVE_WINDOW <= now <= end + LIVE_WINDOW:
+        return "Open"
+    return "Scheduled" if now < start else "Closed"
+
+
+class RunManifest:
+    """
+    Manifest delle estrazioni incrementali.
+
+    Per ogni gara (stage_id) registra stato, generated_at e hash del
+    contenuto; per ogni stagione se è definitiva. L'ultima esecuzione
+    elenca gare, stagioni e piloti cambiati, così le fasi successive
+    elaborano solo i record modificati.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path or MANIFEST_FILE)
+        self.data = {"seasons": {}, "races": {}, "last_run": {}}
+        if self.path.exists():
+            try:
+                self.data.update(json_codec.load_file(self.path))
+            except (OSError, ValueError) as e:
+                print(f"✗ Manifest non leggibile ({e}), verrà ricreato")
+
+    @property
+    def last_run(self) -> dict:
+        return self.data.get("last_run", {})
+
+    def is_race_final(self, stage_id) -> bool:
+        """Verifica se una gara era già definitiva nell'ultima estrazione"""
+        entry = self.data["races"].get(stage_id)
+        return bool(entry) and entry.get("status") in FINAL_STATUSES
+
+    def is_season_final(self, year) -> bool:
+        """Verifica se una stagione è conclusa e tutte le sue gare sono definitive"""
+        return self.data["seasons"].get(str(year), {}).get("final", False)
+
+    def is_season_open(self, year) -> bool:
+        """Verifica se una stagione già estratta non era ancora definitiva"""
+        entry = self.data["seasons"].get(str(year))
+        return entry is not None and not entry.get("final", False)
+
+    def update_race(self, year, race) -> bool:
+        """Registra una gara e restituisce True se è nuova o il suo contenuto è cambiato"""
+        stage_id = race["stage_id"]
+        content_hash = race_content_hash(race)
+        previous = self.data["races"].get(stage_id)
+        self.data["races"][stage_id] = {
+            "season": str(year),
+            "status": race_status(race),
+            "generated_at": race.get("complete_details", {}).get("generated_at"),
+            "hash": content_hash
+        }
+        return previous is None or previous.get("hash") != content_hash
+
+    def update_season(self, year, season_summary, races, complete=True) -> None:
+        """
+        Registra una stagione e se può essere saltata nelle prossime esecuzioni;
+        una stagione estratta solo in parte (`complete` False) non lo è mai
+        """
+        stage = season_summary.get("stage", {})
+        season_over = stage.get("status") in FINAL_STATUSES or is_past(stage.get("scheduled_end"))
+        self.data["seasons"][str(year)] = {
+            "generated_at": season_summary.get("generated_at"),
+            "total_races": len(races),
+            "final": complete and season_over and all(race_status(race) in FINAL_STATUSES for race in races)
+        }
+
+    def record_run(self, changed_races, incomplete_seasons=()) -> None:
+        """
+        Registra le gare cambiate nell'ultima esecuzione, raggruppate per
+        stagione, e le stagioni non elaborate per intero (summary non
+        ricevuto o richieste saltate per scadenza o budget): i loro dati già
+        caricati non vanno eliminati
+        """
+        self.data["last_run"] = {
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "changed_races": {str(year): ids for year, ids in changed_races.items() if ids},
+            "incomplete_seasons": sorted(str(year) for year in incomplete_seasons),
+            "changed_drivers": []
+        }
+
+    def record_changed_drivers(self, driver_ids) -> None:
+        """Registra i piloti modificati dall'ultima esecuzione"""
+        self.data.setdefault("last_run", {})["changed_drivers"] = sorted(driver_ids)
+
+    def save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            json_codec.dump_file(self.path, self.data)
+        except IOError as e:
+            print(f"✗ Errore durante il salvataggio del manifest: {e}")
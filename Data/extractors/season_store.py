@@ -0,0 +1,387 @@
+import argparse
+import os
+import struct
+import sys
+import zlib
+from abc import ABC, abstractmethod
+from array import array
+from pathlib import Path
+
+# Aggiungi la directory Data al path per importare i moduli condivisi
+sys.path.append(str(Path(__file__).parent.parent))
+
+from extractors import json_codec
+from extractors.race_journal import atomic_write_json
+
+try:
+    import zstandard
+except ImportError:  # zstandard è facoltativo: senza si comprime con zlib
+    zstandard = None
+
+# Directory dei dati estratti e formato di default delle stagioni ("json" o "columnar")
+EXTRACTED_DIR = Path("Data/extracted")
+DEFAULT_FORMAT = os.getenv("INDYCAR_STORAGE_FORMAT", "json")
+
+# Intestazione dei file colonnari: magic, lunghezza dell'header JSON
+COLUMNAR_MAGIC = b"ISC1"
+HEADER_STRUCT = struct.Struct("<4sI")
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 9
+
+# Valori speciali delle colonne intere: chiave assente, valore null
+ABSENT = -2 ** 31
+NULL = -2 ** 31 + 1
+
+# Campi delle gare e dei risultati memorizzati in colonne dedicate
+RACE_FIELDS = ("id", "stage_id", "description", "scheduled", "scheduled_end", "status", "type",
+               "single_event", "venue", "unique_stage_id", "stages", "sport_event_context",
+               "competitors", "sport_event_status", "race_result", "statistics")
+RESULT_FIELDS = ("points", "position", "car_number")
+INT_COLUMNS = {"results.race_index", "results.has_result"} | {f"results.{field}" for field in RESULT_FIELDS}
+
+
+def encode_int(result, field, result_extra) -> int:
+    """Valore di una colonna intera; i valori non interi finiscono in result_extra"""
+    if field not in result:
+        return ABSENT
+    value = result[field]
+    if value is None:
+        return NULL
+    if isinstance(value, int) and not isinstance(value, bool) and NULL < value < 2 ** 31:
+        return value
+    result_extra[field] = value
+    return ABSENT
+
+
+def decode_column(column, values):
+    """Valori di una colonna restituiti da load_column: None per chiavi assenti o null"""
+    if column in INT_COLUMNS:
+        return [None if value in (ABSENT, NULL) else value for value in values]
+    return values
+
+
+def flatten_season(season):
+    """
+    Scompone una stagione in colonne: metadati, una colonna per campo delle
+    gare e un record batch colonnare dei risultati dei piloti (una riga per
+    pilota in ogni gara, collegata alla gara da results.race_index)
+    """
+    columns = {f"races.{field}": [] for field in RACE_FIELDS}
+    columns.update({name: [] for name in (
+        "races.details", "races.has_competitors", "races.extra",
+        "results.race_index", "results.driver_id", "results.name", "results.has_result",
+        "results.points", "results.position", "results.car_number",
+        "results.attributes", "results.result_extra"
+    )})
+    for race_index, race in enumerate(season.get("races", [])):
+        for field in RACE_FIELDS:
+            columns[f"races.{field}"].append(race.get(field))
+        extra = {key: value for key, value in race.items() if key not in RACE_FIELDS and key != "complete_details"}
+        columns["races.extra"].append(extra or None)
+
+        details = race.get("complete_details")
+        stage = details.get("stage") if isinstance(details, dict) else None
+        competitors = stage.get("competitors") if isinstance(stage, dict) else None
+        columns["races.has_competitors"].append(competitors is not None)
+        if competitors is not None:
+            details = dict(details, stage={key: value for key, value in stage.items() if key != "competitors"})
+        columns["races.details"].append(details)
+
+        for competitor in competitors or []:
+            result = competitor.get("result")
+            result_extra = {}
+            columns["results.race_index"].append(race_index)
+            columns["results.driver_id"].append(competitor.get("id"))
+            columns["results.name"].append(competitor.get("name"))
+            columns["results.has_result"].append(int(result is not None))
+            for field in RESULT_FIELDS:
+                columns[f"results.{field}"].append(encode_int(result or {}, field, result_extra))
+            result_extra.update({key: value for key, value in (result or {}).items() if key not in RESULT_FIELDS})
+            columns["results.result_extra"].append(result_extra or None)
+            attributes = {key: value for key, value in competitor.items() if key not in ("id", "name", "result")}
+            columns["results.attributes"].append(attributes or None)
+    return columns
+
+
+def build_competitor(columns, row):
+    """Ricostruisce il pilota della riga `row` del record batch dei risultati"""
+    competitor = {}
+    if columns["results.driver_id"][row] is not None:
+        competitor["id"] = columns["results.driver_id"][row]
+    if columns["results.name"][row] is not None:
+        competitor["name"] = columns["results.name"][row]
+    competitor.update(columns["results.attributes"][row] or {})
+    if columns["results.has_result"][row]:
+        result = {}
+        for field in RESULT_FIELDS:
+            value = columns[f"results.{field}"][row]
+            if value != ABSENT:
+                result[field] = None if value == NULL else value
+        result.update(columns["results.result_extra"][row] or {})
+        competitor["result"] = result
+    return competitor
+
+
+def iter_assembled_races(columns):
+    """
+    Ricostruisce le gare di una stagione dalle sue colonne, una alla volta.
+    Le righe dei risultati sono ordinate per gara (vedi flatten_season),
+    quindi ogni gara prende le righe successive con il suo race_index
+    """
+    race_indexes = columns["results.race_index"]
+    row = 0
+    for index in range(len(columns["races.stage_id"])):
+        competitors = []
+        while row < len(race_indexes) and race_indexes[row] == index:
+            competitors.append(build_competitor(columns, row))
+            row += 1
+        race = {field: columns[f"races.{field}"][index] for field in RACE_FIELDS}
+        race.update(columns["races.extra"][index] or {})
+        details = columns["races.details"][index]
+        if columns["races.has_competitors"][index]:
+            details = dict(details, stage=dict(details["stage"], competitors=competitors))
+        race["complete_details"] = details
+        yield race
+
+
+def assemble_season(meta, columns):
+    """Ricostruisce una stagione (formato dei file JSON) dalle sue colonne"""
+    return dict(meta, races=list(iter_assembled_races(columns)))
+
+
+class SeasonStore(ABC):
+    """
+    Interfaccia comune per leggere e scrivere le stagioni estratte.
+
+    `load_season` restituisce sempre il formato dei file season_{anno}.json,
+    `load_column` una singola colonna (vedi flatten_season): le fasi a valle
+    funzionano allo stesso modo qualunque sia il formato su disco. Per
+    elaborare molte stagioni con memoria limitata, `load_meta` e
+    `iter_races` leggono i metadati e le gare senza costruire la stagione.
+    """
+
+    name = ""
+    extension = ""
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory) if directory else EXTRACTED_DIR
+
+    def path(self, year) -> Path:
+        return self.directory / f"season_{year}{self.extension}"
+
+    def years(self):
+        """Anni delle stagioni memorizzate, in ordine crescente"""
+        prefix_length = len("season_")
+        return sorted(path.name[prefix_length:-len(self.extension)]
+                      for path in self.directory.glob(f"season_*{self.extension}"))
+
+    def exists(self, year) -> bool:
+        return self.path(year).exists()
+
+    def size(self, year) -> int:
+        return self.path(year).stat().st_size
+
+    def iter_seasons(self, years=None):
+        """Stagioni indicate (di default tutte) in ordine di anno, una alla volta"""
+        for year in years if years is not None else self.years():
+            yield self.load_season(year)
+
+    @abstractmethod
+    def load_season(self, year):
+        """Stagione completa (metadati e gare)"""
+
+    def load_meta(self, year):
+        """Metadati della stagione (tutti i campi tranne le gare)"""
+        return {key: value for key, value in self.load_season(year).items() if key != "races"}
+
+    def iter_races(self, year):
+        """Gare della stagione, una alla volta"""
+        yield from self.load_season(year).get("races", [])
+
+    @abstractmethod
+    def save_season(self, season_data) -> None:
+        """Salva una stagione, sostituendo il file in modo atomico"""
+
+    def load_column(self, year, column):
+        columns = flatten_season(self.load_season(year))
+        if column not in columns:
+            raise KeyError(f"Colonna {column} non presente")
+        return decode_column(column, columns[column])
+
+
+class JsonSeasonStore(SeasonStore):
+    """Stagioni come file JSON (formato storico)"""
+
+    name = "json"
+    extension = ".json"
+
+    def load_season(self, year):
+        return json_codec.load_file(self.path(year))
+
+    def load_meta(self, year):
+        return json_codec.load_object(self.path(year), skip=("races",))
+
+    def iter_races(self, year):
+        # Decodifica incrementale con ijson: in memoria c'è una gara alla volta
+        return json_codec.iter_items(self.path(year), "races.item")
+
+    def save_season(self, season_data) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        atomic_write_json(self.path(season_data["id"]), season_data)
+
+
+class ColumnarSeasonStore(SeasonStore):
+    """
+    Stagioni in formato colonnare compresso (.isc).
+
+    Il file contiene un header JSON (metadati della stagione, codec e
+    posizione di ogni colonna) seguito da un blocco compresso per colonna:
+    le colonne intere sono array int32, le altre liste JSON compatte. Una
+    colonna si legge decomprimendo solo il suo blocco.
+    """
+
+    name = "columnar"
+    extension = ".isc"
+
+    def __init__(self, directory=None, codec=None):
+        super().__init__(directory)
+        self.codec = codec or ("zstd" if zstandard else "zlib")
+
+    def _compress(self, payload: bytes) -> bytes:
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+        return zlib.compress(payload, ZLIB_LEVEL)
+
+    @staticmethod
+    def _decompress(codec, payload: bytes) -> bytes:
+        if codec == "zstd":
+            if not zstandard:
+                raise RuntimeError("File compresso con zstd: installare zstandard (pip install zstandard)")
+            return zstandard.ZstdDecompressor().decompress(payload)
+        return zlib.decompress(payload)
+
+    def save_season(self, season_data) -> None:
+        meta = {key: value for key, value in season_data.items() if key != "races"}
+        blocks = []
+        index = {}
+        offset = 0
+        for name, values in flatten_season(season_data).items():
+            if name in INT_COLUMNS:
+                payload, encoding = array("i", values).tobytes(), "int32"
+            else:
+                payload, encoding = json_codec.dumps(values), "json"
+            block = self._compress(payload)
+            index[name] = {"offset": offset, "length": len(block), "encoding": encoding}
+            blocks.append(block)
+            offset += len(block)
+        header = json_codec.dumps({
+            "codec": self.codec, "byteorder": sys.byteorder, "meta": meta, "columns": index
+        })
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(season_data["id"])
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(HEADER_STRUCT.pack(COLUMNAR_MAGIC, len(header)))
+                f.write(header)
+                for block in blocks:
+                    f.write(block)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    def _read_header(self, f):
+        magic, header_length = HEADER_STRUCT.unpack(f.read(HEADER_STRUCT.size))
+        if magic != COLUMNAR_MAGIC:
+            raise ValueError(f"{f.name} non è un file colonnare valido")
+        header = json_codec.loads(f.read(header_length))
+        return header, HEADER_STRUCT.size + header_length
+
+    def _read_column(self, f, header, data_start, name):
+        entry = header["columns"][name]
+        f.seek(data_start + entry["offset"])
+        payload = self._decompress(header["codec"], f.read(entry["length"]))
+        if entry["encoding"] == "int32":
+            values = array("i")
+            values.frombytes(payload)
+            if header["byteorder"] != sys.byteorder:
+                values.byteswap()
+            return values.tolist()
+        return json_codec.loads(payload)
+
+    def load_meta(self, year):
+        """Metadati della stagione senza decomprimere alcuna colonna"""
+        with open(self.path(year), "rb") as f:
+            header, _ = self._read_header(f)
+        return header["meta"]
+
+    def load_column(self, year, column):
+        with open(self.path(year), "rb") as f:
+            header, data_start = self._read_header(f)
+            if column not in header["columns"]:
+                raise KeyError(f"Colonna {column} non presente")
+            return decode_column(column, self._read_column(f, header, data_start, column))
+
+    def _read_columns(self, year):
+        with open(self.path(year), "rb") as f:
+            header, data_start = self._read_header(f)
+            columns = {name: self._read_column(f, header, data_start, name) for name in header["columns"]}
+        return header["meta"], columns
+
+    def load_season(self, year):
+        return assemble_season(*self._read_columns(year))
+
+    def iter_races(self, year):
+        # Le colonne compresse di una stagione restano piccole: le gare vengono ricostruite una alla volta
+        _, columns = self._read_columns(year)
+        yield from iter_assembled_races(columns)
+
+
+STORES = {"json": JsonSeasonStore, "columnar": ColumnarSeasonStore}
+
+
+def configure(storage_format) -> None:
+    """Imposta il formato di default delle stagioni per l'esecuzione corrente"""
+    global DEFAULT_FORMAT
+    if storage_format not in STORES:
+        raise ValueError(f"Formato di memorizzazione non valido: {storage_format}")
+    DEFAULT_FORMAT = storage_format
+
+
+def get_season_store(storage_format=None, directory=None) -> SeasonStore:
+    """Store delle stagioni nel formato indicato (di default quello configurato)"""
+    return STORES[storage_format or DEFAULT_FORMAT](directory)
+
+
+def convert(source_format, target_format, directory=None) -> None:
+    """Converte tutte le stagioni da un formato all'altro, mostrando le dimensioni"""
+    source = get_season_store(source_format, directory)
+    target = get_season_store(target_format, directory)
+    years = source.years()
+    if not years:
+        print(f"✗ Nessuna stagione in formato {source_format} in {source.directory}")
+        return
+    total_source = total_target = 0
+    for year in years:
+        target.save_season(source.load_season(year))
+        total_source += source.size(year)
+        total_target += target.size(year)
+        print(f"✓ {year}: {source.size(year)} -> {target.size(year)} byte")
+    print(f"\nTotale: {total_source} -> {total_target} byte ({total_target / total_source:.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Converte le stagioni estratte tra i formati di memorizzazione")
+    parser.add_argument("--from", dest="source", choices=STORES, default="json")
+    parser.add_argument("--to", dest="target", choices=STORES, default="columnar")
+    parser.add_argument("--directory", default=str(EXTRACTED_DIR))
+    args = parser.parse_args()
+    convert(args.source, args.target, args.directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,73 +1,22 @@
-import requests
-import json
+import sys
 from pathlib import Path
 import re
-import time
-import os
-from dotenv import load_dotenv
 
-# Carica le variabili d'ambiente dal file .env nella root
-root_dir = Path(__file__).parent.parent.parent
-load_dotenv(root_dir / "BackEnd/.env")
+# Aggiungi la directory Data al path per importare i moduli condivisi
+sys.path.append(str(Path(__file__).parent.parent))
 
-# Configurazione API
-BASE_URL = os.getenv("SPORTRADAR_BASE_URL", "https://api.sportradar.com/indycar/trial/v2/en")
-API_KEY = os.getenv("SPORTRADAR_API_KEY")
+from extractors.http_client import api_url, client, fetch_data, print_http_stats
+from extractors.settings import DEFAULT_FIRST_SEASON, DEFAULT_LAST_SEASON
+from extractors import json_codec
 
-# Crea la directory per i dati estratti
-Path("Data/extracted").mkdir(parents=True, exist_ok=True)
-
-HEADERS = {
-    "accept": "application/json",
-    "x-api-key": API_KEY
-}
-
-def fetch_data(url: str, retry_count=3, delay=1):
-    """
-    Funzione sincrona per recuperare dati da un URL dato con retry.
-    """
-    print(f"Tentativo di recupero dati da: {url}")
-    
-    for attempt in range(retry_count):
-        try:
-            response = requests.get(url, headers=HEADERS)
-            response.raise_for_status()
-            data = response.json()
-            print(f"✓ Dati recuperati con successo da {url}")
-            return data
-                
-        except requests.exceptions.RequestException as e:
-            status_code = getattr(response, 'status_code', 'N/A') if 'response' in locals() else 'N/A'
-            response_text = getattr(response, 'text', 'N/A') if 'response' in locals() else 'N/A'
-            print(f"✗ Tentativo {attempt + 1}/{retry_count} fallito per {url}. Stato HTTP: {status_code}. Errore: {e}")
-            
-            if status_code == 429:  # Rate limit
-                wait_time = delay * (attempt + 1)
-                print(f"Rate limit raggiunto. Attendo {wait_time} secondi...")
-                time.sleep(wait_time)
-                continue
-                
-            if attempt < retry_count - 1:
-                time.sleep(delay)
-                continue
-                
-            if status_code != 'N/A':
-                print(f"Corpo della risposta: {response_text[:500]}...")
-            return None
-            
-        except Exception as e:
-            print(f"✗ Errore imprevisto durante il recupero da {url}: {e}")
-            if attempt < retry_count - 1:
-                time.sleep(delay)
-                continue
-            return None
+# File della lista delle stagioni estratte
+SEASONS_FILE = Path("Data/extracted/seasons.json")
 
 def fetch_seasons():
     """
     Recupera la lista delle stagioni disponibili
     """
-    url = f"{BASE_URL}/seasons.json"
-    data = fetch_data(url)
+    data = fetch_data(api_url("seasons.json"))
     if not data:
         return []
     
@@ -103,15 +52,21 @@ def save_seasons_list(seasons):
         })
     
     try:
-        with open("Data/extracted/seasons.json", "w", encoding="utf-8") as f:
-            json.dump(seasons_data, f, indent=4, ensure_ascii=False)
-        print("✓ Lista stagioni salvata in Data/extracted/seasons.json")
+        SEASONS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        json_codec.dump_file(SEASONS_FILE, seasons_data)
+        print(f"✓ Lista stagioni salvata in {SEASONS_FILE}")
     except IOError as e:
         print(f"✗ Errore durante il salvataggio di seasons.json: {e}")
 
-def main():
+def main(timeout=None, use_cache=True, first_season=DEFAULT_FIRST_SEASON, last_season=DEFAULT_LAST_SEASON):
+    """
+    Estrae la lista delle stagioni comprese tra `first_season` e `last_season` (inclusi)
+    """
     print("=== Estrattore Stagioni IndyCar ===\n")
     
+    # Configura il timeout di lettura e la cache del client condiviso
+    client.configure(read_timeout=timeout, use_cache=use_cache)
+    
     # Recupera la lista delle stagioni
     print("1. Recupero lista stagioni...")
     seasons = fetch_seasons()
@@ -119,17 +74,18 @@ def main():
         print("Nessuna stagione trovata. Uscita.")
         return
     
-    # Filtra le stagioni per il range 2017-2025
-    filtered_seasons = [s for s in seasons if 2017 <= int(s["year"]) <= 2025]
+    # Filtra le stagioni per il range richiesto
+    filtered_seasons = [s for s in seasons if first_season <= int(s["year"]) <= last_season]
     if not filtered_seasons:
-        print("Nessuna stagione trovata nel range 2017-2025. Uscita.")
+        print(f"Nessuna stagione trovata nel range {first_season}-{last_season}. Uscita.")
         return
     
     # Salva la lista delle stagioni
     save_seasons_list(filtered_seasons)
     
     print("\n=== Estrazione stagioni completata ===")
-    print(f"Trovate {len(filtered_seasons)} stagioni nel range 2017-2025")
+    print(f"Trovate {len(filtered_seasons)} stagioni nel range {first_season}-{last_season}")
+    print_http_stats()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,36 @@
+from pathlib import Path
+
+# File .env condiviso con il backend (chiave dell'API, stringa di connessione MongoDB)
+ENV_FILE = Path(__file__).resolve().parent.parent.parent / "BackEnd" / ".env"
+
+# Richieste di dettaglio gara in volo e tetto di richieste al secondo di default
+DEFAULT_WORKERS = 4
+DEFAULT_RPS = 1.0
+
+# Intervallo di stagioni estratte di default
+DEFAULT_FIRST_SEASON = 2017
+DEFAULT_LAST_SEASON = 2025
+
+# Intervallo di polling (secondi) della modalità live: minimo dopo un
+# cambiamento dei risultati, massimo per una gara invariata
+DEFAULT_MIN_INTERVAL = 5.0
+DEFAULT_MAX_INTERVAL = 300.0
+
+# Formati dei file delle stagioni (le chiavi di season_store.STORES)
+STORAGE_FORMATS = ("json", "columnar")
+
+_environment_loaded = False
+
+
+def load_environment() -> None:
+    """
+    Carica le variabili del file .env alla prima chiamata; quelle già presenti
+    nell'ambiente hanno la precedenza. Nessun modulo lo fa all'importazione:
+    lo chiamano il CLI e i client HTTP e MongoDB prima di leggere la configurazione
+    """
+    global _environment_loaded
+    if _environment_loaded:
+        return
+    from dotenv import load_dotenv
+    load_dotenv(ENV_FILE)
+    _environment_loaded = True
@@ -0,0 +1,162 @@
+import cProfile
+import logging
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from extractors import json_codec
+
+# Directory delle metriche e dei profili delle esecuzioni
+METRICS_DIR = Path("Data/metrics")
+
+# Livelli di log in base al numero di -v indicati (0 = solo avvisi ed errori)
+VERBOSITY_LEVELS = [logging.WARNING, logging.INFO, logging.DEBUG]
+
+# Numero di allocazioni riportate da tracemalloc per una fase
+TRACEMALLOC_TOP = 10
+
+ROOT_LOGGER = "indycar"
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Formatter su una riga: timestamp, livello, logger, messaggio e i campi
+    strutturati passati con extra={"fields": {...}} come chiave=valore
+    """
+
+    def format(self, record) -> str:
+        timestamp = datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds")
+        line = f"{timestamp} {record.levelname:<7} {record.name} {record.getMessage()}"
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def get_logger(name) -> logging.Logger:
+    """Logger di un modulo, figlio del logger radice del progetto"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def configure_logging(verbosity=0, log_file=None) -> None:
+    """
+    Configura il logging del progetto: silenzioso di default (solo avvisi ed
+    errori su stderr), INFO con -v e DEBUG con -vv; `log_file` riceve tutti
+    i messaggi fino a DEBUG
+    """
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.handlers.clear()
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+
+    console = logging.StreamHandler(sys.stderr)
+    console.setLevel(VERBOSITY_LEVELS[min(verbosity, len(VERBOSITY_LEVELS) - 1)])
+    console.setFormatter(StructuredFormatter())
+    logger.addHandler(console)
+
+    if log_file:
+        Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+        file_handler = logging.FileHandler(log_file, encoding="utf-8")
+        file_handler.setFormatter(StructuredFormatter())
+        logger.addHandler(file_handler)
+
+
+def peak_rss_bytes() -> int:
+    """Picco di memoria residente del processo"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux riporta KiB, macOS byte
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RunMetrics:
+    """
+    Metriche di un'esecuzione: tempo reale e CPU di ogni fase, contatori di
+    documenti letti/adattati/scritti e picco di memoria. Con `profile` una
+    fase viene eseguita sotto cProfile (profilo salvato in METRICS_DIR), con
+    `trace_memory` sotto tracemalloc (allocazioni principali nelle metriche).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = datetime.now(timezone.utc)
+        self.stages = {}
+        self.counters = {}
+        self.profile_stages = set()
+        self.trace_memory_stages = set()
+
+    def configure(self, profile=None, trace_memory=None) -> None:
+        self.profile_stages = set(profile or [])
+        self.trace_memory_stages = set(trace_memory or [])
+
+    def count(self, name, amount=1) -> None:
+        """Incrementa un contatore (es. documents_written)"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def stage(self, name):
+        """Misura una fase; le fasi ripetute accumulano i tempi"""
+        profiler = cProfile.Profile() if name in self.profile_stages else None
+        trace_memory = name in self.trace_memory_stages and not tracemalloc.is_tracing()
+        if trace_memory:
+            tracemalloc.start()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+            wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+            with self._lock:
+                stage = self.stages.setdefault(name, {"wall_seconds": 0.0, "cpu_seconds": 0.0, "runs": 0})
+                stage["wall_seconds"] = round(stage["wall_seconds"] + wall, 4)
+                stage["cpu_seconds"] = round(stage["cpu_seconds"] + cpu, 4)
+                stage["runs"] += 1
+            if profiler:
+                METRICS_DIR.mkdir(parents=True, exist_ok=True)
+                profile_file = METRICS_DIR / f"profile_{name}.prof"
+                profiler.dump_stats(profile_file)
+                stage["profile"] = str(profile_file)
+            if trace_memory:
+                snapshot = tracemalloc.take_snapshot()
+                _, traced_peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                stage["traced_peak_bytes"] = traced_peak
+                stage["top_allocations"] = [
+                    {"location": str(statistic.traceback), "bytes": statistic.size, "count": statistic.count}
+                    for statistic in snapshot.statistics("lineno")[:TRACEMALLOC_TOP]
+                ]
+
+    def snapshot(self, http_stats=None) -> dict:
+        with self._lock:
+            return {
+                "started_at": self.started_at.isoformat(timespec="seconds"),
+                "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "stages": dict(self.stages),
+                "documents": dict(self.counters),
+                "http": http_stats or {},
+                "peak_rss_bytes": peak_rss_bytes()
+            }
+
+    def write(self, path=None, http_stats=None) -> Path:
+        """Salva le metriche dell'esecuzione in JSON (compatto: file letto solo dai programmi)"""
+        if path is None:
+            timestamp = self.started_at.strftime("%Y%m%dT%H%M%S")
+            path = METRICS_DIR / f"run_{timestamp}.json"
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        json_codec.dump_file(path, self.snapshot(http_stats))
+        return path
+
+
+# Metriche condivise dell'esecuzione corrente
+metrics = RunMetrics()
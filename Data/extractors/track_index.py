@@ -0,0 +1,192 @@
+from collections import defaultdict
+from pathlib import Path
+
+from extractors import json_codec
+from extractors.race_journal import atomic_write_json
+
+# Collezione MongoDB dell'indice dei circuiti
+TRACK_STATS_COLLECTION = "track_stats"
+
+# Indice costruito durante l'estrazione delle gare
+TRACK_INDEX_FILE = Path("Data/extracted/track_index.json")
+
+# Stati di una gara disputata, con statistiche e ordine di arrivo
+COMPLETED_STATUSES = {"Closed", "Finished"}
+
+# Statistiche della sessione di gara (complete_details.stage.stages, type "race")
+RACE_STAGE_FIELDS = ("laps", "laps_completed", "race_cautions", "caution_laps", "lead_changes", "lead_drivers")
+
+# Cifre decimali dei rapporti calcolati
+PRECISION = 4
+
+
+def race_stage(race) -> dict:
+    """Sessione di gara (senza prove e qualifiche) dai dettagli completi di una gara"""
+    stage = (race.get("complete_details") or {}).get("stage") or {}
+    for sub_stage in stage.get("stages", []):
+        if sub_stage.get("type") == "race":
+            return sub_stage
+    return {}
+
+
+def as_int(value):
+    """Valore intero di una statistica (a volte l'API la restituisce come stringa)"""
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def ratio(numerator, denominator, scale=1):
+    """Rapporto arrotondato, None se il denominatore è nullo"""
+    if not denominator:
+        return None
+    return round(numerator / denominator * scale, PRECISION)
+
+
+def track_entry(year, race):
+    """
+    Voce dell'indice per una gara disputata (formato dei file stagione):
+    circuito, statistiche della sessione di gara e ordine di arrivo dei primi.
+    Restituisce None per le gare non disputate.
+    """
+    if race.get("status") not in COMPLETED_STATUSES:
+        return None
+    venue = race.get("venue") or {}
+    if not venue.get("id"):
+        return None
+    stage = (race.get("complete_details") or {}).get("stage") or {}
+    finishers = sorted(
+        (competitor for competitor in stage.get("competitors", [])
+         if competitor.get("id") and (competitor.get("result") or {}).get("position") is not None),
+        key=lambda competitor: competitor["result"]["position"]
+    )
+    podium = [
+        {
+            "position": competitor["result"]["position"],
+            "driver_id": competitor["id"],
+            "name": competitor.get("name"),
+            "car_number": competitor["result"].get("car_number")
+        }
+        for competitor in finishers[:3]
+    ]
+    entry = {
+        "season_year": str(year),
+        "venue_id": venue["id"],
+        "venue_name": venue.get("name"),
+        "stage_id": race["stage_id"],
+        "description": race.get("description"),
+        "scheduled": race.get("scheduled"),
+        "entrants": len(stage.get("competitors", [])),
+        "finishers": len(finishers),
+        "podium": podium
+    }
+    sub_stage = race_stage(race)
+    entry.update((field, as_int(sub_stage.get(field))) for field in RACE_STAGE_FIELDS)
+    return entry
+
+
+def summarize_entries(entries) -> dict:
+    """
+    Indicatori di un insieme di gare sullo stesso circuito. Ogni rapporto usa
+    solo le gare che hanno i dati necessari:
+    - completion_ratio: giri completati / giri previsti
+    - caution_rate: giri in regime di caution / giri completati
+    - lead_change_density: cambi al comando ogni 100 giri completati
+    """
+    def totals(numerator, denominator):
+        usable = [entry for entry in entries
+                  if entry.get(numerator) is not None and entry.get(denominator) is not None]
+        return sum(entry[numerator] for entry in usable), sum(entry[denominator] for entry in usable)
+
+    with_cautions = [entry["race_cautions"] for entry in entries if entry.get("race_cautions") is not None]
+    return {
+        "races": len(entries),
+        "completion_ratio": ratio(*totals("laps_completed", "laps")),
+        "caution_rate": ratio(*totals("caution_laps", "laps_completed")),
+        "cautions_per_race": ratio(sum(with_cautions), len(with_cautions)),
+        "lead_change_density": ratio(*totals("lead_changes", "laps_completed"), scale=100)
+    }
+
+
+class TrackIndex:
+    """
+    Indice dei circuiti: una voce compatta per ogni gara disputata (stage_id),
+    aggiornata gara per gara durante l'estrazione, da cui si ottengono gli
+    indicatori per circuito e stagione senza rileggere i file delle stagioni.
+    """
+
+    def __init__(self, path=TRACK_INDEX_FILE):
+        self.path = Path(path)
+        self.races = {}
+        if self.path.exists():
+            try:
+                self.races = json_codec.load_file(self.path).get("races", {})
+            except (OSError, ValueError) as e:
+                print(f"✗ Indice dei circuiti non leggibile ({e}), verrà ricreato")
+
+    @classmethod
+    def from_store(cls, store, path=TRACK_INDEX_FILE) -> "TrackIndex":
+        """Ricostruisce l'indice dai file delle stagioni già estratti"""
+        index = cls(path)
+        index.races = {}
+        for year in store.years():
+            season = store.load_season(year)
+            for race in season.get("races", []):
+                index.update_race(year, race)
+        return index
+
+    def update_race(self, year, race) -> None:
+        """Registra (o rimuove, se non è stata disputata) una gara appena assemblata"""
+        entry = track_entry(year, race)
+        if entry:
+            self.races[race["stage_id"]] = entry
+        else:
+            self.races.pop(race["stage_id"], None)
+
+    def retain_season(self, year, stage_ids) -> None:
+        """Elimina le gare della stagione non più presenti nel summary"""
+        year = str(year)
+        stage_ids = set(stage_ids)
+        for stage_id in [stage_id for stage_id, entry in self.races.items()
+                         if entry["season_year"] == year and stage_id not in stage_ids]:
+            del self.races[stage_id]
+
+    def save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_json(self.path, {"races": self.races})
+        except IOError as e:
+            print(f"✗ Errore durante il salvataggio dell'indice dei circuiti: {e}")
+
+    def venue_seasons(self):
+        """
+        Documenti per circuito e stagione: indicatori della stagione, gare con
+        le loro statistiche e vincitori sul circuito fino a quella stagione
+        """
+        by_venue = defaultdict(lambda: defaultdict(list))
+        for entry in self.races.values():
+            by_venue[entry["venue_id"]][entry["season_year"]].append(entry)
+
+        docs = []
+        for venue_id in sorted(by_venue):
+            winners = []
+            for season_year in sorted(by_venue[venue_id]):
+                entries = sorted(by_venue[venue_id][season_year], key=lambda entry: (entry["scheduled"] or "", entry["stage_id"]))
+                winners.extend(
+                    {"season_year": season_year, "stage_id": entry["stage_id"], **entry["podium"][0]}
+                    for entry in entries if entry["podium"]
+                )
+                doc = {
+                    "venue_id": venue_id,
+                    "venue_name": entries[-1]["venue_name"],
+                    "season_year": season_year
+                }
+                doc.update(summarize_entries(entries))
+                doc["results"] = [
+                    {key: value for key, value in entry.items() if key not in ("season_year", "venue_id", "venue_name")}
+                    for entry in entries
+                ]
+                doc["winner_history"] = list(winners)
+                docs.append(doc)
+        return docs
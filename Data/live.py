@@ -0,0 +1,179 @@
+import time
+from datetime import datetime, timezone
+
+from extractors.http_client import api_url, client, fetch_data, print_http_stats
+from extractors.models import Race
+from extractors.run_manifest import RunManifest, FINAL_STATUSES, live_status, parse_time
+from extractors.season_store import get_season_store
+from extractors.settings import DEFAULT_MIN_INTERVAL, DEFAULT_MAX_INTERVAL
+from mongodb_adapter import (
+    connect_to_mongodb, adapt_race_data, sync_collection, update_standings, update_ratings,
+    stored_race_inputs
+)
+from ratings import race_input
+
+# Ogni quanto si cercano nei file delle stagioni le gare entrate nella finestra
+RESCAN_INTERVAL = 15 * 60
+
+# Stati con un ordine di arrivo definitivo (aggiornano i rating)
+COMPLETED_STATUSES = {"Closed", "Finished"}
+
+
+def results_snapshot(race: Race):
+    """Stato e risultati dei piloti di una gara, per riconoscere i cambiamenti"""
+    return race.status, tuple(
+        (result.driver_id, result.position, result.points, result.car_number) for result in race.results()
+    )
+
+
+class LiveRace:
+    """Gara osservata: ultimo stato noto, intervallo e prossimo polling"""
+
+    __slots__ = ("year", "race", "snapshot", "interval", "next_poll")
+
+    def __init__(self, year, race: Race, interval):
+        self.year = year
+        self.race = race
+        self.snapshot = results_snapshot(race)
+        self.interval = interval
+        self.next_poll = time.monotonic()
+
+
+class LiveWatcher:
+    """
+    Modalità live per i weekend di gara: osserva solo le gare Open (vedi
+    live_status) delle stagioni non ancora definitive e ne interroga il
+    summary con richieste condizionali (ETag/Last-Modified della cache delle
+    risposte), così una risposta invariata costa un 304 senza corpo.
+
+    L'intervallo di ogni gara si adatta: minimo dopo un cambiamento dei
+    risultati, raddoppiato a ogni risposta invariata e massimo prima
+    dell'inizio programmato. Quando i risultati cambiano vengono scritti in
+    MongoDB solo il documento della gara e le classifiche dei piloti
+    coinvolti; alla conclusione anche i rating. I file delle stagioni non
+    vengono toccati: li aggiorna la successiva estrazione incrementale.
+    """
+
+    def __init__(self, db, min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL):
+        self.db = db
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.watched = {}
+        # Gare diventate definitive: i file delle stagioni non lo sanno ancora
+        self.finished = set()
+        self.polls = 0
+        self.updates = 0
+
+    def scan(self) -> None:
+        """Aggiunge le gare entrate nella finestra live e toglie quelle uscite"""
+        store = get_season_store()
+        manifest = RunManifest()
+        now = datetime.now(timezone.utc)
+        open_races = set()
+        for year in store.years():
+            if manifest.is_season_final(year):
+                continue
+            for race_data in store.load_season(year).get("races", []):
+                if live_status(race_data, now) != "Open" or race_data["stage_id"] in self.finished:
+                    continue
+                stage_id = race_data["stage_id"]
+                open_races.add(stage_id)
+                if stage_id not in self.watched:
+                    self.watched[stage_id] = LiveRace(year, Race.from_json(race_data), self.min_interval)
+                    print(f"✓ Gara osservata: {race_data['description']} ({race_data.get('scheduled')})")
+        for stage_id in set(self.watched) - open_races:
+            # Uscita dalla finestra senza uno stato definitivo
+            print(f"! Gara non più in finestra live: {self.watched.pop(stage_id).race.description}")
+
+    def next_interval(self, live_race, changed) -> float:
+        if changed:
+            return self.min_interval
+        start = parse_time(live_race.race.scheduled)
+        if start and datetime.now(timezone.utc) < start:
+            return self.max_interval
+        return min(live_race.interval * 2, self.max_interval)
+
+    def poll(self, live_race) -> None:
+        """Interroga il summary di una gara e scrive in MongoDB i risultati cambiati"""
+        race = live_race.race
+        self.polls += 1
+        details = fetch_data(api_url(f"sport_events/{race.stage_id}/summary.json"), revalidate=True)
+        changed = False
+        written = True
+        if details:
+            race.refresh_details(details)
+            snapshot = results_snapshot(race)
+            changed = snapshot != live_race.snapshot
+            if changed:
+                received = time.perf_counter()
+                try:
+                    self.write(live_race)
+                except Exception as e:
+                    # Lo snapshot resta il precedente: la scrittura viene ritentata al prossimo polling
+                    print(f"✗ {race.description}: scrittura in MongoDB fallita ({e})")
+                    written = False
+                else:
+                    live_race.snapshot = snapshot
+                    print(f"✓ {race.description}: risultati aggiornati ({race.status or 'in corso'}), "
+                          f"scritti in {time.perf_counter() - received:.2f}s")
+        live_race.interval = self.next_interval(live_race, changed)
+        live_race.next_poll = time.monotonic() + live_race.interval
+
+        if race.status in FINAL_STATUSES and written:
+            print(f"✓ {race.description}: stato definitivo {race.status}, gara non più osservata")
+            del self.watched[race.stage_id]
+            self.finished.add(race.stage_id)
+
+    def write(self, live_race) -> None:
+        """Scrive il documento della gara, le classifiche e, a gara conclusa, i rating"""
+        race_doc = adapt_race_data(live_race.race.to_json(), live_race.year)
+        sync_collection(self.db, "races", [race_doc], "stage_id")
+        update_standings(self.db, [race_doc])
+        if live_race.race.status in COMPLETED_STATUSES:
+            update_ratings(self.db, [race_input(race_doc)], lambda: stored_race_inputs(self.db))
+        self.updates += 1
+
+    def run(self, duration=None, once=False) -> None:
+        """
+        Ciclo di polling fino a interruzione (Ctrl+C), per `duration` secondi
+        o, con `once`, per un solo giro su tutte le gare osservate
+        """
+        deadline = time.monotonic() + duration if duration else None
+        next_scan = 0.0
+        while True:
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                break
+            if now >= next_scan:
+                self.scan()
+                next_scan = now + RESCAN_INTERVAL
+                if not self.watched:
+                    print("Nessuna gara in finestra live")
+            for live_race in [live_race for live_race in self.watched.values() if live_race.next_poll <= now]:
+                self.poll(live_race)
+            if once:
+                break
+            wake = min([live_race.next_poll for live_race in self.watched.values()] + [next_scan]
+                       + ([deadline] if deadline is not None else []))
+            time.sleep(max(0.0, wake - time.monotonic()))
+
+
+def main(min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL, duration=None, once=False,
+         rps=None, timeout=None):
+    print("=== Modalità live IndyCar ===\n")
+    # La cache è necessaria: conserva ETag e Last-Modified per le richieste condizionali
+    client.configure(rps=rps, read_timeout=timeout, use_cache=True)
+
+    mongo_client = connect_to_mongodb()
+    if not mongo_client:
+        return
+    watcher = LiveWatcher(mongo_client.indycar, min_interval, max_interval)
+    try:
+        watcher.run(duration, once)
+    except KeyboardInterrupt:
+        print("\nModalità live interrotta")
+    finally:
+        mongo_client.close()
+
+    print(f"\nRichieste di polling: {watcher.polls} - gare aggiornate in MongoDB: {watcher.updates}")
+    print_http_stats()
@@ -1,95 +1,266 @@
-import os
 import sys
+import argparse
 from pathlib import Path
 
 # Aggiungi la directory corrente al path per importare i moduli
 current_dir = Path(__file__).parent
 sys.path.append(str(current_dir))
 
-from extractors.seasons_extractor import main as extract_seasons
-from extractors.races_extractor import main as extract_races
-from extractors.drivers_extractor import main as extract_drivers
-from mongodb_adapter import create_mongodb_collections
+# Solo costanti: i moduli delle fasi (e con loro requests, pymongo e dotenv)
+# vengono importati dal comando che li usa, così `python main.py help` è immediato
+from extractors.settings import (
+    DEFAULT_WORKERS, DEFAULT_RPS, DEFAULT_FIRST_SEASON, DEFAULT_LAST_SEASON, STORAGE_FORMATS,
+    DEFAULT_MIN_INTERVAL, DEFAULT_MAX_INTERVAL, load_environment
+)
 
-def run_all_extractors():
+def run_all_extractors(workers=DEFAULT_WORKERS, rps=DEFAULT_RPS, timeout=None, use_cache=True,
+                       incremental=False, resume=False, processes=1,
+                       first_season=DEFAULT_FIRST_SEASON, last_season=DEFAULT_LAST_SEASON,
+                       deadline=None, budget=None):
     """
-    Esegue tutti gli estrattori in sequenza
+    Esegue tutti gli estrattori in sequenza. In modalità incrementale le gare
+    cambiate vengono passate alle fasi successive, che elaborano solo quelle.
     """
+    from extractors.seasons_extractor import main as extract_seasons
+    from extractors.races_extractor import main as extract_races
+    from extractors.drivers_extractor import main as extract_drivers
+    from extractors import season_store
+    from extractors.telemetry import metrics
+    from mongodb_adapter import create_mongodb_collections
+
     print("=== Avvio estrazione completa dati IndyCar ===\n")
-    
+
     # 1. Estrazione stagioni
     print("\n[1/4] Estrazione stagioni...")
-    extract_seasons()
-    
+    with metrics.stage("seasons"):
+        extract_seasons(timeout, use_cache, first_season, last_season)
+
     # Verifica se il file delle stagioni è stato creato
     if not Path("Data/extracted/seasons.json").exists():
         print("✗ Estrazione stagioni fallita. Uscita.")
         return
-    
+
     # 2. Estrazione gare
     print("\n[2/4] Estrazione gare...")
-    extract_races()
-    
+    with metrics.stage("races"):
+        changed_races = extract_races(workers, rps, timeout, use_cache, incremental, resume,
+                                      deadline=deadline, budget=budget)
+
     # Verifica se sono stati creati i file delle gare
-    season_files = list(Path("Data/extracted").glob("season_*.json"))
-    if not season_files:
+    if not season_store.get_season_store().years():
         print("✗ Estrazione gare fallita. Uscita.")
         return
-    
+
     # 3. Estrazione piloti
     print("\n[3/4] Estrazione piloti...")
-    extract_drivers()
-    
+    with metrics.stage("drivers"):
+        extract_drivers(incremental, changed_races if incremental else None, processes)
+
     # 4. Caricamento in MongoDB
     print("\n[4/4] Caricamento dati in MongoDB...")
-    create_mongodb_collections()
-    
+    with metrics.stage("mongodb"):
+        create_mongodb_collections(incremental)
+
     print("\n=== Estrazione e caricamento completati ===")
 
-def print_usage():
+def run_seasons(args):
+    from extractors.seasons_extractor import main as extract_seasons
+    from extractors.telemetry import metrics
+    with metrics.stage("seasons"):
+        extract_seasons(args.timeout, args.use_cache, args.first_season, args.last_season)
+
+def run_races(args):
+    from extractors.races_extractor import main as extract_races
+    from extractors.telemetry import metrics
+    with metrics.stage("races"):
+        extract_races(args.workers, args.rps, args.timeout, args.use_cache, args.incremental, args.resume,
+                      deadline=args.deadline, budget=args.budget)
+
+def run_drivers(args):
+    from extractors.drivers_extractor import main as extract_drivers
+    from extractors.telemetry import metrics
+    with metrics.stage("drivers"):
+        extract_drivers(args.incremental, processes=args.processes)
+
+def run_mongodb(args):
+    from mongodb_adapter import create_mongodb_collections, rollback_mongodb_collections
+    from extractors.telemetry import metrics
+    if args.rollback:
+        rollback_mongodb_collections()
+        return
+    with metrics.stage("mongodb"):
+        create_mongodb_collections(args.incremental, blue_green=args.blue_green)
+
+def run_streaming_pipeline(args):
+    from pipeline import run_pipeline
+    from extractors.telemetry import metrics
+    with metrics.stage("pipeline"):
+        run_pipeline(args.workers, args.rps, args.timeout, args.use_cache, args.incremental,
+                     args.resume, args.write_files, first_season=args.first_season,
+                     last_season=args.last_season, deadline=args.deadline, budget=args.budget)
+
+def run_live(args):
+    from live import main as watch_live
+    from extractors.telemetry import metrics
+    with metrics.stage("live"):
+        watch_live(args.min_interval, args.max_interval, args.duration, args.once, args.rps, args.timeout)
+
+def run_all(args):
+    run_all_extractors(args.workers, args.rps, args.timeout, args.use_cache, args.incremental,
+                       args.resume, args.processes, args.first_season, args.last_season,
+                       args.deadline, args.budget)
+
+EXAMPLES = """
+Esempi:
+    python main.py all
+    python main.py seasons --from 2020 --to 2025
+    python main.py races --workers 8 --rps 5
+    python main.py pipeline --incremental
+    python main.py mongodb --blue-green
+    python main.py live --min-interval 3
+"""
+
+def build_parser():
     """
-    Stampa le istruzioni di utilizzo
+    Costruisce il parser con un sottocomando per fase; ogni sottocomando
+    accetta solo le opzioni che usa
     """
-    print("""
-Utilizzo:
-    python main.py [opzione]
-
-Opzioni:
-    all     - Esegue tutti gli estrattori in sequenza e carica i dati in MongoDB
-    seasons - Esegue solo l'estrattore delle stagioni
-    races   - Esegue solo l'estrattore delle gare
-    drivers - Esegue solo l'estrattore dei piloti
-    mongodb - Carica i dati estratti in MongoDB
-    help    - Mostra questo messaggio
-
-Esempio:
-    python main.py all
-    """)
-
-def main():
-    # Crea la directory data se non esiste
-    Path("Data/extracted").mkdir(parents=True, exist_ok=True)
-    
-    # Gestione degli argomenti da linea di comando
-    if len(sys.argv) != 2 or sys.argv[1] == "help":
-        print_usage()
+    # Opzioni comuni a tutti i comandi: formato delle stagioni, log e metriche
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--storage", choices=STORAGE_FORMATS,
+                        help="Formato dei file delle stagioni (default: INDYCAR_STORAGE_FORMAT o json)")
+    common.add_argument("-v", "--verbose", action="count", default=0,
+                        help="Log INFO (-v) o DEBUG (-vv) su stderr (default: solo avvisi ed errori)")
+    common.add_argument("--log-file", help="Scrive tutti i log (fino a DEBUG) nel file indicato")
+    common.add_argument("--metrics-file",
+                        help="File delle metriche dell'esecuzione (default: Data/metrics/run_<data>.json)")
+    common.add_argument("--profile", action="append", default=[], metavar="FASE",
+                        help="Esegue la fase sotto cProfile (seasons, races, drivers, mongodb, pipeline)")
+    common.add_argument("--trace-memory", action="append", default=[], metavar="FASE",
+                        help="Registra le allocazioni principali della fase con tracemalloc")
+
+    # Richieste all'API
+    fetch = argparse.ArgumentParser(add_help=False)
+    fetch.add_argument("--timeout", type=float, help="Timeout di lettura delle richieste HTTP in secondi")
+    fetch.add_argument("--no-cache", dest="use_cache", action="store_false",
+                       help="Ignora la cache su disco delle risposte dell'API")
+
+    # Intervallo di stagioni
+    season_range = argparse.ArgumentParser(add_help=False)
+    season_range.add_argument("--from", dest="first_season", type=int, default=DEFAULT_FIRST_SEASON,
+                              metavar="ANNO", help="Prima stagione da estrarre (default: %(default)s)")
+    season_range.add_argument("--to", dest="last_season", type=int, default=DEFAULT_LAST_SEASON,
+                              metavar="ANNO", help="Ultima stagione da estrarre (default: %(default)s)")
+
+    # Download concorrente delle gare
+    concurrency = argparse.ArgumentParser(add_help=False)
+    concurrency.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                             help="Richieste di dettaglio gara in volo (default: %(default)s)")
+    concurrency.add_argument("--rps", type=float, default=DEFAULT_RPS,
+                             help="Tetto del budget globale di richieste al secondo (default: %(default)s)")
+
+    # Limiti di un'estrazione a tempo o a quota: le richieste più importanti partono per prime
+    limits = argparse.ArgumentParser(add_help=False)
+    limits.add_argument("--deadline", type=float, metavar="S",
+                        help="Non avvia nuove richieste dopo S secondi dall'inizio dell'estrazione gare")
+    limits.add_argument("--budget", type=int, metavar="N",
+                        help="Avvia al massimo N richieste di summary (stagioni e gare)")
+
+    incremental = argparse.ArgumentParser(add_help=False)
+    incremental.add_argument("--incremental", action="store_true",
+                             help="Elabora solo stagioni e gare nuove o non ancora definitive")
+
+    resume = argparse.ArgumentParser(add_help=False)
+    resume.add_argument("--resume", action="store_true",
+                        help="Riprende un'estrazione interrotta senza riscaricare le gare nel journal")
+
+    processes = argparse.ArgumentParser(add_help=False)
+    processes.add_argument("--processes", type=int, default=1,
+                           help="Elabora le stagioni dei piloti su N processi (default: %(default)s)")
+
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Estrazione dei dati IndyCar da SportRadar e caricamento in MongoDB",
+        epilog=EXAMPLES,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", metavar="comando")
+
+    commands.add_parser(
+        "all", parents=[common, fetch, season_range, concurrency, limits, incremental, resume, processes],
+        help="Esegue tutti gli estrattori in sequenza e carica i dati in MongoDB"
+    ).set_defaults(handler=run_all)
+    commands.add_parser(
+        "seasons", parents=[common, fetch, season_range],
+        help="Esegue solo l'estrattore delle stagioni"
+    ).set_defaults(handler=run_seasons)
+    commands.add_parser(
+        "races", parents=[common, fetch, concurrency, limits, incremental, resume],
+        help="Esegue solo l'estrattore delle gare"
+    ).set_defaults(handler=run_races)
+    commands.add_parser(
+        "drivers", parents=[common, incremental, processes],
+        help="Esegue solo l'estrattore dei piloti"
+    ).set_defaults(handler=run_drivers)
+
+    mongodb = commands.add_parser("mongodb", parents=[common, incremental],
+                                  help="Carica i dati estratti in MongoDB")
+    mode = mongodb.add_mutually_exclusive_group()
+    mode.add_argument("--blue-green", action="store_true",
+                      help="Ricarica tutto in collezioni di appoggio e le sostituisce a fine caricamento")
+    mode.add_argument("--rollback", action="store_true",
+                      help="Ripristina le collezioni precedenti all'ultimo caricamento blue/green")
+    mongodb.set_defaults(handler=run_mongodb)
+
+    pipeline = commands.add_parser(
+        "pipeline", parents=[common, fetch, season_range, concurrency, limits, incremental, resume],
+        help="Estrae e carica in streaming: piloti e MongoDB si sovrappongono al download"
+    )
+    pipeline.add_argument("--no-files", dest="write_files", action="store_false",
+                          help="Non scrive i file delle stagioni e dei piloti")
+    pipeline.set_defaults(handler=run_streaming_pipeline)
+
+    live = commands.add_parser("live", parents=[common],
+                               help="Osserva le gare in corso e aggiorna MongoDB appena cambiano i risultati")
+    live.add_argument("--min-interval", type=float, default=DEFAULT_MIN_INTERVAL, metavar="S",
+                      help="Intervallo di polling dopo un cambiamento dei risultati (default: %(default)s)")
+    live.add_argument("--max-interval", type=float, default=DEFAULT_MAX_INTERVAL, metavar="S",
+                      help="Intervallo massimo di polling di una gara invariata (default: %(default)s)")
+    live.add_argument("--duration", type=float, metavar="S",
+                      help="Termina dopo S secondi (default: fino a Ctrl+C)")
+    live.add_argument("--once", action="store_true", help="Un solo giro di polling sulle gare osservate")
+    live.add_argument("--rps", type=float, default=DEFAULT_RPS,
+                      help="Tetto del budget globale di richieste al secondo (default: %(default)s)")
+    live.add_argument("--timeout", type=float, help="Timeout di lettura delle richieste HTTP in secondi")
+    live.set_defaults(handler=run_live)
+
+    commands.add_parser("help", help="Mostra questo messaggio")
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command in (None, "help"):
+        parser.print_help()
         return
-    
-    option = sys.argv[1].lower()
-    
-    if option == "all":
-        run_all_extractors()
-    elif option == "seasons":
-        extract_seasons()
-    elif option == "races":
-        extract_races()
-    elif option == "drivers":
-        extract_drivers()
-    elif option == "mongodb":
-        create_mongodb_collections()
-    else:
-        print(f"✗ Opzione non valida: {option}")
-        print_usage()
+
+    # Configurazione letta dal file .env prima di importare i moduli delle fasi
+    load_environment()
+    from extractors import season_store
+    from extractors.telemetry import configure_logging, metrics
+
+    configure_logging(args.verbose, args.log_file)
+    metrics.configure(args.profile, args.trace_memory)
+    if args.storage:
+        season_store.configure(args.storage)
+
+    args.handler(args)
+
+    # Metriche dell'esecuzione: tempi per fase, HTTP (se usato), documenti e picco di memoria
+    http_client = sys.modules.get("extractors.http_client")
+    http_stats = http_client.client.stats.snapshot() if http_client else None
+    metrics_file = metrics.write(args.metrics_file, http_stats)
+    print(f"\n✓ Metriche dell'esecuzione salvate in {metrics_file}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -1,15 +1,27 @@
 import json
+import hashlib
 from pathlib import Path
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from datetime import datetime
 from bson import ObjectId
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from pymongo.errors import ConnectionFailure, BulkWriteError
 import os
-from dotenv import load_dotenv
 
-# Carica le variabili d'ambiente dal file .env nella root
-root_dir = Path(__file__).parent.parent
-load_dotenv(root_dir / "BackEnd/.env")
+from extractors.run_manifest import RunManifest
+from extractors import json_codec
+from extractors.season_store import get_season_store
+from extractors.models import Driver, Race, Season, Venue
+from extractors.settings import load_environment
+from extractors.telemetry import metrics
+from extractors.track_index import TRACK_STATS_COLLECTION, TRACK_INDEX_FILE, TrackIndex
+from standings import (
+    SEASON_STATS_COLLECTION, CAREERS_COLLECTION, build_all_season_stats, build_careers,
+    merge_season_stats
+)
+from ratings import RATINGS_COLLECTION, PREDICTIONS_COLLECTION, RatingEngine, race_input
 
 
 def connect_to_mongodb(connection_string=None):
@@ -17,6 +29,7 @@ def connect_to_mongodb(connection_string=None):
     Stabilisce la connessione con MongoDB
     """
     if connection_string is None:
+        load_environment()
         connection_string = os.getenv("MONGODB_CONNECTION_STRING")
     
     try:
@@ -29,133 +42,590 @@ def connect_to_mongodb(connection_string=None):
         print(f"✗ Errore di connessione a MongoDB: {e}")
         return None
 
+# Indici di ogni collezione: (chiavi, opzioni)
+INDEX_SPECS = {
+    "seasons": [
+        ("year", {"unique": True}),
+        ("season_id", {"unique": True})
+    ],
+    "races": [
+        ([("season_year", 1), ("race_id", 1)], {"unique": True}),
+        ("stage_id", {"unique": True}),
+        ("drivers.driver_id", {}),
+        ("venue_id", {})
+    ],
+    "venues": [
+        ("venue_id", {"unique": True}),
+        ("name", {})
+    ],
+    "drivers": [
+        ("driver_id", {"unique": True}),
+        ("name", {}),
+        ("nationality", {})
+    ],
+    SEASON_STATS_COLLECTION: [
+        ([("driver_id", 1), ("season_year", 1)], {"unique": True}),
+        ([("season_year", 1), ("points", -1)], {}),
+        ("results.stage_id", {})
+    ],
+    CAREERS_COLLECTION: [
+        ("driver_id", {"unique": True}),
+        ([("points", -1)], {})
+    ],
+    RATINGS_COLLECTION: [
+        ("driver_id", {"unique": True}),
+        ([("rating", -1)], {})
+    ],
+    PREDICTIONS_COLLECTION: [
+        ("stage_id", {"unique": True}),
+        ("scheduled", {})
+    ],
+    TRACK_STATS_COLLECTION: [
+        ([("venue_id", 1), ("season_year", 1)], {"unique": True}),
+        ("season_year", {})
+    ]
+}
+
+# Suffissi delle collezioni di appoggio usate dal caricamento blue/green
+STAGING_SUFFIX = "__staging"
+PREVIOUS_SUFFIX = "__previous"
+
+# Dimensione dei batch di scrittura: in memoria resta un batch alla volta
+WRITE_BATCH_SIZE = 500
+
+def iter_batches(documents, size=WRITE_BATCH_SIZE):
+    """
+    Suddivide un iterabile di documenti in liste di al più `size` elementi
+    """
+    documents = iter(documents)
+    while batch := list(islice(documents, size)):
+        yield batch
+
+def create_collection_indexes(collection, collection_name):
+    """
+    Crea gli indici di una collezione secondo INDEX_SPECS
+    """
+    for keys, options in INDEX_SPECS[collection_name]:
+        collection.create_index(keys, **options)
+
 def create_indexes(db):
     """
     Crea gli indici necessari per le collezioni
     """
     try:
-        # Indici per la collezione seasons
-        db.seasons.create_index("year", unique=True)
-        db.seasons.create_index("season_id", unique=True)
-        
-        # Indici per la collezione races
-        db.races.create_index([("season_year", 1), ("race_id", 1)], unique=True)
-        db.races.create_index("stage_id", unique=True)
-        
-        # Indici per la collezione drivers
-        db.drivers.create_index("driver_id", unique=True)
-        db.drivers.create_index("name")
-        db.drivers.create_index("nationality")
+        for collection_name in INDEX_SPECS:
+            create_collection_indexes(db[collection_name], collection_name)
         
         print("✓ Indici creati con successo")
     except Exception as e:
         print(f"✗ Errore nella creazione degli indici: {e}")
 
-def load_json_file(filepath):
+def iter_json_file(filepath):
     """
-    Carica un file JSON
+    Elementi di un file JSON che contiene un array, letti uno alla volta
     """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        yield from json_codec.iter_items(filepath)
+        metrics.count("documents_parsed")
     except Exception as e:
         print(f"✗ Errore nel caricamento di {filepath}: {e}")
+
+def load_season_meta(store, year):
+    """
+    Carica i metadati di una stagione (senza le gare) dallo store dei dati estratti
+    """
+    try:
+        data = store.load_meta(year)
+        metrics.count("documents_parsed")
+        return data
+    except Exception as e:
+        print(f"✗ Errore nel caricamento di {store.path(year)}: {e}")
         return None
 
+def iter_season_races(store, year):
+    """
+    Gare di una stagione lette una alla volta dallo store dei dati estratti
+    """
+    try:
+        yield from store.iter_races(year)
+    except Exception as e:
+        print(f"✗ Errore nel caricamento delle gare di {store.path(year)}: {e}")
+
+# Campi esclusi dall'hash del contenuto di un documento
+UNHASHED_FIELDS = {"_id", "content_hash", "created_at", "updated_at"}
+
+def stable_id(namespace, key):
+    """
+    Deriva un ObjectId deterministico dalla chiave naturale di un documento
+    (stage_id, driver_id o season_id), così ogni caricamento riusa lo stesso _id
+    """
+    digest = hashlib.sha1(f"{namespace}:{key}".encode("utf-8")).digest()
+    return ObjectId(digest[:12])
+
+def document_hash(doc):
+    """
+    Calcola l'hash del contenuto di un documento adattato, esclusi _id e timestamp
+    """
+    content = {key: value for key, value in doc.items() if key not in UNHASHED_FIELDS}
+    # Sempre con il modulo json standard: l'hash non deve dipendere dal backend del codec
+    payload = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
 def adapt_season_data(season_data):
     """
     Adatta i dati della stagione al formato MongoDB
     """
-    return {
-        "_id": ObjectId(),  # Genera un nuovo ObjectId
-        "year": season_data["id"],
-        "season_id": season_data["season_id"],
-        "description": season_data["description"],
-        "total_races": season_data["total_races"],
-        "generated_at": season_data.get("generated_at"),
-        "season_info": season_data.get("season_info", {}),
-        "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow()
-    }
-
-def adapt_race_data(race_data, season_year):
-    """
-    Adatta i dati della gara al formato MongoDB
-    """
-    # Estrai i riferimenti ai piloti dal percorso corretto
-    driver_refs = []
-    competitors = []
-    # Cerca i piloti in complete_details.stage.competitors
-    complete_details = race_data.get("complete_details", {})
-    if complete_details:
-        stage = complete_details.get("stage", {})
-        if stage:
-            competitors = stage.get("competitors", [])
-    for competitor in competitors:
-        if competitor.get("id"):
-            driver_refs.append({
-                "driver_id": competitor["id"],
-                "name": competitor.get("name"),
-                "position": competitor.get("result", {}).get("position"),
-                "points": competitor.get("result", {}).get("points"),
-                "car_number": competitor.get("result", {}).get("car_number")
-            })
-    return {
-        "_id": ObjectId(),  # Genera un nuovo ObjectId
-        "race_id": race_data["id"],
-        "stage_id": race_data["stage_id"],
-        "season_year": season_year,
-        "description": race_data["description"],
-        "scheduled": race_data.get("scheduled"),
-        "scheduled_end": race_data.get("scheduled_end"),
-        "status": race_data.get("status"),
-        "type": race_data.get("type"),
-        "venue": race_data.get("venue", {}),
-        "drivers": driver_refs,
-        "race_result": race_data.get("race_result", {}),
-        "statistics": race_data.get("statistics", {}),
-        "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow()
-    }
-
-def adapt_driver_data(driver_data):
+    metrics.count("documents_adapted")
+    season = Season.from_json(season_data)
+    return {"_id": stable_id("season", season.season_id), **season.to_bson()}
+
+def adapt_race_data(race_data, season_year, venues=None):
+    """
+    Adatta i dati della gara al formato MongoDB; i riferimenti ai piloti
+    vengono dai risultati in complete_details.stage.competitors. Il circuito
+    resta nel documento solo come venue_id: se `venues` (id -> Venue) è
+    indicato, vi viene registrato per la collezione venues, con i dati
+    dell'ultima gara letta che prevalgono su quelli delle precedenti
+    """
+    metrics.count("documents_adapted")
+    race = Race.from_json(race_data)
+    if venues is not None and race.venue.id:
+        venue = venues.setdefault(race.venue.id, race.venue)
+        if venue is not race.venue:
+            venue.update(race.venue)
+    return {"_id": stable_id("race", race.stage_id), **race.to_bson(season_year)}
+
+def adapt_venue_data(venue: Venue):
+    """
+    Adatta i dati del circuito al formato MongoDB
+    """
+    metrics.count("documents_adapted")
+    return {"_id": stable_id("venue", venue.id), **venue.to_bson()}
+
+def adapt_driver_data(driver: Driver):
     """
     Adatta i dati del pilota al formato MongoDB
     """
-    return {
-        "_id": ObjectId(),  # Genera un nuovo ObjectId
-        "driver_id": driver_data["id"],
-        "name": driver_data["name"],
-        "gender": driver_data.get("gender"),
-        "nationality": driver_data.get("nationality"),
-        "country_code": driver_data.get("country_code"),
-        "car_number": driver_data.get("car_number"),
-        "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow()
-    }
+    metrics.count("documents_adapted")
+    return {"_id": stable_id("driver", driver.id), **driver.to_bson()}
+
+def adapt_standings_data(season_stats, careers):
+    """
+    Assegna gli _id stabili alle statistiche stagionali e alle carriere dei piloti
+    """
+    for stats in season_stats:
+        stats["_id"] = stable_id("driver_season", f"{stats['driver_id']}:{stats['season_year']}")
+    for career in careers:
+        career["_id"] = stable_id("driver_career", career["driver_id"])
+    return season_stats, careers
+
+def load_track_index(store):
+    """
+    Indice dei circuiti scritto dall'estrazione delle gare; se manca (file
+    delle stagioni estratti prima dell'indice) viene ricostruito una volta dai file
+    """
+    if TRACK_INDEX_FILE.exists():
+        return TrackIndex()
+    print("! Indice dei circuiti assente, ricostruzione dai file delle stagioni")
+    index = TrackIndex.from_store(store)
+    index.save()
+    return index
+
+def adapt_track_data(index: TrackIndex):
+    """
+    Adatta gli indicatori per circuito e stagione al formato MongoDB
+    """
+    return [
+        {"_id": stable_id("venue_season", f"{doc['venue_id']}:{doc['season_year']}"), **doc}
+        for doc in index.venue_seasons()
+    ]
+
+def adapt_ratings_data(engine: RatingEngine):
+    """
+    Documenti dei rating dei piloti e delle previsioni delle gare da disputare
+    """
+    ratings = [{"_id": stable_id("driver_rating", doc["driver_id"]), **doc} for doc in engine.rating_docs()]
+    predictions = [{"_id": stable_id("race_prediction", doc["stage_id"]), **doc} for doc in engine.prediction_docs()]
+    return ratings, predictions
+
+def unique_keys(collection_name, key_field):
+    """
+    Campi delle chiavi univoche di una collezione: quelli degli indici unici
+    di INDEX_SPECS più la chiave naturale indicata
+    """
+    keys = [(key_field,)] if key_field != "_id" else []
+    for spec, options in INDEX_SPECS.get(collection_name, []):
+        if options.get("unique"):
+            fields = (spec,) if isinstance(spec, str) else tuple(name for name, _ in spec)
+            if fields not in keys:
+                keys.append(fields)
+    return keys
+
+def release_unique_keys(collection, collection_name, key_field, batch):
+    """
+    Prima delle scritture di un batch libera le chiavi univoche occupate da
+    documenti con un _id diverso: quelli non presenti nel batch vengono
+    eliminati (es. caricati prima che gli _id fossero deterministici), quelli
+    del batch che verranno riscritti con un'altra chiave (es. race_id, che è
+    la posizione della gara nella stagione) ricevono temporaneamente il
+    proprio _id come chiave. Altrimenti gli upsert violerebbero gli indici unici.
+    Restituisce il numero di documenti eliminati.
+    """
+    batch_ids = {doc["_id"] for doc in batch}
+    deleted = 0
+    for fields in unique_keys(collection_name, key_field):
+        owners = {
+            tuple(doc[name] for name in fields): doc["_id"]
+            for doc in batch if all(name in doc for name in fields)
+        }
+        if not owners:
+            continue
+        query = {"$or": [dict(zip(fields, values)) for values in owners]}
+        stale, moved = [], []
+        for doc in collection.find(query, {name: 1 for name in fields}):
+            if owners.get(tuple(doc.get(name) for name in fields)) == doc["_id"]:
+                continue
+            (moved if doc["_id"] in batch_ids else stale).append(doc["_id"])
+        if stale:
+            deleted += collection.delete_many({"_id": {"$in": stale}}).deleted_count
+        for doc_id in moved:
+            # Senza content_hash il documento viene sempre riscritto con la chiave corretta
+            collection.update_one({"_id": doc_id}, {"$set": {fields[-1]: doc_id}, "$unset": {"content_hash": ""}})
+    return deleted
 
-def save_to_mongodb(db, collection_name, data):
+def sync_collection(db, collection_name, data, key_field, prune=False):
     """
-    Salva i dati in MongoDB usando operazioni bulk
+    Sincronizza i documenti indicati con una collezione in modo idempotente.
+
+    `data` può essere qualsiasi iterabile, anche un generatore: i documenti
+    vengono elaborati a batch di WRITE_BATCH_SIZE, quindi in memoria restano
+    solo il batch corrente e gli _id già visti. Per ogni batch un bulk_write
+    non ordinato scrive solo i documenti nuovi o il cui hash del contenuto è
+    cambiato: created_at viene impostato solo all'inserimento, updated_at
+    solo quando il contenuto cambia. Con `prune` i documenti non più presenti
+    nei dati vengono eliminati a fine caricamento (caricamento completo).
+    Restituisce il numero di documenti sincronizzati; un errore di scrittura
+    viene segnalato e rilanciato, così il caricamento non risulta riuscito.
     """
+    collection = db[collection_name]
+    ids = []
+    inserted = updated = unchanged = deleted = 0
     try:
-        collection = db[collection_name]
-        # Rimuovi tutti i documenti esistenti
-        collection.delete_many({})
-        # Inserisci i nuovi documenti
-        if data:
-            result = collection.insert_many(data)
-            print(f"✓ Inseriti {len(result.inserted_ids)} documenti in {collection_name}")
-        else:
-            print(f"! Nessun dato da inserire in {collection_name}")
+        for batch in iter_batches(data):
+            batch_ids = [doc["_id"] for doc in batch]
+            ids.extend(batch_ids)
+            deleted += release_unique_keys(collection, collection_name, key_field, batch)
+
+            existing = {
+                doc["_id"]: doc.get("content_hash")
+                for doc in collection.find({"_id": {"$in": batch_ids}}, {"content_hash": 1})
+            }
+            now = datetime.utcnow()
+            operations = []
+            for doc in batch:
+                content_hash = document_hash(doc)
+                if existing.get(doc["_id"]) == content_hash:
+                    continue
+                fields = {key: value for key, value in doc.items() if key != "_id"}
+                fields.update(content_hash=content_hash, updated_at=now)
+                operations.append(UpdateOne(
+                    {"_id": doc["_id"]},
+                    {"$set": fields, "$setOnInsert": {"created_at": now}},
+                    upsert=True
+                ))
+
+            if operations:
+                result = collection.bulk_write(operations, ordered=False)
+                inserted += result.upserted_count
+                updated += result.modified_count
+                metrics.count("documents_written", result.upserted_count + result.modified_count)
+            unchanged += len(batch) - len(operations)
+            metrics.count("documents_unchanged", len(batch) - len(operations))
+
+        if prune:
+            deleted += collection.delete_many({"_id": {"$nin": ids}}).deleted_count
+        metrics.count("documents_deleted", deleted)
+
+        if not ids:
+            print(f"! Nessun dato da sincronizzare in {collection_name}")
+            return 0
+        print(f"✓ {collection_name}: {inserted} inseriti, {updated} aggiornati, "
+              f"{unchanged} invariati, {deleted} eliminati")
     except BulkWriteError as e:
-        print(f"✗ Errore durante l'inserimento in {collection_name}: {e}")
+        print(f"✗ Errore durante la sincronizzazione di {collection_name}: {e}")
+        raise
+    except Exception as e:
+        print(f"✗ Errore imprevisto durante la sincronizzazione di {collection_name}: {e}")
+        raise
+    return len(ids)
+
+def prune_collection(db, collection_name, keep_ids, scope=None):
+    """
+    Elimina da una collezione i documenti il cui _id non è tra quelli indicati,
+    limitandosi a quelli che soddisfano il filtro `scope` se indicato
+    """
+    try:
+        result = db[collection_name].delete_many({"_id": {"$nin": list(keep_ids)}, **(scope or {})})
+        if result.deleted_count:
+            print(f"✓ {collection_name}: {result.deleted_count} documenti obsoleti eliminati")
     except Exception as e:
-        print(f"✗ Errore imprevisto durante l'inserimento in {collection_name}: {e}")
+        print(f"✗ Errore durante la pulizia di {collection_name}: {e}")
 
-def create_mongodb_collections():
+def load_staging_collection(db, collection_name, data):
     """
-    Crea le collezioni MongoDB dai dati estratti
+    Carica i documenti (qualsiasi iterabile) in una collezione di appoggio senza
+    indici, a batch di WRITE_BATCH_SIZE, poi costruisce gli indici in un solo
+    passaggio. created_at e updated_at dei documenti già presenti nella
+    collezione attiva vengono conservati. Restituisce i documenti caricati.
+    """
+    staging = db[collection_name + STAGING_SUFFIX]
+    staging.drop()
+
+    total = 0
+    for batch in iter_batches(data):
+        existing = {
+            doc["_id"]: doc
+            for doc in db[collection_name].find(
+                {"_id": {"$in": [doc["_id"] for doc in batch]}},
+                {"content_hash": 1, "created_at": 1, "updated_at": 1}
+            )
+        }
+        now = datetime.utcnow()
+        documents = []
+        for doc in batch:
+            content_hash = document_hash(doc)
+            previous = existing.get(doc["_id"], {})
+            unchanged = previous.get("content_hash") == content_hash
+            documents.append(dict(
+                doc,
+                content_hash=content_hash,
+                created_at=previous.get("created_at", now),
+                updated_at=previous.get("updated_at", now) if unchanged else now
+            ))
+        staging.insert_many(documents, ordered=False)
+        total += len(documents)
+    metrics.count("documents_written", total)
+
+    create_collection_indexes(staging, collection_name)
+    print(f"✓ {collection_name}: {total} documenti caricati nella collezione di appoggio")
+    return total
+
+def swap_collections(db, collection_names):
+    """
+    Sostituisce le collezioni attive con quelle di appoggio. La versione attiva
+    viene prima copiata lato server in `<nome>__previous`, poi ogni collezione
+    di appoggio prende il suo posto con una renameCollection atomica, così i
+    lettori non vedono mai una collezione vuota o caricata a metà.
+    """
+    existing = set(db.list_collection_names())
+    for collection_name in collection_names:
+        if collection_name in existing:
+            db[collection_name].aggregate([{"$match": {}}, {"$out": collection_name + PREVIOUS_SUFFIX}])
+    for collection_name in collection_names:
+        db[collection_name + STAGING_SUFFIX].rename(collection_name, dropTarget=True)
+        print(f"✓ {collection_name}: collezione sostituita")
+
+def rollback_mongodb_collections(db=None):
+    """
+    Ripristina le collezioni salvate prima dell'ultimo caricamento blue/green
+    """
+    client = None
+    if db is None:
+        client = connect_to_mongodb()
+        if not client:
+            return
+        db = client.indycar
+
+    existing = set(db.list_collection_names())
+    for collection_name in INDEX_SPECS:
+        previous = collection_name + PREVIOUS_SUFFIX
+        if previous not in existing:
+            print(f"! Nessuna versione precedente di {collection_name}")
+            continue
+        create_collection_indexes(db[previous], collection_name)
+        db[previous].rename(collection_name, dropTarget=True)
+        print(f"✓ {collection_name}: ripristinata la versione precedente")
+
+    if client:
+        client.close()
+
+def load_staging_collections(db, collections_data):
+    """
+    Carica in parallelo le collezioni di appoggio indicate (nome -> documenti);
+    restituisce i nomi delle collezioni il cui caricamento è fallito
+    """
+    with ThreadPoolExecutor(max_workers=len(collections_data)) as executor:
+        futures = {
+            collection_name: executor.submit(load_staging_collection, db, collection_name, data)
+            for collection_name, data in collections_data.items()
+        }
+    failed = []
+    for collection_name, future in futures.items():
+        try:
+            future.result()
+        except Exception as e:
+            failed.append(collection_name)
+            print(f"✗ Errore durante il caricamento di {collection_name}: {e}")
+    return failed
+
+def blue_green_reload(db, collections_data, derived_data=None):
+    """
+    Ricarica completamente le collezioni indicate (nome -> documenti): caricamento
+    in parallelo nelle collezioni di appoggio, indici costruiti dopo l'inserimento
+    e sostituzione finale solo se tutte le collezioni sono state caricate.
+    `derived_data` (nome -> funzione che restituisce i documenti) indica le
+    collezioni calcolate durante il caricamento delle altre, come le carriere
+    dai riepiloghi stagionali: vengono caricate subito dopo.
+    """
+    collection_names = list(collections_data) + list(derived_data or {})
+    failed = load_staging_collections(db, collections_data)
+    if not failed and derived_data:
+        failed = load_staging_collections(db, {
+            collection_name: build() for collection_name, build in derived_data.items()
+        })
+
+    if failed:
+        # Le collezioni attive restano intatte: elimina solo quelle di appoggio
+        for collection_name in collection_names:
+            db[collection_name + STAGING_SUFFIX].drop()
+        print("✗ Caricamento annullato, collezioni attive invariate")
+        return False
+
+    try:
+        swap_collections(db, collection_names)
+    except Exception as e:
+        print(f"✗ Errore durante la sostituzione delle collezioni: {e}")
+        rollback_mongodb_collections(db)
+        return False
+    return True
+
+def update_standings(db, races_data):
+    """
+    Aggiorna le classifiche materializzate a partire dalle sole gare cambiate:
+    vengono letti (tramite indici) solo i documenti dei piloti coinvolti
+    """
+    if not races_data:
+        return
+    driver_ids = sorted({ref["driver_id"] for race in races_data for ref in race.get("drivers", [])})
+    season_years = sorted({race["season_year"] for race in races_data})
+    stage_ids = [race["stage_id"] for race in races_data]
+    season_stats = db[SEASON_STATS_COLLECTION]
+
+    # Statistiche dei piloti presenti nelle gare cambiate o che vi comparivano prima
+    existing = list(season_stats.find({"$or": [
+        {"driver_id": {"$in": driver_ids}, "season_year": {"$in": season_years}},
+        {"results.stage_id": {"$in": stage_ids}}
+    ]}, {"_id": 0, "content_hash": 0, "created_at": 0, "updated_at": 0}))
+    updated, removed = merge_season_stats(existing, races_data)
+    if removed:
+        season_stats.delete_many({"_id": {"$in": [
+            stable_id("driver_season", f"{driver_id}:{season_year}") for driver_id, season_year in removed
+        ]}})
+
+    # Carriere ricostruite dalle statistiche stagionali dei soli piloti coinvolti
+    affected_drivers = sorted({stats["driver_id"] for stats in existing + updated})
+    updated_by_key = {(stats["driver_id"], stats["season_year"]): stats for stats in updated}
+    driver_stats = [
+        updated_by_key.pop((stats["driver_id"], stats["season_year"]), stats)
+        for stats in season_stats.find({"driver_id": {"$in": affected_drivers}}, {"_id": 0})
+        if (stats["driver_id"], stats["season_year"]) not in removed
+    ] + list(updated_by_key.values())
+    careers = build_careers(driver_stats)
+    orphans = set(affected_drivers) - {career["driver_id"] for career in careers}
+    if orphans:
+        db[CAREERS_COLLECTION].delete_many({"driver_id": {"$in": sorted(orphans)}})
+
+    updated, careers = adapt_standings_data(updated, careers)
+    sync_collection(db, SEASON_STATS_COLLECTION, updated, "_id")
+    sync_collection(db, CAREERS_COLLECTION, careers, "driver_id")
+
+def rebuild_standings(db, season_years):
+    """
+    Ricalcola da zero, dalle gare presenti in MongoDB, le statistiche delle
+    stagioni indicate e le carriere di tutti i piloti: serve dopo la
+    rimozione di gare, che update_standings (basata sulle gare arrivate)
+    non vede. Le statistiche e le carriere non più presenti vengono eliminate.
+    """
+    season_stats = db[SEASON_STATS_COLLECTION]
+    for season_year in sorted(season_years):
+        race_docs = db.races.find({"season_year": season_year},
+                                  {"_id": 0, "content_hash": 0, "created_at": 0, "updated_at": 0})
+        stats, _ = adapt_standings_data(build_all_season_stats(race_docs), [])
+        sync_collection(db, SEASON_STATS_COLLECTION, stats, "_id")
+        prune_collection(db, SEASON_STATS_COLLECTION, [doc["_id"] for doc in stats], {"season_year": season_year})
+    career_stats = season_stats.find({}, {"_id": 0, "results": 0, "content_hash": 0, "created_at": 0, "updated_at": 0})
+    _, careers = adapt_standings_data([], build_careers(career_stats))
+    sync_collection(db, CAREERS_COLLECTION, careers, "driver_id", prune=True)
+
+def update_ratings(db, race_inputs, all_races=None):
+    """
+    Aggiorna i rating dei piloti con le gare indicate (vedi RatingEngine.update)
+    e riscrive rating e previsioni: lo stato del motore contiene tutti i piloti
+    e tutte le gare da disputare, quindi i documenti obsoleti vengono eliminati
+    """
+    engine = RatingEngine.load()
+    rated = engine.update(race_inputs, all_races)
+    engine.save()
+    ratings, predictions = adapt_ratings_data(engine)
+    sync_collection(db, RATINGS_COLLECTION, ratings, "driver_id", prune=True)
+    sync_collection(db, PREDICTIONS_COLLECTION, predictions, "stage_id", prune=True)
+    print(f"✓ Rating aggiornati con {rated} gare, previsioni per {len(predictions)} gare")
+    return rated
+
+def stored_race_inputs(db):
+    """Gare già presenti in MongoDB, per il ricalcolo completo dei rating"""
+    for race_doc in db.races.find({}, {"_id": 0, "race_result": 0, "statistics": 0}):
+        yield race_input(race_doc)
+
+def update_mongodb_collections(db, changed_races, changed_drivers):
+    """
+    Carica in MongoDB solo le stagioni, le gare e i piloti cambiati nell'ultima estrazione
+    """
+    seasons_data = []
+    races_data = []
+    drivers_data = []
+    venues = {}
+
+    print("\n1. Caricamento gare modificate...")
+    store = get_season_store()
+    for year, stage_ids in changed_races.items():
+        season = load_season_meta(store, year)
+        if not season:
+            continue
+        seasons_data.append(adapt_season_data(season))
+        stage_ids = set(stage_ids)
+        for race in iter_season_races(store, year):
+            if race.get("stage_id") in stage_ids:
+                races_data.append(adapt_race_data(race, season["id"], venues))
+
+    print("2. Caricamento piloti modificati...")
+    drivers_file = Path("Data/extracted/drivers.json")
+    if changed_drivers and drivers_file.exists():
+        changed_drivers = set(changed_drivers)
+        drivers_data = [
+            adapt_driver_data(Driver.from_json(driver)) for driver in iter_json_file(drivers_file)
+            if driver.get("id") in changed_drivers
+        ]
+
+    print("\n3. Aggiornamento incrementale in MongoDB...")
+    sync_collection(db, "seasons", seasons_data, "season_id")
+    sync_collection(db, "races", races_data, "stage_id")
+    sync_collection(db, "venues", [adapt_venue_data(venue) for venue in venues.values()], "venue_id")
+    sync_collection(db, "drivers", drivers_data, "driver_id")
+    update_standings(db, races_data)
+    if races_data:
+        # L'indice è compatto: viene sincronizzato per intero, scrivendo solo i documenti cambiati
+        sync_collection(db, TRACK_STATS_COLLECTION, adapt_track_data(load_track_index(store)), "_id", prune=True)
+        update_ratings(db, [race_input(race) for race in races_data], lambda: stored_race_inputs(db))
+    return seasons_data, races_data, drivers_data
+
+def create_mongodb_collections(incremental=False, changed_races=None, changed_drivers=None,
+                               blue_green=False):
+    """
+    Crea le collezioni MongoDB dai dati estratti. In modalità incrementale
+    carica solo i record cambiati, letti dal manifest se non indicati; con
+    `blue_green` ricarica tutto in collezioni di appoggio e le sostituisce
+    a quelle attive solo a caricamento completato.
     """
     print("=== Adattamento Dati per MongoDB ===\n")
     
@@ -167,44 +637,132 @@ def create_mongodb_collections():
     # Seleziona il database
     db = client.indycar
     
-    # Crea gli indici
-    create_indexes(db)
-    
-    # Carica i file dei dati
-    seasons_data = []
-    races_data = []
-    drivers_data = []
+    # Crea gli indici (nel caricamento blue/green vengono creati dopo l'inserimento)
+    if incremental or not blue_green:
+        create_indexes(db)
     
-    # Carica i dati delle stagioni
-    print("\n1. Caricamento dati stagioni...")
-    season_files = sorted(Path("Data/extracted").glob("season_*.json"))
-    for file in season_files:
-        season = load_json_file(file)
-        if season:
-            seasons_data.append(adapt_season_data(season))
-            # Estrai le gare
-            for race in season.get("races", []):
-                races_data.append(adapt_race_data(race, season["id"]))
+    if incremental:
+        last_run = RunManifest().last_run
+        if changed_races is None:
+            changed_races = last_run.get("changed_races", {})
+        if changed_drivers is None:
+            changed_drivers = last_run.get("changed_drivers", [])
+        seasons_data, races_data, drivers_data = update_mongodb_collections(db, changed_races, changed_drivers)
+        print("\n=== Aggiornamento incrementale completato ===")
+        print(f"\nStatistiche:")
+        print(f"- Stagioni modificate: {len(seasons_data)}")
+        print(f"- Gare modificate: {len(races_data)}")
+        print(f"- Piloti modificati: {len(drivers_data)}")
+        client.close()
+        print("\nConnessione a MongoDB chiusa")
+        return
     
-    # Carica i dati dei piloti
-    print("2. Caricamento dati piloti...")
+    # Stagioni, gare e piloti vengono letti uno alla volta dai file e scritti
+    # a batch: la memoria non cresce con il numero di stagioni caricate
+    store = get_season_store()
     drivers_file = Path("Data/extracted/drivers.json")
-    if drivers_file.exists():
-        drivers = load_json_file(drivers_file)
-        if drivers:
-            drivers_data = [adapt_driver_data(driver) for driver in drivers]
-    
-    # Carica i dati in MongoDB
-    print("\n3. Caricamento dati in MongoDB...")
-    save_to_mongodb(db, "seasons", seasons_data)
-    save_to_mongodb(db, "races", races_data)
-    save_to_mongodb(db, "drivers", drivers_data)
-    
+    counts = defaultdict(int)
+    # Riepiloghi stagionali (senza i risultati gara per gara) da cui si calcolano le carriere
+    career_stats = []
+    # Circuiti raccolti durante il caricamento delle gare, che li referenziano per venue_id
+    venues = {}
+    # Ordini di arrivo di tutte le gare, per i rating dei piloti
+    race_inputs = []
+    rating_data = []
+
+    def season_docs():
+        for year in store.years():
+            season = load_season_meta(store, year)
+            if season:
+                counts["seasons"] += 1
+                yield adapt_season_data(season)
+
+    def race_docs(year, venues=None):
+        for race in iter_season_races(store, year):
+            yield adapt_race_data(race, year, venues)
+
+    def all_race_docs():
+        for year in store.years():
+            for race_doc in race_docs(year, venues):
+                counts["races"] += 1
+                race_inputs.append(race_input(race_doc))
+                yield race_doc
+
+    def driver_docs():
+        if drivers_file.exists():
+            for driver in iter_json_file(drivers_file):
+                counts["drivers"] += 1
+                yield adapt_driver_data(Driver.from_json(driver))
+
+    def season_stats_docs():
+        # Le statistiche di una stagione dipendono solo dalle sue gare: vengono
+        # calcolate una stagione alla volta, con una seconda lettura delle gare
+        for year in store.years():
+            season_stats, _ = adapt_standings_data(build_all_season_stats(race_docs(year)), [])
+            career_stats.extend({key: value for key, value in stats.items() if key != "results"}
+                                for stats in season_stats)
+            counts["season_stats"] += len(season_stats)
+            yield from season_stats
+
+    def career_docs():
+        return adapt_standings_data([], build_careers(career_stats))[1]
+
+    def venue_docs():
+        counts["venues"] = len(venues)
+        return [adapt_venue_data(venue) for _, venue in sorted(venues.items())]
+
+    def track_docs():
+        track_stats = adapt_track_data(load_track_index(store))
+        counts["track_stats"] = len(track_stats)
+        return track_stats
+
+    def rating_docs():
+        # Rating e previsioni vengono calcolati una sola volta dopo il caricamento delle gare
+        if not rating_data:
+            engine = RatingEngine.load()
+            counts["rated_races"] = engine.update(race_inputs)
+            engine.save()
+            rating_data.extend(adapt_ratings_data(engine))
+        return rating_data[0]
+
+    def prediction_docs():
+        rating_docs()
+        return rating_data[1]
+
+    print("\nCaricamento in streaming dei dati in MongoDB...")
+    if blue_green:
+        blue_green_reload(db, {
+            "seasons": season_docs(),
+            "races": all_race_docs(),
+            "drivers": driver_docs(),
+            SEASON_STATS_COLLECTION: season_stats_docs(),
+            TRACK_STATS_COLLECTION: track_docs()
+        }, {
+            "venues": venue_docs,
+            CAREERS_COLLECTION: career_docs,
+            RATINGS_COLLECTION: rating_docs,
+            PREDICTIONS_COLLECTION: prediction_docs
+        })
+    else:
+        sync_collection(db, "seasons", season_docs(), "season_id", prune=True)
+        sync_collection(db, "races", all_race_docs(), "stage_id", prune=True)
+        sync_collection(db, "venues", venue_docs(), "venue_id", prune=True)
+        sync_collection(db, "drivers", driver_docs(), "driver_id", prune=True)
+        sync_collection(db, SEASON_STATS_COLLECTION, season_stats_docs(), "_id", prune=True)
+        sync_collection(db, CAREERS_COLLECTION, career_docs(), "driver_id", prune=True)
+        sync_collection(db, TRACK_STATS_COLLECTION, track_docs(), "_id", prune=True)
+        sync_collection(db, RATINGS_COLLECTION, rating_docs(), "driver_id", prune=True)
+        sync_collection(db, PREDICTIONS_COLLECTION, prediction_docs(), "stage_id", prune=True)
+
     print("\n=== Adattamento e caricamento completati ===")
     print(f"\nStatistiche:")
-    print(f"- Stagioni: {len(seasons_data)}")
-    print(f"- Gare: {len(races_data)}")
-    print(f"- Piloti: {len(drivers_data)}")
+    print(f"- Stagioni: {counts['seasons']}")
+    print(f"- Gare: {counts['races']}")
+    print(f"- Circuiti: {counts['venues']}")
+    print(f"- Piloti: {counts['drivers']}")
+    print(f"- Statistiche stagionali dei piloti: {counts['season_stats']}")
+    print(f"- Circuiti per stagione: {counts['track_stats']}")
+    print(f"- Gare valutate per i rating: {counts['rated_races']}")
     
     # Chiudi la connessione
     client.close()
@@ -0,0 +1,210 @@
+import queue
+import threading
+import time
+from pathlib import Path
+
+from extractors.seasons_extractor import main as extract_seasons
+from extractors.races_extractor import main as extract_races
+from extractors.settings import DEFAULT_WORKERS, DEFAULT_RPS, DEFAULT_FIRST_SEASON, DEFAULT_LAST_SEASON
+from extractors.drivers_extractor import DriversExtractor
+from extractors.run_manifest import RunManifest
+from mongodb_adapter import (
+    connect_to_mongodb, create_indexes, adapt_season_data, adapt_race_data, adapt_venue_data,
+    adapt_driver_data, adapt_track_data, sync_collection, prune_collection, update_standings,
+    rebuild_standings, update_ratings, stored_race_inputs
+)
+from extractors.track_index import TRACK_STATS_COLLECTION, TrackIndex
+from ratings import race_input
+
+# Dimensione delle code tra le fasi e dei batch di scrittura su MongoDB
+DEFAULT_QUEUE_SIZE = 32
+DEFAULT_BATCH_SIZE = 50
+
+
+class PipelineStage(threading.Thread):
+    """
+    Fase della pipeline che consuma elementi da una coda limitata.
+
+    Un errore su un elemento viene registrato senza fermare la fase,
+    così il produttore non resta mai bloccato su una coda piena.
+    """
+
+    def __init__(self, name, handler, queue_size=DEFAULT_QUEUE_SIZE, on_close=None):
+        super().__init__(name=name, daemon=True)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.handler = handler
+        self.on_close = on_close
+        self.processed = 0
+        self.errors = 0
+
+    def put(self, item) -> None:
+        self.queue.put(item)
+
+    def close(self) -> None:
+        """Segnala la fine del flusso e attende lo svuotamento della coda"""
+        self.queue.put(None)
+        self.join()
+
+    def run(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            try:
+                self.handler(item)
+                self.processed += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"✗ Errore nella fase {self.name}: {e}")
+        if self.on_close:
+            try:
+                self.on_close()
+            except Exception as e:
+                self.errors += 1
+                print(f"✗ Errore nella chiusura della fase {self.name}: {e}")
+
+
+def run_pipeline(workers=DEFAULT_WORKERS, rps=DEFAULT_RPS, timeout=None, use_cache=True,
+                 incremental=False, resume=False, write_files=True,
+                 queue_size=DEFAULT_QUEUE_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                 first_season=DEFAULT_FIRST_SEASON, last_season=DEFAULT_LAST_SEASON,
+                 deadline=None, budget=None):
+    """
+    Esegue estrazione, consolidamento piloti e caricamento in MongoDB in streaming.
+
+    Ogni gara passa alle fasi successive tramite code limitate appena viene
+    scaricata, così il consolidamento dei piloti e le scritture a batch su
+    MongoDB si sovrappongono alle richieste di rete e ogni documento JSON
+    viene interpretato una sola volta. I file delle stagioni sono un output
+    facoltativo (`write_files`).
+    """
+    print("=== Pipeline IndyCar in streaming ===\n")
+    start = time.perf_counter()
+
+    # La lista delle stagioni è una singola richiesta e serve a tutte le fasi
+    extract_seasons(timeout, use_cache, first_season, last_season)
+    if not Path("Data/extracted/seasons.json").exists():
+        print("✗ Estrazione stagioni fallita. Uscita.")
+        return
+
+    client = connect_to_mongodb()
+    if not client:
+        return
+    db = client.indycar
+    create_indexes(db)
+
+    # Fase piloti: una tabella parziale per stagione, unite alla fine in ordine di anno
+    # così il risultato coincide con quello dell'estrattore basato sui file
+    drivers = DriversExtractor()
+    if incremental:
+        drivers.load_existing_drivers()
+    partial_drivers = {}
+
+    def consolidate_race(item):
+        year, race = item
+        partial_drivers.setdefault(str(year), DriversExtractor()).process_race(race)
+
+    # Fase MongoDB: stagioni scritte subito, gare accumulate in batch insieme alle classifiche
+    # materializzate; gli _id caricati servono a eliminare i documenti obsoleti al termine
+    # di un caricamento completo
+    race_batch = []
+    venues = {}
+    loaded_ids = {"seasons": set(), "races": set(), "venues": set()}
+    # Ordini di arrivo delle gare caricate, per i rating dei piloti a fine pipeline
+    race_inputs = []
+
+    def flush_races():
+        if race_batch:
+            sync_collection(db, "races", race_batch, "stage_id")
+            venue_docs = [
+                adapt_venue_data(venues[venue_id])
+                for venue_id in sorted({race["venue_id"] for race in race_batch if "venue_id" in race})
+            ]
+            if venue_docs:
+                loaded_ids["venues"].update(doc["_id"] for doc in venue_docs)
+                sync_collection(db, "venues", venue_docs, "venue_id")
+            update_standings(db, race_batch)
+            race_batch.clear()
+
+    def load_document(item):
+        kind, payload = item
+        if kind == "season":
+            season_doc = adapt_season_data(payload)
+            loaded_ids["seasons"].add(season_doc["_id"])
+            sync_collection(db, "seasons", [season_doc], "season_id")
+        else:
+            year, race = payload
+            race_doc = adapt_race_data(race, year, venues)
+            loaded_ids["races"].add(race_doc["_id"])
+            race_inputs.append(race_input(race_doc))
+            race_batch.append(race_doc)
+            if len(race_batch) >= batch_size:
+                flush_races()
+
+    drivers_stage = PipelineStage("piloti", consolidate_race, queue_size)
+    mongodb_stage = PipelineStage("mongodb", load_document, queue_size, on_close=flush_races)
+    drivers_stage.start()
+    mongodb_stage.start()
+
+    def on_race(year, race):
+        drivers_stage.put((year, race))
+        mongodb_stage.put(("race", (year, race)))
+
+    def on_season(season_data):
+        mongodb_stage.put(("season", season_data))
+
+    try:
+        changed_races = extract_races(workers, rps, timeout, use_cache, incremental, resume,
+                                      write_files, on_race, on_season, deadline, budget)
+    finally:
+        drivers_stage.close()
+        mongodb_stage.close()
+
+    # Stagioni non elaborate per intero: i loro dati già caricati restano intatti
+    manifest = RunManifest()
+    incomplete = manifest.last_run.get("incomplete_seasons", [])
+    if incomplete and not incremental:
+        print(f"! Stagioni non elaborate per intero ({', '.join(incomplete)}): "
+              f"i loro documenti non vengono eliminati")
+    prune = not incremental and not mongodb_stage.errors
+
+    # Unisci le tabelle parziali dei piloti e carica quelli modificati
+    for year in sorted(partial_drivers):
+        drivers.merge_drivers(partial_drivers[year].drivers_by_id)
+    if write_files:
+        drivers.save_drivers_data()
+    changed_ids = drivers.changed_driver_ids
+    sync_collection(db, "drivers", [
+        adapt_driver_data(driver) for driver_id, driver in drivers.drivers_by_id.items()
+        if driver_id in changed_ids
+    ], "driver_id", prune=prune and not incomplete)
+    if prune:
+        # Piloti e circuiti sono condivisi tra le stagioni: si eliminano solo se tutte sono state elaborate
+        prune_collection(db, "seasons", loaded_ids["seasons"], {"year": {"$nin": incomplete}})
+        # Le classifiche delle stagioni che perdono gare vanno ricalcolate dopo la pulizia
+        stale_seasons = db.races.distinct("season_year", {
+            "_id": {"$nin": list(loaded_ids["races"])}, "season_year": {"$nin": incomplete}
+        })
+        prune_collection(db, "races", loaded_ids["races"], {"season_year": {"$nin": incomplete}})
+        if stale_seasons:
+            rebuild_standings(db, stale_seasons)
+        if not incomplete:
+            prune_collection(db, "venues", loaded_ids["venues"])
+    # Indice dei circuiti aggiornato dall'estrazione delle gare
+    sync_collection(db, TRACK_STATS_COLLECTION, adapt_track_data(TrackIndex()), "_id", prune=True)
+    if race_inputs:
+        # Dopo un caricamento completo senza errori le gare caricate sono tutte le gare
+        complete = prune and not incomplete
+        update_ratings(db, race_inputs, None if complete else lambda: stored_race_inputs(db))
+
+    manifest.record_changed_drivers(changed_ids)
+    manifest.save()
+    client.close()
+
+    print("\n=== Pipeline completata ===")
+    print(f"Gare elaborate: piloti {drivers_stage.processed}, MongoDB {mongodb_stage.processed}")
+    print(f"Gare nuove o modificate: {sum(len(ids) for ids in (changed_races or {}).values())}")
+    print(f"Piloti modificati: {len(changed_ids)}")
+    if drivers_stage.errors or mongodb_stage.errors:
+        print(f"! Errori: piloti {drivers_stage.errors}, MongoDB {mongodb_stage.errors}")
+    print(f"Tempo totale: {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,316 @@
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+
+from extractors import json_codec
+from extractors.race_journal import atomic_write_json
+from extractors.run_manifest import FINAL_STATUSES
+
+# Collezioni dei rating dei piloti e delle previsioni delle gare non ancora disputate
+RATINGS_COLLECTION = "driver_ratings"
+PREDICTIONS_COLLECTION = "race_predictions"
+
+# Stato del motore: rating correnti e gare già valutate
+RATINGS_FILE = Path("Data/extracted/ratings.json")
+
+# Parametri del modello, sulla scala di TrueSkill: abilità iniziale e sua
+# incertezza, variabilità di una singola prestazione, incertezza aggiunta
+# prima di ogni gara (l'abilità cambia nel tempo) e riduzione minima della varianza
+MU = 25.0
+SIGMA = MU / 3
+BETA = SIGMA / 2
+TAU = SIGMA / 100
+KAPPA = 1e-4
+
+# Stati di una gara con un ordine di arrivo definitivo
+RATED_STATUSES = {"Closed", "Finished"}
+
+# Cifre decimali dei valori scritti nei documenti (hash del contenuto stabili)
+PRECISION = 4
+
+
+def race_input(race_doc) -> dict:
+    """
+    Dati di una gara (documento della collezione races) usati dal motore:
+    ordine di arrivo dei piloti classificati e piloti iscritti
+    """
+    drivers = [ref for ref in race_doc.get("drivers", []) if ref.get("driver_id")]
+    return {
+        "stage_id": race_doc["stage_id"],
+        "race_id": race_doc.get("race_id"),
+        "season_year": race_doc.get("season_year"),
+        "description": race_doc.get("description"),
+        "scheduled": race_doc.get("scheduled") or "",
+        "status": race_doc.get("status"),
+        "ranking": [[ref["driver_id"], ref["position"]] for ref in drivers if ref.get("position") is not None],
+        "entrants": [ref["driver_id"] for ref in drivers],
+        "names": {ref["driver_id"]: ref.get("name") for ref in drivers}
+    }
+
+
+def is_rateable(race) -> bool:
+    """Una gara aggiorna i rating se è conclusa e ha almeno due piloti classificati"""
+    return race["status"] in RATED_STATUSES and len(race["ranking"]) >= 2
+
+
+def ranking_fingerprint(ranking) -> str:
+    """Impronta dell'ordine di arrivo, per riconoscere i risultati corretti dopo la valutazione"""
+    payload = json.dumps(sorted(ranking), ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def race_key(race):
+    """Ordine cronologico delle gare"""
+    return race["scheduled"], race["stage_id"]
+
+
+def plackett_luce_update(mu, sigma2, positions):
+    """
+    Aggiornamento bayesiano di Weng e Lin per il modello di Plackett-Luce:
+    nuove medie e varianze dei piloti di una gara dato il loro ordine di
+    arrivo (posizioni uguali = pari merito). Calcolato in forma matriciale
+    su tutto lo schieramento.
+    """
+    sigma2 = sigma2 + TAU ** 2
+    c = np.sqrt(np.sum(sigma2 + BETA ** 2))
+    strength = np.exp(mu / c)
+    # not_better[q, s]: il pilota s è arrivato dietro (o pari) al pilota q
+    not_better = positions[None, :] >= positions[:, None]
+    ties = (positions[None, :] == positions[:, None]).sum(axis=1)
+    # Probabilità che i preceda tutti i piloti arrivati non prima di q
+    p = strength[:, None] / (not_better @ strength)[None, :]
+    # Il pilota i partecipa ai confronti dei piloti q arrivati non dopo di lui
+    weights = not_better.T / ties[None, :]
+    omega = sigma2 / c * np.sum(weights * (np.eye(len(mu)) - p), axis=1)
+    gamma = np.sqrt(sigma2) / c
+    delta = gamma * sigma2 / c ** 2 * np.sum(weights * p * (1 - p), axis=1)
+    return mu + omega, sigma2 * np.maximum(1 - delta, KAPPA)
+
+
+def finish_probabilities(mu, sigma, mask):
+    """
+    Probabilità di vittoria e di podio per un insieme di gare, in un solo
+    calcolo vettoriale. `mu`, `sigma` e `mask` hanno forma gare × piloti
+    (schieramenti completati con mask False). Le probabilità sono esatte
+    per il modello di Plackett-Luce: il podio somma i casi in cui il pilota
+    arriva primo, secondo o terzo.
+    """
+    c = np.sqrt(np.sum(np.where(mask, sigma ** 2 + BETA ** 2, 0.0), axis=1, keepdims=True))
+    c = np.where(c > 0, c, 1.0)
+    scores = np.where(mask, mu / c, -np.inf)
+    strength = np.exp(scores - scores.max(axis=1, keepdims=True))
+    win = strength / strength.sum(axis=1, keepdims=True)
+
+    size = win.shape[1]
+    distinct = ~np.eye(size, dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # second[r, j, i]: j primo e i secondo
+        remaining_after_first = 1 - win
+        second = np.where(
+            distinct, win[:, :, None] * win[:, None, :] / remaining_after_first[:, :, None], 0.0
+        )
+        second = np.nan_to_num(second, nan=0.0, posinf=0.0)
+        # third[r, j, k, i]: j primo, k secondo e i terzo
+        remaining_after_second = 1 - win[:, :, None] - win[:, None, :]
+        all_distinct = distinct[:, :, None] & distinct[:, None, :] & distinct[None, :, :]
+        third = np.where(
+            all_distinct,
+            second[:, :, :, None] * win[:, None, None, :] / remaining_after_second[:, :, :, None],
+            0.0
+        )
+        third = np.nan_to_num(third, nan=0.0, posinf=0.0)
+    podium = win + second.sum(axis=1) + third.sum(axis=(1, 2))
+    # Con meno di quattro piloti tutti salgono sul podio
+    podium = np.where(mask.sum(axis=1, keepdims=True) <= 3, 1.0, podium)
+    return np.where(mask, win, 0.0), np.where(mask, np.minimum(podium, 1.0), 0.0)
+
+
+class RatingEngine:
+    """
+    Rating dei piloti aggiornati gara per gara con il modello di
+    Plackett-Luce (ordine di arrivo di uno schieramento intero, stile TrueSkill).
+
+    Lo stato (media e incertezza di ogni pilota, gare valutate con l'impronta
+    del loro ordine di arrivo, gare ancora da disputare) è salvato in
+    RATINGS_FILE: a ogni caricamento vengono valutate solo le gare concluse
+    nuove. Se cambia il risultato di una gara già valutata, o ne arriva una
+    precedente all'ultima valutata, i rating vengono ricalcolati da zero.
+    """
+
+    def __init__(self, state=None):
+        state = state or {}
+        self.drivers = state.get("drivers", {})
+        self.rated_races = state.get("rated_races", {})
+        self.upcoming = state.get("upcoming", {})
+        # Ultimo schieramento valutato di ogni stagione (previsioni senza iscritti)
+        self.season_fields = state.get("season_fields", {})
+        self.last_key = tuple(state.get("last_key", ("", "")))
+
+    @classmethod
+    def load(cls, path=RATINGS_FILE) -> "RatingEngine":
+        path = Path(path)
+        if not path.exists():
+            return cls()
+        try:
+            return cls(json_codec.load_file(path))
+        except (OSError, ValueError) as e:
+            print(f"✗ Errore nel caricamento dei rating da {path}, ricalcolo completo: {e}")
+            return cls()
+
+    def save(self, path=RATINGS_FILE) -> None:
+        path = Path(path)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_json(path, {
+                "drivers": self.drivers,
+                "rated_races": self.rated_races,
+                "upcoming": self.upcoming,
+                "season_fields": self.season_fields,
+                "last_key": list(self.last_key)
+            })
+        except IOError as e:
+            print(f"✗ Errore durante il salvataggio dei rating: {e}")
+
+    def needs_rebuild(self, races, complete=False) -> bool:
+        """
+        Verifica se le gare indicate si possono aggiungere in coda a quelle già
+        valutate; se sono tutte le gare (`complete`) nessuna gara valutata deve mancare
+        """
+        if complete and set(self.rated_races) - {race["stage_id"] for race in races}:
+            return True
+        for race in races:
+            if not is_rateable(race):
+                continue
+            rated = self.rated_races.get(race["stage_id"])
+            if rated is not None:
+                if rated != ranking_fingerprint(race["ranking"]):
+                    return True
+            elif race_key(race) <= self.last_key:
+                return True
+        return False
+
+    def update(self, races, all_races=None) -> int:
+        """
+        Valuta le gare concluse non ancora valutate e registra quelle da
+        disputare. Senza `all_races` le gare indicate sono tutte le gare
+        caricate; altrimenti sono solo quelle cambiate e, se serve un ricalcolo
+        completo, le gare vengono rilette con `all_races()`.
+        Restituisce il numero di gare valutate.
+        """
+        races = list(races)
+        complete = all_races is None
+        if self.needs_rebuild(races, complete):
+            print("! Gare già valutate cambiate o rimosse: ricalcolo completo dei rating")
+            self.__init__()
+            if not complete:
+                races = list(all_races())
+        elif complete:
+            self.upcoming = {}
+
+        rated = 0
+        for race in sorted(races, key=race_key):
+            if is_rateable(race):
+                self.upcoming.pop(race["stage_id"], None)
+                if race["stage_id"] not in self.rated_races:
+                    self.rate(race)
+                    rated += 1
+            elif race["status"] in FINAL_STATUSES or race["stage_id"] in self.rated_races:
+                # Gare annullate o concluse senza ordine di arrivo: nessuna previsione
+                self.upcoming.pop(race["stage_id"], None)
+            else:
+                self.upcoming[race["stage_id"]] = {
+                    key: race[key] for key in ("race_id", "season_year", "description", "scheduled", "entrants", "names")
+                }
+        return rated
+
+    def rate(self, race) -> None:
+        """Aggiorna i rating dei piloti classificati in una gara"""
+        driver_ids = [driver_id for driver_id, _ in race["ranking"]]
+        positions = np.array([position for _, position in race["ranking"]], dtype=float)
+        current = [self.drivers.get(driver_id, {}) for driver_id in driver_ids]
+        mu = np.array([driver.get("mu", MU) for driver in current])
+        sigma2 = np.array([driver.get("sigma", SIGMA) for driver in current]) ** 2
+        mu, sigma2 = plackett_luce_update(mu, sigma2, positions)
+        for index, driver_id in enumerate(driver_ids):
+            driver = self.drivers.setdefault(driver_id, {"races": 0})
+            driver.update(
+                mu=float(mu[index]),
+                sigma=float(np.sqrt(sigma2[index])),
+                races=driver["races"] + 1,
+                last_race=race["stage_id"],
+                name=race["names"].get(driver_id) or driver.get("name")
+            )
+        self.rated_races[race["stage_id"]] = ranking_fingerprint(race["ranking"])
+        self.season_fields[str(race["season_year"])] = driver_ids
+        self.last_key = race_key(race)
+
+    def rating_docs(self):
+        """Rating di tutti i piloti, dal più alto; rating = media - 3 incertezze"""
+        docs = [
+            {
+                "driver_id": driver_id,
+                "name": driver.get("name"),
+                "mu": round(driver["mu"], PRECISION),
+                "sigma": round(driver["sigma"], PRECISION),
+                "rating": round(driver["mu"] - 3 * driver["sigma"], PRECISION),
+                "races": driver["races"],
+                "last_race": driver.get("last_race")
+            }
+            for driver_id, driver in self.drivers.items()
+        ]
+        docs.sort(key=lambda doc: (-doc["rating"], doc["driver_id"]))
+        for rank, doc in enumerate(docs, 1):
+            doc["rank"] = rank
+        return docs
+
+    def prediction_docs(self):
+        """
+        Probabilità di vittoria e di podio per le gare non ancora disputate,
+        calcolate insieme per tutte le gare. Lo schieramento sono gli iscritti
+        o, se non sono ancora noti, i piloti dell'ultima gara valutata della stagione.
+        """
+        races = []
+        for stage_id, race in sorted(self.upcoming.items(), key=lambda item: (item[1]["scheduled"], item[0])):
+            field = race["entrants"] or self.season_fields.get(str(race["season_year"]), [])
+            if field:
+                races.append((stage_id, race, field, "entrants" if race["entrants"] else "last_race"))
+        if not races:
+            return []
+
+        size = max(len(field) for _, _, field, _ in races)
+        mu = np.zeros((len(races), size))
+        sigma = np.zeros((len(races), size))
+        mask = np.zeros((len(races), size), dtype=bool)
+        for row, (_, _, field, _) in enumerate(races):
+            for column, driver_id in enumerate(field):
+                driver = self.drivers.get(driver_id, {})
+                mu[row, column] = driver.get("mu", MU)
+                sigma[row, column] = driver.get("sigma", SIGMA)
+                mask[row, column] = True
+        win, podium = finish_probabilities(mu, sigma, mask)
+
+        docs = []
+        for row, (stage_id, race, field, field_source) in enumerate(races):
+            predictions = [
+                {
+                    "driver_id": driver_id,
+                    "name": race["names"].get(driver_id) or self.drivers.get(driver_id, {}).get("name"),
+                    "win_probability": round(float(win[row, column]), PRECISION),
+                    "podium_probability": round(float(podium[row, column]), PRECISION)
+                }
+                for column, driver_id in enumerate(field)
+            ]
+            predictions.sort(key=lambda prediction: (-prediction["win_probability"], prediction["driver_id"]))
+            docs.append({
+                "stage_id": stage_id,
+                "race_id": race["race_id"],
+                "season_year": race["season_year"],
+                "description": race["description"],
+                "scheduled": race["scheduled"],
+                "field_source": field_source,
+                "rated_through": self.last_key[1] or None,
+                "predictions": predictions
+            })
+        return docs
@@ -0,0 +1,210 @@
+import time
+from pathlib import Path
+
+import numpy as np
+
+from extractors.season_store import get_season_store
+
+# Directory dei file delle stagioni estratte
+EXTRACTED_DIR = Path("Data/extracted")
+
+# Valore del numero di auto per i piloti non presenti in una gara
+NO_CAR_NUMBER = -1
+
+
+class ResultsMatrix:
+    """
+    Matrici dense pilota × gara dei risultati di tutte le stagioni.
+
+    Le righe sono i piloti (indice interno in `driver_index`), le colonne le
+    gare in ordine cronologico. `positions` e `points` valgono NaN dove il
+    pilota non ha preso il via, `car_numbers` vale NO_CAR_NUMBER e la maschera
+    `started` è False. Le interrogazioni lavorano su viste delle matrici,
+    senza cicli Python su piloti o gare.
+    """
+
+    def __init__(self, driver_ids, driver_names, races, positions, points, car_numbers):
+        self.driver_ids = list(driver_ids)
+        self.driver_names = list(driver_names)
+        self.driver_index = {driver_id: row for row, driver_id in enumerate(self.driver_ids)}
+        self.races = races
+        self.seasons = np.array([race["season_year"] for race in races])
+        self.positions = positions
+        self.points = points
+        self.car_numbers = car_numbers
+        self.started = ~np.isnan(positions)
+
+    @classmethod
+    def from_seasons(cls, seasons):
+        """
+        Costruisce le matrici dai dati delle stagioni (formato dei file season_{anno}.json)
+        """
+        driver_index = {}
+        driver_names = []
+        races = []
+        cells = []  # (riga, colonna, posizione, punti, numero auto)
+
+        for season in sorted(seasons, key=lambda season: str(season["id"])):
+            season_races = sorted(season.get("races", []), key=lambda race: race.get("scheduled") or "")
+            for race in season_races:
+                column = len(races)
+                races.append({
+                    "stage_id": race.get("stage_id"),
+                    "description": race.get("description"),
+                    "scheduled": race.get("scheduled"),
+                    "season_year": str(season["id"])
+                })
+                stage = (race.get("complete_details") or {}).get("stage", {})
+                for competitor in stage.get("competitors", []):
+                    driver_id = competitor.get("id")
+                    if not driver_id:
+                        continue
+                    row = driver_index.setdefault(driver_id, len(driver_index))
+                    if row == len(driver_names):
+                        driver_names.append(competitor.get("name"))
+                    result = competitor.get("result", {})
+                    cells.append((
+                        row, column,
+                        result.get("position"), result.get("points"), result.get("car_number")
+                    ))
+
+        shape = (len(driver_index), len(races))
+        positions = np.full(shape, np.nan)
+        points = np.full(shape, np.nan)
+        car_numbers = np.full(shape, NO_CAR_NUMBER, dtype=np.int32)
+        if cells:
+            rows, columns, cell_positions, cell_points, cell_cars = zip(*cells)
+            rows, columns = np.array(rows), np.array(columns)
+            positions[rows, columns] = [np.nan if value is None else value for value in cell_positions]
+            # Un pilota classificato senza punti assegnati ha 0 punti
+            points[rows, columns] = [0 if value is None else value for value in cell_points]
+            car_numbers[rows, columns] = [
+                NO_CAR_NUMBER if value in (None, "") else int(value) for value in cell_cars
+            ]
+            # Senza posizione il pilota non ha preso il via
+            points[np.isnan(positions)] = np.nan
+        return cls(driver_index, driver_names, races, positions, points, car_numbers)
+
+    @classmethod
+    def from_files(cls, extracted_dir=EXTRACTED_DIR, storage_format=None):
+        """
+        Costruisce le matrici dalle stagioni estratte (store del formato indicato)
+        """
+        store = get_season_store(storage_format, extracted_dir)
+        seasons = []
+        for year in store.years():
+            try:
+                seasons.append(store.load_season(year))
+            except (OSError, ValueError) as e:
+                print(f"✗ Errore nel caricamento del file {store.path(year)}: {e}")
+        return cls.from_seasons(seasons)
+
+    def season_columns(self, season=None) -> slice:
+        """Intervallo di colonne di una stagione (tutte le gare se non indicata)"""
+        if season is None:
+            return slice(0, len(self.races))
+        columns = np.flatnonzero(self.seasons == str(season))
+        if not len(columns):
+            raise KeyError(f"Stagione {season} non presente")
+        return slice(columns[0], columns[-1] + 1)
+
+    def row(self, driver_id) -> int:
+        """Indice interno di un pilota"""
+        try:
+            return self.driver_index[driver_id]
+        except KeyError:
+            raise KeyError(f"Pilota {driver_id} non presente") from None
+
+    def cumulative_points(self, season=None) -> np.ndarray:
+        """Punti cumulati di ogni pilota dopo ogni gara (piloti × gare della stagione)"""
+        return np.nancumsum(self.points[:, self.season_columns(season)], axis=1)
+
+    def standings_after(self, race_number, season=None, limit=None):
+        """
+        Classifica dopo la gara `race_number` (da 1) della stagione: elenco di
+        (driver_id, nome, punti, vittorie) ordinato per punti e vittorie
+        """
+        columns = self.season_columns(season)
+        end = columns.start + race_number
+        if race_number < 1 or end > columns.stop:
+            raise IndexError(f"Gara {race_number} fuori dall'intervallo della stagione")
+        window = slice(columns.start, end)
+        totals = np.nansum(self.points[:, window], axis=1)
+        wins = (self.positions[:, window] == 1).sum(axis=1)
+        active = self.started[:, window].any(axis=1)
+        rows = np.flatnonzero(active)
+        order = rows[np.lexsort((-wins[rows], -totals[rows]))][:limit]
+        return [
+            (self.driver_ids[row], self.driver_names[row], float(totals[row]), int(wins[row]))
+            for row in order
+        ]
+
+    def head_to_head(self, driver_a, driver_b, season=None) -> dict:
+        """Confronto diretto tra due piloti nelle gare disputate da entrambi"""
+        columns = self.season_columns(season)
+        positions_a = self.positions[self.row(driver_a), columns]
+        positions_b = self.positions[self.row(driver_b), columns]
+        both = ~np.isnan(positions_a) & ~np.isnan(positions_b)
+        return {
+            "races": int(both.sum()),
+            "wins_a": int((positions_a[both] < positions_b[both]).sum()),
+            "wins_b": int((positions_b[both] < positions_a[both]).sum())
+        }
+
+    def points_gap(self, driver_a, driver_b, season=None) -> np.ndarray:
+        """Distacco in punti di driver_a su driver_b dopo ogni gara della stagione"""
+        cumulative = self.cumulative_points(season)
+        return cumulative[self.row(driver_a)] - cumulative[self.row(driver_b)]
+
+    def rolling_form(self, window=5, season=None) -> np.ndarray:
+        """
+        Media dei punti delle ultime `window` gare disputate da ogni pilota, dopo
+        ogni gara (piloti × gare); NaN finché il pilota non ha disputato gare
+        """
+        columns = self.season_columns(season)
+        started = self.started[:, columns]
+        points = np.where(started, self.points[:, columns], 0.0)
+        # Indice progressivo delle gare disputate: la finestra scorre su queste
+        starts = np.cumsum(started, axis=1)
+        points_sum = np.cumsum(points, axis=1)
+
+        # Per ogni cella, punti cumulati al momento della gara disputata starts - window
+        padded_sums = np.zeros((points.shape[0], points.shape[1] + 1))
+        start_positions = np.zeros_like(padded_sums, dtype=np.int64)
+        rows, columns_started = np.nonzero(started)
+        start_positions[rows, starts[rows, columns_started]] = columns_started + 1
+        padded_sums[:, 1:] = points_sum
+        # Colonna (+1) della k-esima gara disputata, per k = starts - window
+        cutoff = np.clip(starts - window, 0, None)
+        cutoff_columns = np.take_along_axis(start_positions, cutoff, axis=1)
+        cutoff_sums = np.take_along_axis(padded_sums, cutoff_columns, axis=1)
+
+        counts = np.minimum(starts, window)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, (points_sum - cutoff_sums) / counts, np.nan)
+
+
+def main():
+    """
+    Costruisce le matrici dai file estratti e mostra la classifica dell'ultima stagione
+    """
+    start = time.perf_counter()
+    matrix = ResultsMatrix.from_files()
+    elapsed = time.perf_counter() - start
+    if not matrix.races:
+        print("✗ Nessuna stagione estratta trovata")
+        return
+    print(f"✓ Matrici costruite: {len(matrix.driver_ids)} piloti × {len(matrix.races)} gare in {elapsed:.3f}s")
+
+    season = matrix.seasons[-1]
+    total_races = matrix.season_columns(season).stop - matrix.season_columns(season).start
+    start = time.perf_counter()
+    standings = matrix.standings_after(total_races, season, limit=10)
+    elapsed = time.perf_counter() - start
+    print(f"\nClassifica {season} dopo {total_races} gare ({elapsed * 1000:.2f}ms):")
+    for position, (driver_id, name, points, wins) in enumerate(standings, 1):
+        print(f"{position:>3}. {name:<30} {points:>6.0f} punti, {wins} vittorie")
+
+
+if __name__ == "__main__":
+    main()
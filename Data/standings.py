@@ -0,0 +1,153 @@
+from collections import defaultdict
+
+# Collezioni materializzate delle classifiche
+SEASON_STATS_COLLECTION = "driver_season_stats"
+CAREERS_COLLECTION = "driver_careers"
+
+
+def race_entry(race_doc, driver_ref):
+    """
+    Risultato di un pilota in una gara, come registrato nelle statistiche stagionali
+    """
+    return {
+        "stage_id": race_doc["stage_id"],
+        "race_id": race_doc["race_id"],
+        "description": race_doc.get("description"),
+        "scheduled": race_doc.get("scheduled"),
+        "position": driver_ref.get("position"),
+        "points": driver_ref.get("points"),
+        "car_number": driver_ref.get("car_number")
+    }
+
+
+def summarize_results(results):
+    """
+    Calcola punti, vittorie, podi e partenze da una lista di risultati
+    """
+    positions = [entry["position"] for entry in results if entry.get("position") is not None]
+    return {
+        "points": sum(entry.get("points") or 0 for entry in results),
+        "wins": sum(1 for position in positions if position == 1),
+        "podiums": sum(1 for position in positions if position <= 3),
+        "starts": len(results)
+    }
+
+
+def group_race_results(race_docs):
+    """
+    Raggruppa i risultati delle gare (documenti MongoDB) per (pilota, stagione)
+    """
+    results = defaultdict(list)
+    names = {}
+    for race in race_docs:
+        for driver_ref in race.get("drivers", []):
+            key = (driver_ref["driver_id"], race["season_year"])
+            results[key].append(race_entry(race, driver_ref))
+            names.setdefault(key, driver_ref.get("name"))
+    return results, names
+
+
+def build_season_stats(driver_id, season_year, name, results):
+    """
+    Costruisce il documento delle statistiche di un pilota in una stagione
+    """
+    results = sorted(results, key=lambda entry: (entry.get("scheduled") or "", entry["stage_id"]))
+    car_numbers = [entry["car_number"] for entry in results if entry.get("car_number") is not None]
+    stats = {
+        "driver_id": driver_id,
+        "season_year": season_year,
+        "name": name,
+        "car_number": car_numbers[0] if car_numbers else None
+    }
+    stats.update(summarize_results(results))
+    stats["results"] = results
+    return stats
+
+
+def build_career(driver_id, season_stats):
+    """
+    Costruisce il documento di carriera di un pilota dalle sue statistiche stagionali
+    """
+    season_stats = sorted(season_stats, key=lambda stats: stats["season_year"])
+    seasons = [
+        {
+            "season_year": stats["season_year"],
+            "points": stats["points"],
+            "wins": stats["wins"],
+            "podiums": stats["podiums"],
+            "starts": stats["starts"]
+        }
+        for stats in season_stats
+    ]
+    names = [stats["name"] for stats in season_stats if stats.get("name")]
+    car_numbers = [stats["car_number"] for stats in season_stats if stats.get("car_number") is not None]
+    return {
+        "driver_id": driver_id,
+        "name": names[-1] if names else None,
+        "car_number": car_numbers[-1] if car_numbers else None,
+        "points": sum(season["points"] for season in seasons),
+        "wins": sum(season["wins"] for season in seasons),
+        "podiums": sum(season["podiums"] for season in seasons),
+        "starts": sum(season["starts"] for season in seasons),
+        "seasons": seasons
+    }
+
+
+def build_careers(season_stats):
+    """
+    Costruisce le carriere di tutti i piloti presenti nelle statistiche stagionali indicate
+    """
+    stats_by_driver = defaultdict(list)
+    for stats in season_stats:
+        stats_by_driver[stats["driver_id"]].append(stats)
+    return [build_career(driver_id, stats) for driver_id, stats in sorted(stats_by_driver.items())]
+
+
+def build_all_season_stats(race_docs):
+    """
+    Calcola da zero le statistiche stagionali di tutti i piloti presenti nelle gare
+    """
+    results, names = group_race_results(race_docs)
+    return [
+        build_season_stats(driver_id, season_year, names.get((driver_id, season_year)), entries)
+        for (driver_id, season_year), entries in sorted(results.items())
+    ]
+
+
+def build_standings(race_docs):
+    """
+    Calcola da zero statistiche stagionali e carriere a partire da tutte le gare
+    """
+    season_stats = build_all_season_stats(race_docs)
+    return season_stats, build_careers(season_stats)
+
+
+def merge_season_stats(existing_stats, race_docs):
+    """
+    Aggiorna le statistiche stagionali esistenti con le sole gare cambiate.
+
+    I risultati delle gare indicate sostituiscono quelli già registrati e i
+    totali vengono ricalcolati dalla lista dei risultati. `existing_stats`
+    deve contenere almeno i documenti dei piloti che compaiono nelle gare,
+    prima o dopo la modifica. Restituisce i documenti aggiornati e le coppie
+    (pilota, stagione) rimaste senza risultati.
+    """
+    changed_stage_ids = {race["stage_id"] for race in race_docs}
+    new_results, names = group_race_results(race_docs)
+    existing = {(stats["driver_id"], stats["season_year"]): stats for stats in existing_stats}
+
+    updated = []
+    removed = []
+    for key in sorted(set(new_results) | set(existing)):
+        previous = existing.get(key, {})
+        results = [
+            entry for entry in previous.get("results", [])
+            if entry["stage_id"] not in changed_stage_ids
+        ] + new_results.get(key, [])
+        if results:
+            driver_id, season_year = key
+            name = names.get(key) or previous.get("name")
+            updated.append(build_season_stats(driver_id, season_year, name, results))
+        elif previous:
+            removed.append(key)
+    return updated, removed